@@ -0,0 +1,95 @@
+"""
+Runtime configuration for Pizza Store API
+Values are read from environment variables with development defaults
+"""
+
+import hashlib
+import os
+import tempfile
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def _env_str(name: str, default: str) -> str:
+    return os.getenv(name) or default
+
+
+def _env_list(name: str) -> list:
+    value = os.getenv(name) or ""
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+# Database connection
+DATABASE_URL = _env_str("PIZZA_DATABASE_URL", "sqlite:///./pizza_store.db")
+DB_POOL_SIZE = _env_int("PIZZA_DB_POOL_SIZE", 10)
+DB_MAX_OVERFLOW = _env_int("PIZZA_DB_MAX_OVERFLOW", 20)
+DB_POOL_TIMEOUT = _env_float("PIZZA_DB_POOL_TIMEOUT", 30.0)
+# Comma-separated read replica URLs for GET handlers. When empty, reads use
+# read-only connections to a SQLite primary, or the primary itself otherwise.
+READ_DATABASE_URLS = _env_list("PIZZA_READ_DATABASE_URLS")
+
+# SQLite pragmas applied to every new connection. WAL lets readers proceed
+# while a writer commits; synchronous=NORMAL is durable across application
+# crashes in WAL mode and only risks the last commits on power loss.
+SQLITE_JOURNAL_MODE = _env_str("PIZZA_SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = _env_str("PIZZA_SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_MMAP_SIZE = _env_int("PIZZA_SQLITE_MMAP_SIZE", 256 * 1024 * 1024)
+# Negative values are KiB, positive values are pages
+SQLITE_CACHE_SIZE = _env_int("PIZZA_SQLITE_CACHE_SIZE", -64 * 1024)
+SQLITE_TEMP_STORE = _env_str("PIZZA_SQLITE_TEMP_STORE", "MEMORY")
+SQLITE_BUSY_TIMEOUT = _env_int("PIZZA_SQLITE_BUSY_TIMEOUT", 5000)
+
+
+# Create missing tables and indexes when the app starts; set to 0 in
+# production and run ``python migrate.py`` once per deploy instead
+SCHEMA_SETUP = _env_int("PIZZA_SCHEMA_SETUP", 1) > 0
+
+# Worker threads available to the synchronous, database-bound route handlers
+THREADPOOL_SIZE = _env_int("PIZZA_THREADPOOL_SIZE", 40)
+
+# Response cache; setting any limit to 0 disables it
+CACHE_TTL = _env_float("PIZZA_CACHE_TTL", 60.0)
+CACHE_MAX_ENTRIES = _env_int("PIZZA_CACHE_MAX_ENTRIES", 1024)
+CACHE_MAX_BYTES = _env_int("PIZZA_CACHE_MAX_BYTES", 32 * 1024 * 1024)
+
+# Concurrent requests for the same uncached body wait for one computation
+# instead of each running it
+CACHE_COALESCE = _env_int("PIZZA_CACHE_COALESCE", 1) > 0
+# Seconds a request waits for another one's computation before running its own
+CACHE_COALESCE_WAIT = _env_float("PIZZA_CACHE_COALESCE_WAIT", 5.0)
+
+# "database" answers catalog reads with SQL; "snapshot" loads the catalog
+# into memory at startup and answers reads from there, reloading it after
+# every catalog change; "shared" does the same from an image file in
+# SNAPSHOT_DIR that every worker on the host maps instead of loading its own
+CATALOG_MODE = _env_str("PIZZA_CATALOG_MODE", "database")
+SNAPSHOT_DIR = _env_str(
+    "PIZZA_SNAPSHOT_DIR",
+    os.path.join(
+        tempfile.gettempdir(),
+        f"pizza-catalog-{hashlib.sha1(DATABASE_URL.encode()).hexdigest()[:12]}"
+    )
+)
+
+# Response compression: bodies smaller than the threshold are sent as-is
+COMPRESSION_MIN_SIZE = _env_int("PIZZA_COMPRESSION_MIN_SIZE", 1024)
+GZIP_LEVEL = _env_int("PIZZA_GZIP_LEVEL", 6)
+
+# Seconds a worker trusts its cached catalog version before re-reading it;
+# bounds how long writes made by other processes go unnoticed
+CATALOG_VERSION_CHECK_INTERVAL = _env_float("PIZZA_CATALOG_VERSION_CHECK_INTERVAL", 1.0)
+
+# Request profiling: Server-Timing headers, GET /metrics, and cProfile dumps
+# for a sample of requests that turn out slower than the threshold
+PROFILING_ENABLED = _env_int("PIZZA_PROFILING", 0) > 0
+PROFILE_SAMPLE_RATE = _env_float("PIZZA_PROFILE_SAMPLE_RATE", 0.01)
+SLOW_REQUEST_THRESHOLD_MS = _env_float("PIZZA_SLOW_REQUEST_MS", 500.0)
+PROFILE_DIR = _env_str("PIZZA_PROFILE_DIR", "./profiles")
@@ -2,7 +2,22 @@
 Database configuration and session management
 """
 
-from .base import Base, engine, SessionLocal
-from .connection import get_db
+from .base import Base, engine, SessionLocal, session_router
+from .chunks import id_chunks
+from .connection import get_db, get_read_db, get_session_router
+from .engine import create_database_engine, create_read_engines
+from .routing import SessionRouter
 
-__all__ = ["Base", "engine", "SessionLocal", "get_db"]
+__all__ = [
+    "Base",
+    "engine",
+    "SessionLocal",
+    "session_router",
+    "get_db",
+    "get_read_db",
+    "get_session_router",
+    "id_chunks",
+    "create_database_engine",
+    "create_read_engines",
+    "SessionRouter",
+]
@@ -2,21 +2,24 @@
 Database base configuration
 """
 
-from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
-# Database URL
-SQLALCHEMY_DATABASE_URL = "sqlite:///./pizza_store.db"
+from app.config import DATABASE_URL
+from .engine import create_database_engine, create_read_engines
+from .routing import SessionRouter
 
-# Create engine
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, 
-    connect_args={"check_same_thread": False}
-)
+# Database URL (PIZZA_DATABASE_URL)
+SQLALCHEMY_DATABASE_URL = DATABASE_URL
+
+# Create engine with the configured pool and SQLite tuning
+engine = create_database_engine(SQLALCHEMY_DATABASE_URL)
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Route reads to replicas (PIZZA_READ_DATABASE_URLS) or read-only connections
+session_router = SessionRouter(engine, create_read_engines(SQLALCHEMY_DATABASE_URL))
+
 # Create base class for models
 Base = declarative_base()
@@ -0,0 +1,16 @@
+"""
+Chunked ID lists
+
+Statements filtering on an arbitrary number of IDs run once per chunk, so
+each ``IN`` list stays well below SQLite's bound parameter limit.
+"""
+
+from typing import Iterator, List
+
+CHUNK_SIZE = 500
+
+
+def id_chunks(ids: List[int]) -> Iterator[List[int]]:
+    """Consecutive slices of ``ids`` holding at most ``CHUNK_SIZE`` IDs"""
+    for start in range(0, len(ids), CHUNK_SIZE):
+        yield ids[start:start + CHUNK_SIZE]
@@ -2,15 +2,36 @@
 Database connection and session management
 """
 
+from fastapi import Depends
 from sqlalchemy.orm import Session
-from .base import SessionLocal
+from .base import session_router
+from .routing import SessionRouter
 
 
-def get_db():
+def get_session_router() -> SessionRouter:
     """
-    Dependency to get database session
+    Dependency returning the session router; override it to point the app
+    at other databases
     """
-    db = SessionLocal()
+    return session_router
+
+
+def get_db(router: SessionRouter = Depends(get_session_router)):
+    """
+    Dependency to get a database session on the primary, for handlers that write
+    """
+    db = router.write_session()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_read_db(router: SessionRouter = Depends(get_session_router)):
+    """
+    Dependency to get a database session from the read pool, for read-only handlers
+    """
+    db = router.read_session()
     try:
         yield db
     finally:
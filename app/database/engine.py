@@ -0,0 +1,133 @@
+"""
+Database engine factory
+
+Builds the engine from ``app.config``. SQLite connections get the tuning
+pragmas applied by a ``connect`` event hook, so every pooled connection is
+configured once when it is opened and stays warm for its lifetime.
+"""
+
+import os
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.pool import StaticPool
+from typing import Dict, List, Optional, Union
+
+from app.config import (
+    DATABASE_URL,
+    DB_MAX_OVERFLOW,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    READ_DATABASE_URLS,
+    SQLITE_BUSY_TIMEOUT,
+    SQLITE_CACHE_SIZE,
+    SQLITE_JOURNAL_MODE,
+    SQLITE_MMAP_SIZE,
+    SQLITE_SYNCHRONOUS,
+    SQLITE_TEMP_STORE,
+)
+
+
+def sqlite_pragmas(**overrides: Union[str, int]) -> Dict[str, Union[str, int]]:
+    """Configured pragma values, with optional per-engine overrides"""
+    pragmas = {
+        "journal_mode": SQLITE_JOURNAL_MODE,
+        "synchronous": SQLITE_SYNCHRONOUS,
+        "mmap_size": SQLITE_MMAP_SIZE,
+        "cache_size": SQLITE_CACHE_SIZE,
+        "temp_store": SQLITE_TEMP_STORE,
+        "busy_timeout": SQLITE_BUSY_TIMEOUT,
+    }
+    pragmas.update(overrides)
+    return pragmas
+
+
+def _apply_pragmas(engine: Engine, pragmas: Dict[str, Union[str, int]]):
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def _is_sqlite_file(url: URL) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+
+def _read_only_sqlite_url(url: URL) -> URL:
+    """URI filename opening the same SQLite file with ``mode=ro``"""
+    return url.set(
+        database=f"file:{os.path.abspath(url.database)}",
+        query={**url.query, "mode": "ro", "uri": "true"}
+    )
+
+
+def create_database_engine(
+    url: Union[str, URL] = DATABASE_URL,
+    pool_size: int = DB_POOL_SIZE,
+    max_overflow: int = DB_MAX_OVERFLOW,
+    pool_timeout: float = DB_POOL_TIMEOUT,
+    pragmas: Optional[Dict[str, Union[str, int]]] = None,
+    read_only: bool = False
+) -> Engine:
+    """
+    Create an engine for ``url``.
+
+    File-backed SQLite databases get a connection pool and the tuning
+    pragmas (``pragmas`` replaces the configured set); with ``read_only``
+    the file is opened with ``mode=ro`` and the journal mode is left to the
+    primary, and PostgreSQL engines run read-only transactions. In-memory
+    SQLite shares a single connection, and other databases use the pool
+    settings only.
+    """
+    database_url = make_url(url)
+    if database_url.get_backend_name() != "sqlite":
+        engine = create_engine(
+            database_url,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=pool_timeout
+        )
+        if read_only and database_url.get_backend_name() == "postgresql":
+            # Transactions on read engines run as READ ONLY
+            engine = engine.execution_options(postgresql_readonly=True)
+        return engine
+
+    connect_args = {"check_same_thread": False}
+    if not _is_sqlite_file(database_url):
+        engine = create_engine(database_url, connect_args=connect_args, poolclass=StaticPool)
+    else:
+        if read_only:
+            database_url = _read_only_sqlite_url(database_url)
+        engine = create_engine(
+            database_url,
+            connect_args=connect_args,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=pool_timeout
+        )
+    pragmas = sqlite_pragmas() if pragmas is None else dict(pragmas)
+    if read_only:
+        # Changing the journal mode is a write
+        pragmas.pop("journal_mode", None)
+    _apply_pragmas(engine, pragmas)
+    return engine
+
+
+def create_read_engines(
+    primary_url: Union[str, URL] = DATABASE_URL,
+    replica_urls: List[str] = READ_DATABASE_URLS
+) -> List[Engine]:
+    """
+    Engines for the read pool: the configured replicas, or read-only
+    connections to a SQLite primary file. An empty list means reads share
+    the primary engine.
+    """
+    if replica_urls:
+        return [create_database_engine(url, read_only=True) for url in replica_urls]
+    if _is_sqlite_file(make_url(primary_url)):
+        return [create_database_engine(primary_url, read_only=True)]
+    return []
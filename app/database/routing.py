@@ -0,0 +1,42 @@
+"""
+Read/write session routing
+
+Writes go to the primary engine; reads are spread round-robin over one or
+more read engines (replica URLs, or read-only connections to the primary
+SQLite file). Handlers choose a side through their dependency: ``get_db``
+for the primary, ``get_read_db`` for the read pool.
+"""
+
+import itertools
+import threading
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+from typing import Sequence
+
+
+class SessionRouter:
+    """Hands out sessions bound to the primary or to one of the read engines"""
+
+    def __init__(self, primary: Engine, replicas: Sequence[Engine] = ()):
+        self.primary = primary
+        self.replicas = list(replicas) or [primary]
+        self._write_sessions = sessionmaker(autocommit=False, autoflush=False, bind=primary)
+        self._read_sessions = [
+            sessionmaker(autocommit=False, autoflush=False, bind=engine)
+            for engine in self.replicas
+        ]
+        self._next_read = itertools.cycle(self._read_sessions)
+        self._lock = threading.Lock()
+
+    def write_session(self) -> Session:
+        return self._write_sessions()
+
+    def read_session(self) -> Session:
+        with self._lock:
+            session_factory = next(self._next_read)
+        return session_factory()
+
+    def dispose(self):
+        for engine in {id(engine): engine for engine in [self.primary, *self.replicas]}.values():
+            engine.dispose()
@@ -2,6 +2,7 @@
 Database models for Pizza Store API
 """
 
-from .pizza import Pizza, Ingredient, PizzaIngredient, IngredientIngredient
+from .pizza import Pizza, Ingredient, PizzaIngredient, IngredientIngredient, PizzaAllergen, PizzaStats
+from .catalog import CatalogVersion
 
-__all__ = ["Pizza", "Ingredient", "PizzaIngredient", "IngredientIngredient"]
+__all__ = ["Pizza", "Ingredient", "PizzaIngredient", "IngredientIngredient", "PizzaAllergen", "PizzaStats", "CatalogVersion"]
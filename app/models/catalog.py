@@ -0,0 +1,21 @@
+"""
+SQLAlchemy models for catalog-wide metadata
+"""
+
+from sqlalchemy import Column, DateTime, Integer
+from app.database.base import Base
+
+
+class CatalogVersion(Base):
+    """
+    Single-row table counting catalog writes.
+    
+    Bumped in the same transaction as every write to pizzas, ingredients or
+    their association tables, so all processes sharing the database agree on
+    the current version.
+    """
+    __tablename__ = 'catalog_version'
+    
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False)
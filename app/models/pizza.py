@@ -2,7 +2,7 @@
 SQLAlchemy models for Pizza Store API
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.database.base import Base
 
@@ -19,6 +19,12 @@ class Pizza(Base):
         secondary="pizza_ingredients",
         back_populates="pizzas"
     )
+    allergen_ingredients = relationship(
+        "Ingredient",
+        secondary="pizza_allergens",
+        order_by="Ingredient.name",
+        viewonly=True
+    )
 
 
 class PizzaIngredient(Base):
@@ -26,7 +32,7 @@ class PizzaIngredient(Base):
     __tablename__ = 'pizza_ingredients'
     
     pizza_id = Column(Integer, ForeignKey('pizzas.id'), primary_key=True)
-    ingredient_id = Column(Integer, ForeignKey('ingredients.id'), primary_key=True)
+    ingredient_id = Column(Integer, ForeignKey('ingredients.id'), primary_key=True, index=True)
 
 
 class Ingredient(Base):
@@ -55,4 +61,40 @@ class IngredientIngredient(Base):
     __tablename__ = 'ingredient_ingredients'
     
     parent_ingredient_id = Column(Integer, ForeignKey('ingredients.id'), primary_key=True)
-    child_ingredient_id = Column(Integer, ForeignKey('ingredients.id'), primary_key=True)
+    child_ingredient_id = Column(Integer, ForeignKey('ingredients.id'), primary_key=True, index=True)
+
+
+class PizzaAllergen(Base):
+    """
+    Materialized pizza-allergen mapping.
+    
+    Holds one row per allergen reachable from a pizza through its ingredients
+    and their sub-ingredients at any depth. Maintained by ``app.services.allergen_index``.
+    """
+    __tablename__ = 'pizza_allergens'
+    
+    pizza_id = Column(Integer, ForeignKey('pizzas.id', ondelete='CASCADE'), primary_key=True)
+    ingredient_id = Column(Integer, ForeignKey('ingredients.id', ondelete='CASCADE'), primary_key=True, index=True)
+
+
+class PizzaStats(Base):
+    """
+    Denormalized per-pizza counts used for sorting.
+    
+    Holds one row per pizza with its number of direct ingredients and of
+    allergens reachable at any depth. Refreshed together with the allergen
+    index by ``app.services.pizza_stats``.
+    """
+    __tablename__ = 'pizza_stats'
+    
+    pizza_id = Column(Integer, ForeignKey('pizzas.id', ondelete='CASCADE'), primary_key=True)
+    ingredient_count = Column(Integer, nullable=False, default=0)
+    allergen_count = Column(Integer, nullable=False, default=0)
+    allergen_free = Column(Boolean, nullable=False, default=True)
+    
+    # The pizza id breaks ties, so keyset pages on a single stat stay on the index
+    __table_args__ = (
+        Index('ix_pizza_stats_ingredient_count', 'ingredient_count', 'pizza_id'),
+        Index('ix_pizza_stats_allergen_count', 'allergen_count', 'pizza_id'),
+        Index('ix_pizza_stats_allergen_free', 'allergen_free', 'pizza_id'),
+    )
@@ -2,19 +2,91 @@
 Ingredients-related API routes
 """
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
-from app.database.connection import get_db
+from app.database.connection import get_read_db
 from app.models.pizza import Ingredient
-from app.schemas.pizza import IngredientResponse
+from app.schemas.pizza import IngredientResponse, SuggestionResponse
+from app.schemas.serialization import dump_json
+from app.services.catalog_snapshot import catalog_snapshot
+from app.services.ingredient_graph import MAX_INGREDIENT_DEPTH, resolve_ingredient_graph
+from app.services.profiling import ProfiledRoute
+from app.services.response_cache import cached_json_response
+from app.services.search import ingredient_search_matches, search_terms
+from app.services.suggest import KINDS, suggestion_index
 
-router = APIRouter(prefix="/ingredients", tags=["ingredients"])
+router = APIRouter(prefix="/ingredients", tags=["ingredients"], route_class=ProfiledRoute)
+
+DEFAULT_SUGGESTIONS = 10
+MAX_SUGGESTIONS = 50
 
 
 @router.get("/", response_model=List[IngredientResponse])
-async def get_ingredients(db: Session = Depends(get_db)):
-    """Get all available ingredients"""
-    ingredients = db.query(Ingredient).all()
-    return ingredients
+def get_ingredients(
+    request: Request,
+    search: Optional[str] = Query(None, description="Search ingredients by name, most relevant first"),
+    depth: int = Query(MAX_INGREDIENT_DEPTH, ge=0, le=MAX_INGREDIENT_DEPTH, description="Sub-ingredient levels to expand"),
+    db: Session = Depends(get_read_db)
+):
+    """Get all available ingredients with their sub-ingredients"""
+    return cached_json_response(
+        request,
+        db,
+        ("ingredients", " ".join(search_terms(search)) or None, depth),
+        lambda: dump_json(_list_ingredients(db, search, depth))
+    )
+
+
+def _list_ingredients(db: Session, search: Optional[str], depth: int) -> List[dict]:
+    """Load ingredients and render their sub-ingredient trees"""
+    snapshot = catalog_snapshot.get(db)
+    if snapshot is not None:
+        return [
+            snapshot.graph.tree(ingredient_id, depth)
+            for ingredient_id in snapshot.ingredient_ids_matching(search)
+        ]
+    
+    query = db.query(Ingredient)
+    
+    matches = ingredient_search_matches(db, search)
+    if matches is not None:
+        query = query.join(matches, matches.c.ingredient_id == Ingredient.id).order_by(
+            matches.c.rank, Ingredient.id
+        )
+    
+    ingredients = query.all()
+    
+    # Listing every ingredient: loading the whole edge table beats walking from each root
+    root_ids = None if matches is None else [ingredient.id for ingredient in ingredients]
+    graph = resolve_ingredient_graph(db, root_ids, depth)
+    for ingredient in ingredients:
+        graph.register(ingredient)
+    
+    return [graph.tree(ingredient.id, depth) for ingredient in ingredients]
+
+
+@router.get("/suggest", response_model=List[SuggestionResponse])
+def suggest_names(
+    q: str = Query(..., description="What the user has typed so far"),
+    limit: int = Query(DEFAULT_SUGGESTIONS, ge=1, le=MAX_SUGGESTIONS, description="Maximum number of suggestions"),
+    kind: str = Query("ingredient", description="Names to suggest: ingredient, pizza or all"),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Typeahead suggestions for ingredient (or pizza) names.
+    
+    Matching ignores case and accents; names starting with ``q`` come first,
+    followed by names with a later word starting with ``q``.
+    """
+    kinds = list(KINDS.values()) if kind == "all" else [kind]
+    if not set(kinds) <= set(KINDS.values()):
+        raise HTTPException(status_code=400, detail="kind must be ingredient, pizza or all")
+    
+    suggestion_index.ensure_current(db)
+    return Response(
+        content=dump_json(suggestion_index.suggest(q, limit, kinds)),
+        media_type="application/json"
+    )
@@ -2,147 +2,639 @@
 Pizza-related API routes
 """
 
-from fastapi import APIRouter, HTTPException, Query, Depends
-from sqlalchemy.orm import Session
-from typing import List, Optional
+import base64
+import json
 
-from app.database.connection import get_db
-from app.models.pizza import Pizza
-from app.schemas.pizza import PizzaResponse, PizzaListResponse
+from fastapi import APIRouter, HTTPException, Query, Depends, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, false, func, literal, or_, select, union_all
+from sqlalchemy.orm import Session, selectinload
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 
-router = APIRouter(prefix="/pizzas", tags=["pizzas"])
+from app.database.connection import get_read_db, get_session_router
+from app.database.routing import SessionRouter
+from app.models.pizza import Pizza, Ingredient, PizzaIngredient, PizzaAllergen, PizzaStats
+from app.schemas.pizza import (
+    PizzaResponse, PizzaListResponse, PizzaBatchResponse, PizzaFacetsResponse
+)
+from app.schemas.serialization import dump_json
+from app.services.catalog_snapshot import CatalogSnapshot, catalog_snapshot
+from app.services.compression import accepts_encoding, gzip_stream
+from app.services.pizza_filters import PizzaFilters
+from app.services.ingredient_graph import MAX_INGREDIENT_DEPTH, resolve_ingredient_graph
+from app.services.profiling import ProfiledRoute
+from app.services.response_cache import cached_json_response
+from app.services.search import pizza_search_matches, search_terms
 
+router = APIRouter(prefix="/pizzas", tags=["pizzas"], route_class=ProfiledRoute)
 
-@router.get("/", response_model=PizzaListResponse)
-async def get_pizzas(
+# Fields that can be left out of a pizza response with ``fields=``
+OPTIONAL_FIELDS = {"ingredients", "allergens"}
+
+# Keys ``sort_by`` accepts; a leading "-" sorts on the key in descending order
+SORT_KEYS = {"name", "id", "relevance", "ingredient_count", "allergen_count", "allergen_free"}
+STATS_SORT_KEYS = {"ingredient_count", "allergen_count", "allergen_free"}
+
+# JSON types a cursor may hold for each sort key
+CURSOR_TYPES = {
+    "name": (str, type(None)),
+    "id": (int,),
+    "relevance": (float,),
+    "ingredient_count": (int,),
+    "allergen_count": (int,),
+    "allergen_free": (bool,),
+}
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+# Most IDs a single ``GET /pizzas/batch`` call may ask for
+MAX_BATCH_SIZE = 100
+
+# IDs are stored as signed 64-bit integers; larger values cannot be bound
+MAX_ID = 2 ** 63 - 1
+
+# Values returned per facet by ``GET /pizzas/facets`` unless ``limit`` is given
+DEFAULT_FACET_SIZE = 100
+MAX_FACET_SIZE = 1000
+
+# Pizzas fetched and written per chunk of ``GET /pizzas/export``
+EXPORT_BATCH_SIZE = 500
+
+# Sub-ingredient levels included in pizza responses unless ``depth`` is given
+DEFAULT_DEPTH = 1
+
+
+def _parse_fields(fields: Optional[str]) -> Set[str]:
+    """Resolve the ``fields`` projection into the set of optional fields to include"""
+    if fields is None:
+        return set(OPTIONAL_FIELDS)
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested - OPTIONAL_FIELDS - {"id", "name", "description"}
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+        )
+    return requested & OPTIONAL_FIELDS
+
+
+def _parse_sort(sort_by: Optional[str], searching: bool) -> List[Tuple[str, bool]]:
+    """
+    Resolve ``sort_by`` into ``(key, descending)`` pairs.
+    
+    Relevance only applies to searches and is dropped otherwise. The list
+    always ends with the pizza id, so the order is total and keyset pages
+    never overlap; the id follows the direction of the key before it, so a
+    single descending stat can be read backwards off its index.
+    """
+    sort: List[Tuple[str, bool]] = []
+    for part in (sort_by or "name").split(","):
+        part = part.strip()
+        descending = part.startswith("-")
+        key = part[1:] if descending else part
+        if not key:
+            continue
+        if key not in SORT_KEYS:
+            raise HTTPException(status_code=400, detail=f"Unknown sort key: {key}")
+        if (key == "relevance" and not searching) or key in {name for name, _ in sort}:
+            continue
+        sort.append((key, descending))
+        if key == "id":
+            # Ids are unique, so any later key could never apply
+            break
+    if not sort or sort[-1][0] != "id":
+        sort.append(("id", bool(sort) and sort[-1][1]))
+    return sort
+
+
+def _parse_ids(ids: str) -> List[int]:
+    """Parse a comma-separated ID list, keeping request order and dropping repeats"""
+    try:
+        parsed = [int(part) for part in ids.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+    if any(not -MAX_ID - 1 <= pizza_id <= MAX_ID for pizza_id in parsed):
+        raise HTTPException(status_code=400, detail="ids must be 64-bit integers")
+    unique = list(dict.fromkeys(parsed))
+    if not unique:
+        raise HTTPException(status_code=400, detail="ids must not be empty")
+    if len(unique) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_BATCH_SIZE} ids can be requested at once"
+        )
+    return unique
+
+
+def _encode_cursor(values: list) -> str:
+    """Encode the sort key of the last row on a page as an opaque cursor"""
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, keys: List[str]) -> list:
+    """
+    Decode a cursor produced by ``_encode_cursor`` for the sort ``keys``,
+    checking each value has its key's type (``True`` is not an ``int`` here).
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(keys):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if any(type(value) not in CURSOR_TYPES[key] for key, value in zip(keys, values)):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def _sorts_after(column, value, descending: bool):
+    """
+    ``column`` sorts strictly after ``value``. The listing puts NULLs first
+    in ascending order and last in descending order, SQLite's default, and
+    ``>``/``<`` are never true against NULL, so NULLs are compared explicitly.
+    """
+    if value is None:
+        return false() if descending else column.isnot(None)
+    # Bound explicitly, since SQLAlchemy refuses < and > against a literal True/False
+    if not descending:
+        return column > literal(value)
+    if getattr(getattr(column, "expression", column), "nullable", True):
+        return or_(column < literal(value), column.is_(None))
+    return column < literal(value)
+
+
+def _keyset_predicate(columns: list, values: list, descending: Optional[List[bool]] = None):
+    """
+    Build ``(c1, c2, ...) > (v1, v2, ...)`` for keyset pagination, comparing
+    with ``<`` on the columns flagged in ``descending``.
+    
+    Expanded into OR-ed prefix comparisons so SQLite can still seek on the
+    leading column's index.
+    """
+    if descending is None:
+        descending = [False] * len(columns)
+    clauses = []
+    for i, column in enumerate(columns):
+        equal_prefix = [
+            columns[j].is_(None) if values[j] is None else columns[j] == literal(values[j])
+            for j in range(i)
+        ]
+        clauses.append(and_(*equal_prefix, _sorts_after(column, values[i], descending[i])))
+    return or_(*clauses)
+
+
+def _pizza_load_options(fields: Optional[Set[str]] = None):
+    """
+    Eager-loading plan for a pizza's ingredients and allergens.
+    
+    Each relationship is fetched with one batched ``SELECT ... WHERE id IN (...)``
+    (SQLAlchemy splits the IN list every 500 pizzas), so a request issues a
+    fixed number of statements regardless of menu size. Allergens come from
+    the precomputed ``pizza_allergens`` index; deeper sub-ingredients are
+    resolved by ``resolve_ingredient_graph``.
+    """
+    if fields is None:
+        fields = OPTIONAL_FIELDS
+    
+    options = []
+    if "ingredients" in fields:
+        options.append(selectinload(Pizza.ingredients))
+    if "allergens" in fields:
+        options.append(selectinload(Pizza.allergen_ingredients))
+    return options
+
+
+def _build_pizza_responses(
+    db: Session,
+    pizzas: List[Pizza],
+    fields: Optional[Set[str]] = None,
+    depth: int = DEFAULT_DEPTH
+) -> List[dict]:
+    """Convert eagerly loaded pizzas into ``PizzaResponse``-shaped dicts"""
+    if fields is None:
+        fields = OPTIONAL_FIELDS
+    
+    graph = None
+    if "ingredients" in fields:
+        # One query resolves the sub-ingredients of every pizza on the page
+        graph = resolve_ingredient_graph(
+            db,
+            {ingredient.id for pizza in pizzas for ingredient in pizza.ingredients},
+            depth
+        )
+        for pizza in pizzas:
+            for ingredient in pizza.ingredients:
+                graph.register(ingredient)
+    
+    responses = []
+    for pizza in pizzas:
+        data = {"id": pizza.id, "name": pizza.name, "description": pizza.description}
+        
+        if graph is not None:
+            data["ingredients"] = [
+                graph.tree(ingredient.id, depth) for ingredient in pizza.ingredients
+            ]
+        
+        if "allergens" in fields:
+            data["allergens"] = [allergen.name for allergen in pizza.allergen_ingredients]
+        
+        # Fields left out of the projection are omitted from the output
+        responses.append(data)
+    return responses
+
+
+@router.get("/", response_model=PizzaListResponse, response_model_exclude_unset=True)
+def get_pizzas(
+    request: Request,
     search: Optional[str] = Query(None, description="Search pizzas by name or description"),
-    sort_by: Optional[str] = Query("name", description="Sort by field (name)"),
-    ingredient_filter: Optional[str] = Query(None, description="Filter by ingredient name"),
-    allergen_filter: Optional[str] = Query(None, description="Filter by allergen"),
-    db: Session = Depends(get_db)
+    sort_by: Optional[str] = Query("name", description="Comma-separated sort keys (name, id, relevance, ingredient_count, allergen_count, allergen_free); prefix with - for descending"),
+    ingredient_filter: Optional[List[str]] = Query(None, description="Require an ingredient whose name contains this value (repeatable)"),
+    allergen_filter: Optional[List[str]] = Query(None, description="Require an allergen whose name contains this value (repeatable)"),
+    exclude_ingredient: Optional[List[str]] = Query(None, description="Exclude pizzas with an ingredient whose name contains this value (repeatable)"),
+    exclude_allergen: Optional[List[str]] = Query(None, description="Exclude pizzas with an allergen whose name contains this value (repeatable)"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Maximum number of pizzas per page"),
+    cursor: Optional[str] = Query(None, description="Cursor returned as next_cursor by the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated optional fields to include (ingredients, allergens)"),
+    depth: int = Query(DEFAULT_DEPTH, ge=0, le=MAX_INGREDIENT_DEPTH, description="Sub-ingredient levels to expand"),
+    db: Session = Depends(get_read_db)
 ):
     """
     Get all pizzas with optional search, sort, and filter capabilities.
     
-    - **search**: Search pizzas by name or description
-    - **sort_by**: Sort pizzas by name (default: name)
-    - **ingredient_filter**: Filter pizzas that contain specific ingredient
-    - **allergen_filter**: Filter pizzas that contain specific allergen
+    - **search**: Search pizzas by name or description; every term must match, as a word prefix
+    - **sort_by**: Sort keys, most significant first (default: name), e.g.
+      `sort_by=-allergen_free,ingredient_count,name`; a leading `-` sorts descending
+    - **ingredient_filter**: Filter pizzas that contain specific ingredients; repeat to require several
+    - **allergen_filter**: Filter pizzas that contain specific allergens; repeat to require several
+    - **exclude_ingredient**: Leave out pizzas containing an ingredient
+    - **exclude_allergen**: Leave out pizzas containing an allergen, e.g. `exclude_allergen=cheese`
+    - **limit**: Page size (default: 100)
+    - **cursor**: Continue after the last pizza of the previous page
+    - **fields**: Project the response, e.g. `fields=allergens` skips ingredients
+    - **depth**: Sub-ingredient levels to expand (default: 1); allergens always cover every level
     """
+    included_fields = _parse_fields(fields)
+    terms = search_terms(search)
+    sort = _parse_sort(sort_by, bool(terms))
+    filters = PizzaFilters.from_params(
+        ingredient_filter, allergen_filter, exclude_ingredient, exclude_allergen
+    )
+    
+    cache_key = (
+        "pizzas",
+        " ".join(terms) or None,
+        tuple(sort),
+        filters,
+        limit,
+        cursor,
+        tuple(sorted(included_fields)),
+        depth,
+    )
+    return cached_json_response(
+        request,
+        db,
+        cache_key,
+        lambda: dump_json(_list_pizzas(
+            db, search, sort, filters, limit, cursor, included_fields, depth
+        ))
+    )
+
+
+def _list_pizzas(
+    db: Session,
+    search: Optional[str],
+    sort: List[Tuple[str, bool]],
+    filters: PizzaFilters,
+    limit: int,
+    cursor: Optional[str],
+    included_fields: Set[str],
+    depth: int
+) -> dict:
+    """Run the listing query for one page, ordered by ``_parse_sort`` keys"""
+    snapshot = catalog_snapshot.get(db)
+    if snapshot is not None:
+        return _list_snapshot_pizzas(
+            snapshot, search, sort, filters, limit, cursor, included_fields, depth
+        )
+    
     query = db.query(Pizza)
     
     # Search functionality
-    if search:
-        query = query.filter(
-            (Pizza.name.contains(search)) | 
-            (Pizza.description.contains(search))
-        )
+    matches = pizza_search_matches(db, search)
+    if matches is not None:
+        query = query.join(matches, matches.c.pizza_id == Pizza.id)
     
-    # Ingredient filter
-    if ingredient_filter:
-        from app.models.pizza import PizzaIngredient, Ingredient
-        query = query.join(PizzaIngredient).join(Ingredient).filter(
-            Ingredient.name.contains(ingredient_filter)
-        )
+    # Ingredient and allergen filters; EXISTS keeps each pizza to a single row
+    query = query.filter(*filters.clauses())
+    
+    # Count matches without loading rows into Python
+    total = query.with_entities(func.count(Pizza.id)).scalar()
+    
+    # Sorting; stats keys come from the denormalized, indexed pizza_stats rows
+    columns = {"name": Pizza.name, "id": Pizza.id}
+    if matches is not None:
+        columns["relevance"] = matches.c.rank
+    if any(key in STATS_SORT_KEYS for key, _ in sort):
+        query = query.join(PizzaStats, PizzaStats.pizza_id == Pizza.id)
+        columns.update({key: getattr(PizzaStats, key) for key in STATS_SORT_KEYS})
+        # Same value, but lets SQLite finish the ORDER BY on the (stat, pizza_id) indexes
+        columns["id"] = PizzaStats.pizza_id
+    sort_columns = [columns[key] for key, _ in sort]
+    descending = [desc for _, desc in sort]
+    
+    # Keyset pagination
+    if cursor:
+        query = query.filter(_keyset_predicate(
+            sort_columns, _decode_cursor(cursor, [key for key, _ in sort]), descending
+        ))
+    # NULLs first ascending and last descending, as ``_sorts_after`` pages them
+    order = [
+        column.desc().nulls_last() if desc else column.asc().nulls_first()
+        for column, desc in zip(sort_columns, descending)
+    ]
+    query = query.add_columns(*sort_columns).order_by(*order).limit(limit + 1)
     
-    # Allergen filter
-    if allergen_filter:
-        from app.models.pizza import PizzaIngredient, Ingredient
-        query = query.join(PizzaIngredient).join(Ingredient).filter(
-            Ingredient.is_allergen == True,
-            Ingredient.name.contains(allergen_filter)
+    query = query.options(*_pizza_load_options(included_fields))
+    rows = query.all()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        # Rows carry their sort key after the pizza itself
+        next_cursor = _encode_cursor(list(rows[-1][1:]))
+    pizzas = [row[0] for row in rows]
+    
+    pizza_responses = _build_pizza_responses(db, pizzas, included_fields, depth)
+    
+    return {"pizzas": pizza_responses, "total": total, "next_cursor": next_cursor}
+
+
+def _list_snapshot_pizzas(
+    snapshot: CatalogSnapshot,
+    search: Optional[str],
+    sort: List[Tuple[str, bool]],
+    filters: PizzaFilters,
+    limit: int,
+    cursor: Optional[str],
+    included_fields: Set[str],
+    depth: int
+) -> dict:
+    """``_list_pizzas`` answered from the in-memory catalog snapshot"""
+    after = _decode_cursor(cursor, [key for key, _ in sort]) if cursor else None
+    try:
+        rows, total = snapshot.page(search, sort, filters, limit, after)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(rows[-1][1])
+    
+    return {
+        "pizzas": [
+            snapshot.pizza_response(position, included_fields, depth) for position, _ in rows
+        ],
+        "total": total,
+        "next_cursor": next_cursor,
+    }
+
+
+@router.get("/facets", response_model=PizzaFacetsResponse)
+def get_pizza_facets(
+    request: Request,
+    search: Optional[str] = Query(None, description="Search pizzas by name or description"),
+    ingredient_filter: Optional[List[str]] = Query(None, description="Require an ingredient whose name contains this value (repeatable)"),
+    allergen_filter: Optional[List[str]] = Query(None, description="Require an allergen whose name contains this value (repeatable)"),
+    exclude_ingredient: Optional[List[str]] = Query(None, description="Exclude pizzas with an ingredient whose name contains this value (repeatable)"),
+    exclude_allergen: Optional[List[str]] = Query(None, description="Exclude pizzas with an allergen whose name contains this value (repeatable)"),
+    limit: int = Query(DEFAULT_FACET_SIZE, ge=1, le=MAX_FACET_SIZE, description="Maximum number of values per facet"),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Count the pizzas matching the search and filters per ingredient and per allergen.
+    
+    Takes the same search and filter parameters as ``GET /pizzas``. Values
+    are ordered by count, most common first; values no matching pizza has
+    are left out. Allergen counts cover every sub-ingredient level.
+    """
+    filters = PizzaFilters.from_params(
+        ingredient_filter, allergen_filter, exclude_ingredient, exclude_allergen
+    )
+    return cached_json_response(
+        request,
+        db,
+        ("pizza_facets", " ".join(search_terms(search)) or None, filters, limit),
+        lambda: dump_json(_pizza_facets(db, search, filters, limit))
+    )
+
+
+def _pizza_facets(db: Session, search: Optional[str], filters: PizzaFilters, limit: int) -> dict:
+    """Count every facet value with one grouped query over the association tables"""
+    snapshot = catalog_snapshot.get(db)
+    if snapshot is not None:
+        total, ingredient_counts, allergen_counts = snapshot.facets(search, filters)
+        names = {
+            ingredient_id: snapshot.graph.nodes[ingredient_id][0]
+            for ingredient_id in ingredient_counts.keys() | allergen_counts.keys()
+        }
+        return {
+            "total": total,
+            "ingredients": _facet_values(ingredient_counts, names, limit),
+            "allergens": _facet_values(allergen_counts, names, limit),
+        }
+    
+    matching = select(Pizza.id)
+    matches = pizza_search_matches(db, search)
+    if matches is not None:
+        matching = matching.join(matches, matches.c.pizza_id == Pizza.id)
+    clauses = filters.clauses()
+    matching = matching.where(*clauses)
+    
+    total = db.execute(select(func.count()).select_from(matching.subquery())).scalar()
+    
+    # Without search or filters every pizza matches; group the link tables directly
+    restricted = matches is not None or bool(clauses)
+    grouped = union_all(*[
+        select(
+            literal(facet).label("facet"),
+            table.ingredient_id,
+            func.count().label("count")
         )
+        .where(*([table.pizza_id.in_(matching.scalar_subquery())] if restricted else []))
+        .group_by(table.ingredient_id)
+        for facet, table in [("ingredients", PizzaIngredient), ("allergens", PizzaAllergen)]
+    ]).subquery()
+    rows = db.execute(
+        select(grouped.c.facet, grouped.c.ingredient_id, Ingredient.name, grouped.c.count)
+        .join(Ingredient, Ingredient.id == grouped.c.ingredient_id)
+    )
     
-    # Sorting
-    if sort_by == "name":
-        query = query.order_by(Pizza.name)
+    counts: Dict[str, Dict[int, int]] = {"ingredients": {}, "allergens": {}}
+    names: Dict[int, str] = {}
+    for facet, ingredient_id, name, count in rows:
+        counts[facet][ingredient_id] = count
+        names[ingredient_id] = name
+    return {
+        "total": total,
+        "ingredients": _facet_values(counts["ingredients"], names, limit),
+        "allergens": _facet_values(counts["allergens"], names, limit),
+    }
+
+
+def _facet_values(counts: Dict[int, int], names: Dict[int, str], limit: int) -> List[dict]:
+    """The ``limit`` most common values, ties broken by name"""
+    ordered = sorted(counts.items(), key=lambda item: (-item[1], names[item[0]] or "", item[0]))
+    return [
+        {"id": ingredient_id, "name": names[ingredient_id], "count": count}
+        for ingredient_id, count in ordered[:limit]
+    ]
+
+
+@router.get("/batch", response_model=PizzaBatchResponse, response_model_exclude_unset=True)
+def get_pizza_batch(
+    request: Request,
+    ids: str = Query(..., description=f"Comma-separated pizza IDs (at most {MAX_BATCH_SIZE})"),
+    fields: Optional[str] = Query(None, description="Comma-separated optional fields to include (ingredients, allergens)"),
+    depth: int = Query(DEFAULT_DEPTH, ge=0, le=MAX_INGREDIENT_DEPTH, description="Sub-ingredient levels to expand"),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Get many pizzas by ID in one request.
     
-    pizzas = query.all()
+    Pizzas come back in the order their IDs were given; IDs that do not
+    exist are listed under ``missing`` instead of failing the call.
+    """
+    pizza_ids = _parse_ids(ids)
+    included_fields = _parse_fields(fields)
+    return cached_json_response(
+        request,
+        db,
+        ("pizza_batch", tuple(pizza_ids), tuple(sorted(included_fields)), depth),
+        lambda: dump_json(_get_pizza_batch(db, pizza_ids, included_fields, depth))
+    )
+
+
+def _get_pizza_batch(db: Session, pizza_ids: List[int], included_fields: Set[str], depth: int) -> dict:
+    """Load the requested pizzas with one ``IN`` query and batched relationship loads"""
+    snapshot = catalog_snapshot.get(db)
+    if snapshot is not None:
+        positions = {pizza_id: snapshot.find_pizza(pizza_id) for pizza_id in pizza_ids}
+        return {
+            "pizzas": [
+                snapshot.pizza_response(position, included_fields, depth)
+                for position in positions.values() if position is not None
+            ],
+            "missing": [pizza_id for pizza_id, position in positions.items() if position is None],
+        }
     
-    # Convert to response format
-    pizza_responses = []
-    for pizza in pizzas:
-        # Get all ingredients with their sub-ingredients
-        ingredients = []
-        allergens = []
-        
-        for ingredient in pizza.ingredients:
-            ingredient_data = {
-                "id": ingredient.id,
-                "name": ingredient.name,
-                "is_allergen": ingredient.is_allergen,
-                "sub_ingredients": []
-            }
-            
-            # Add sub-ingredients
-            for sub_ingredient in ingredient.sub_ingredients:
-                ingredient_data["sub_ingredients"].append({
-                    "id": sub_ingredient.id,
-                    "name": sub_ingredient.name,
-                    "is_allergen": sub_ingredient.is_allergen,
-                    "sub_ingredients": []
-                })
-                
-                # Collect allergens
-                if sub_ingredient.is_allergen:
-                    allergens.append(sub_ingredient.name)
-            
-            ingredients.append(ingredient_data)
-            
-            # Collect allergens from main ingredients
-            if ingredient.is_allergen:
-                allergens.append(ingredient.name)
-        
-        pizza_responses.append(PizzaResponse(
-            id=pizza.id,
-            name=pizza.name,
-            description=pizza.description,
-            ingredients=ingredients,
-            allergens=list(set(allergens))  # Remove duplicates
-        ))
+    pizzas = (
+        db.query(Pizza)
+        .options(*_pizza_load_options(included_fields))
+        .filter(Pizza.id.in_(pizza_ids))
+        .all()
+    )
+    by_id = {pizza.id: pizza for pizza in pizzas}
+    found = [by_id[pizza_id] for pizza_id in pizza_ids if pizza_id in by_id]
+    
+    return {
+        "pizzas": _build_pizza_responses(db, found, included_fields, depth),
+        "missing": [pizza_id for pizza_id in pizza_ids if pizza_id not in by_id],
+    }
+
+
+@router.get("/export", response_class=StreamingResponse)
+def export_pizzas(
+    request: Request,
+    fields: Optional[str] = Query(None, description="Comma-separated optional fields to include (ingredients, allergens)"),
+    depth: int = Query(DEFAULT_DEPTH, ge=0, le=MAX_INGREDIENT_DEPTH, description="Sub-ingredient levels to expand"),
+    sessions: SessionRouter = Depends(get_session_router)
+):
+    """
+    Stream the whole menu as NDJSON, one pizza per line in ID order.
+    
+    Pizzas are read through a streaming cursor in batches of
+    ``EXPORT_BATCH_SIZE``, so memory use does not grow with the catalog.
+    The body is gzip-compressed on the fly when the client accepts it.
+    """
+    included_fields = _parse_fields(fields)
+    body = _export_chunks(sessions, included_fields, depth)
+    headers = {"Vary": "Accept-Encoding"}
+    if accepts_encoding(request, "gzip"):
+        body = gzip_stream(body)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body, media_type="application/x-ndjson", headers=headers)
+
+
+def _export_chunks(sessions: SessionRouter, included_fields: Set[str], depth: int) -> Iterator[bytes]:
+    """
+    NDJSON lines for every pizza, one chunk per batch.
     
-    return PizzaListResponse(pizzas=pizza_responses, total=len(pizza_responses))
+    The generator outlives the request's dependencies, so it opens and
+    closes its own read session.
+    """
+    db = sessions.read_session()
+    try:
+        snapshot = catalog_snapshot.get(db)
+        if snapshot is not None:
+            for start in range(0, len(snapshot), EXPORT_BATCH_SIZE):
+                end = min(start + EXPORT_BATCH_SIZE, len(snapshot))
+                yield b"".join(
+                    dump_json(snapshot.pizza_response(position, included_fields, depth)) + b"\n"
+                    for position in range(start, end)
+                )
+            return
+        
+        result = db.execute(
+            select(Pizza)
+            .options(*_pizza_load_options(included_fields))
+            .order_by(Pizza.id)
+            .execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        for pizzas in result.scalars().partitions():
+            yield b"".join(
+                dump_json(data) + b"\n"
+                for data in _build_pizza_responses(db, pizzas, included_fields, depth)
+            )
+    finally:
+        db.close()
 
 
 @router.get("/{pizza_id}", response_model=PizzaResponse)
-async def get_pizza(pizza_id: int, db: Session = Depends(get_db)):
+def get_pizza(
+    pizza_id: int,
+    request: Request,
+    depth: int = Query(DEFAULT_DEPTH, ge=0, le=MAX_INGREDIENT_DEPTH, description="Sub-ingredient levels to expand"),
+    db: Session = Depends(get_read_db)
+):
     """Get a specific pizza by ID"""
-    pizza = db.query(Pizza).filter(Pizza.id == pizza_id).first()
+    return cached_json_response(
+        request,
+        db,
+        ("pizza", pizza_id, depth),
+        lambda: dump_json(_get_pizza(db, pizza_id, depth))
+    )
+
+
+def _get_pizza(db: Session, pizza_id: int, depth: int) -> dict:
+    """Load one pizza with its ingredient graph"""
+    snapshot = catalog_snapshot.get(db)
+    if snapshot is not None:
+        position = snapshot.find_pizza(pizza_id)
+        if position is None:
+            raise HTTPException(status_code=404, detail="Pizza not found")
+        return snapshot.pizza_response(position, OPTIONAL_FIELDS, depth)
+    
+    pizza = (
+        db.query(Pizza)
+        .options(*_pizza_load_options())
+        .filter(Pizza.id == pizza_id)
+        .first()
+    )
     if not pizza:
         raise HTTPException(status_code=404, detail="Pizza not found")
     
-    # Convert to response format (same logic as above)
-    ingredients = []
-    allergens = []
-    
-    for ingredient in pizza.ingredients:
-        ingredient_data = {
-            "id": ingredient.id,
-            "name": ingredient.name,
-            "is_allergen": ingredient.is_allergen,
-            "sub_ingredients": []
-        }
-        
-        for sub_ingredient in ingredient.sub_ingredients:
-            ingredient_data["sub_ingredients"].append({
-                "id": sub_ingredient.id,
-                "name": sub_ingredient.name,
-                "is_allergen": sub_ingredient.is_allergen,
-                "sub_ingredients": []
-            })
-            
-            if sub_ingredient.is_allergen:
-                allergens.append(sub_ingredient.name)
-        
-        ingredients.append(ingredient_data)
-        
-        if ingredient.is_allergen:
-            allergens.append(ingredient.name)
-    
-    return PizzaResponse(
-        id=pizza.id,
-        name=pizza.name,
-        description=pizza.description,
-        ingredients=ingredients,
-        allergens=list(set(allergens))
-    )
+    return _build_pizza_responses(db, [pizza], depth=depth)[0]
@@ -2,6 +2,19 @@
 Pydantic schemas for Pizza Store API
 """
 
-from .pizza import PizzaResponse, PizzaListResponse, IngredientResponse
+from .pizza import (
+    PizzaResponse, PizzaListResponse, PizzaBatchResponse, PizzaFacetsResponse, FacetCount,
+    IngredientResponse, SuggestionResponse
+)
+from .serialization import dump_json
 
-__all__ = ["PizzaResponse", "PizzaListResponse", "IngredientResponse"]
+__all__ = [
+    "PizzaResponse",
+    "PizzaListResponse",
+    "PizzaBatchResponse",
+    "PizzaFacetsResponse",
+    "FacetCount",
+    "IngredientResponse",
+    "SuggestionResponse",
+    "dump_json",
+]
@@ -33,3 +33,31 @@ class PizzaListResponse(BaseModel):
     """Schema for pizza list response"""
     pizzas: List[PizzaResponse]
     total: int
+    next_cursor: Optional[str] = None
+
+
+class PizzaBatchResponse(BaseModel):
+    """Schema for a batch lookup of pizzas by ID"""
+    pizzas: List[PizzaResponse]
+    missing: List[int] = []
+
+
+class SuggestionResponse(BaseModel):
+    """Schema for a typeahead suggestion"""
+    id: int
+    name: str
+    kind: str
+
+
+class FacetCount(BaseModel):
+    """Number of matching pizzas with one ingredient or allergen"""
+    id: int
+    name: str
+    count: int
+
+
+class PizzaFacetsResponse(BaseModel):
+    """Schema for ingredient and allergen facet counts"""
+    total: int
+    ingredients: List[FacetCount]
+    allergens: List[FacetCount]
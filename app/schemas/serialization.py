@@ -0,0 +1,21 @@
+"""
+Direct JSON serialization for API responses
+
+Response data is assembled as plain dicts and lists that already match the
+Pydantic response schemas, so it is written straight to JSON bytes by
+pydantic-core instead of being validated into models first. The schemas
+still document the endpoints through ``response_model``.
+"""
+
+from pydantic import TypeAdapter
+from typing import Any
+
+from app.services.profiling import timed_serialization
+
+_json = TypeAdapter(Any)
+
+
+def dump_json(content: Any) -> bytes:
+    """Serialize schema-shaped dicts and lists to compact JSON bytes"""
+    with timed_serialization():
+        return _json.dump_json(content)
@@ -0,0 +1,29 @@
+"""
+Catalog services for Pizza Store API
+"""
+
+from .allergen_index import rebuild_allergen_index, ensure_allergen_index
+from .pizza_stats import refresh_pizza_stats, ensure_pizza_stats
+from .search import ensure_search_index, pizza_search_matches, ingredient_search_matches
+from .catalog_version import ensure_catalog_version, bump_catalog_version, current_catalog_version
+from .catalog_events import on_catalog_change, on_catalog_flush, notify_catalog_changed
+from .response_cache import response_cache
+from .schema import setup_schema
+
+__all__ = [
+    "rebuild_allergen_index",
+    "ensure_allergen_index",
+    "refresh_pizza_stats",
+    "ensure_pizza_stats",
+    "ensure_search_index",
+    "pizza_search_matches",
+    "ingredient_search_matches",
+    "ensure_catalog_version",
+    "bump_catalog_version",
+    "current_catalog_version",
+    "on_catalog_change",
+    "on_catalog_flush",
+    "notify_catalog_changed",
+    "response_cache",
+    "setup_schema",
+]
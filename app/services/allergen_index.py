@@ -0,0 +1,121 @@
+"""
+Materialized pizza-allergen index
+
+Keeps the ``pizza_allergens`` table in sync with pizzas, ingredients and the
+two association tables so that allergen lookups never walk the ingredient
+graph at request time. The denormalized ``pizza_stats`` rows are derived
+from it and refreshed in the same call.
+"""
+
+from sqlalchemy import delete, event, insert, inspect, select
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+from typing import Iterable, Optional, Set
+
+from app.database.chunks import id_chunks
+from app.models.pizza import (
+    Pizza, Ingredient, PizzaIngredient, IngredientIngredient, PizzaAllergen
+)
+from app.services.ingredient_graph import ingredient_ancestors, pizza_ingredient_closure
+from app.services.pizza_stats import refresh_pizza_stats
+
+def _allergen_links(pizza_ids: Optional[list] = None):
+    """SELECT (pizza_id, ingredient_id) for every allergen reachable from a pizza"""
+    closure = pizza_ingredient_closure(pizza_ids)
+    return (
+        select(closure.c.pizza_id, closure.c.ingredient_id)
+        .join(Ingredient, Ingredient.id == closure.c.ingredient_id)
+        .where(Ingredient.is_allergen == True)
+    )
+
+
+def rebuild_allergen_index(connection: Connection, pizza_ids: Optional[Iterable[int]] = None):
+    """
+    Recompute index rows for the given pizzas, or for the whole catalog,
+    followed by their ``pizza_stats`` rows.
+
+    Writers that bypass the ORM (bulk inserts, raw SQL) must call this
+    themselves; ORM flushes are handled by the session listener below.
+    """
+    columns = [PizzaAllergen.pizza_id, PizzaAllergen.ingredient_id]
+
+    if pizza_ids is None:
+        connection.execute(delete(PizzaAllergen))
+        connection.execute(insert(PizzaAllergen).from_select(columns, _allergen_links()))
+        refresh_pizza_stats(connection)
+        return
+
+    pizza_ids = sorted(set(pizza_ids))
+    for chunk in id_chunks(pizza_ids):
+        connection.execute(delete(PizzaAllergen).where(PizzaAllergen.pizza_id.in_(chunk)))
+        connection.execute(
+            insert(PizzaAllergen).from_select(columns, _allergen_links(chunk))
+        )
+    refresh_pizza_stats(connection, pizza_ids)
+
+
+def ensure_allergen_index(engine: Engine):
+    """Backfill an empty index, e.g. for databases created before it existed"""
+    with engine.begin() as connection:
+        if connection.execute(select(PizzaAllergen.pizza_id).limit(1)).first() is None:
+            rebuild_allergen_index(connection)
+
+
+def _pizzas_using_ingredients(connection: Connection, ingredient_ids: Set[int]) -> Set[int]:
+    """Pizzas that contain the ingredients directly or as a sub-ingredient at any depth"""
+    pizza_ids = set()
+    for chunk in id_chunks(sorted(ingredient_ids)):
+        ancestors = ingredient_ancestors(chunk)
+        rows = connection.execute(
+            select(PizzaIngredient.pizza_id).where(
+                PizzaIngredient.ingredient_id.in_(select(ancestors.c.ingredient_id))
+            )
+        )
+        pizza_ids.update(row[0] for row in rows)
+    return pizza_ids
+
+
+@event.listens_for(Session, "after_flush")
+def _maintain_allergen_index(session: Session, flush_context):
+    """Refresh index rows for every pizza touched by the flush"""
+    pizza_ids = set()
+    ingredient_ids = set()
+    full_rebuild = False
+
+    for obj in session.new | session.deleted:
+        if isinstance(obj, Pizza):
+            pizza_ids.add(obj.id)
+        elif isinstance(obj, PizzaIngredient):
+            pizza_ids.add(obj.pizza_id)
+        elif isinstance(obj, IngredientIngredient):
+            ingredient_ids.add(obj.parent_ingredient_id)
+        elif isinstance(obj, Ingredient):
+            if obj in session.deleted:
+                full_rebuild = True
+            else:
+                ingredient_ids.add(obj.id)
+
+    for obj in session.dirty:
+        if not session.is_modified(obj):
+            continue
+        if isinstance(obj, Pizza):
+            pizza_ids.add(obj.id)
+        elif isinstance(obj, Ingredient):
+            ingredient_ids.add(obj.id)
+            # Pizzas unlinked through Ingredient.pizzas are no longer found by SQL
+            pizza_ids.update(
+                pizza.id for pizza in inspect(obj).attrs.pizzas.history.deleted
+            )
+
+    if not (pizza_ids or ingredient_ids or full_rebuild):
+        return
+
+    connection = session.connection()
+    if full_rebuild:
+        rebuild_allergen_index(connection)
+        return
+    if ingredient_ids:
+        pizza_ids |= _pizzas_using_ingredients(connection, ingredient_ids)
+    pizza_ids.discard(None)
+    if pizza_ids:
+        rebuild_allergen_index(connection, pizza_ids)
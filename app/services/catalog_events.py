@@ -0,0 +1,91 @@
+"""
+Catalog change notifications
+
+Lets caches and other derived state subscribe to writes on the catalog
+tables, and bumps the persistent catalog version in the writing
+transaction. ORM commits are handled automatically; writers that bypass the
+ORM must call ``bump_catalog_version()`` before and
+``notify_catalog_changed()`` after committing.
+
+State that follows individual ORM flushes registers with
+``on_catalog_flush``; its callbacks run from the same listener that bumps
+the version, after the bump, whatever order modules were imported in.
+"""
+
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from typing import Callable, List
+
+from app.models.pizza import (
+    Pizza, Ingredient, PizzaIngredient, IngredientIngredient, PizzaAllergen
+)
+from app.services.catalog_version import bump_catalog_version, catalog_version
+
+CATALOG_MODELS = (Pizza, Ingredient, PizzaIngredient, IngredientIngredient, PizzaAllergen)
+
+_listeners: List[Callable[[], None]] = []
+_flush_listeners: List[Callable[[Session], None]] = []
+_lock = threading.Lock()
+
+
+def on_catalog_change(callback: Callable[[], None]) -> Callable[[], None]:
+    """Register a callback run after every committed catalog write"""
+    with _lock:
+        _listeners.append(callback)
+    return callback
+
+
+def on_catalog_flush(callback: Callable[[Session], None]) -> Callable[[Session], None]:
+    """
+    Register a callback run after every ORM flush that writes the catalog,
+    once the flush has bumped the version in the session's transaction
+    """
+    with _lock:
+        _flush_listeners.append(callback)
+    return callback
+
+
+def notify_catalog_changed():
+    """Run every registered callback"""
+    with _lock:
+        listeners = list(_listeners)
+    for callback in listeners:
+        callback()
+
+
+def _writes_catalog(session: Session) -> bool:
+    for obj in session.new | session.dirty | session.deleted:
+        if not isinstance(obj, CATALOG_MODELS):
+            continue
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        return True
+    return False
+
+
+@event.listens_for(Session, "after_flush")
+def _track_catalog_writes(session: Session, flush_context):
+    if not _writes_catalog(session):
+        return
+    bump_catalog_version(session.connection())
+    session.info["catalog_changed"] = True
+    with _lock:
+        callbacks = list(_flush_listeners)
+    for callback in callbacks:
+        callback(session)
+
+
+on_catalog_change(catalog_version.invalidate)
+
+
+@event.listens_for(Session, "after_commit")
+def _notify_after_commit(session: Session):
+    if session.info.pop("catalog_changed", False):
+        notify_catalog_changed()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_writes(session: Session):
+    session.info.pop("catalog_changed", None)
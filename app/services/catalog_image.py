@@ -0,0 +1,385 @@
+"""
+Binary catalog image
+
+A flat encoding of the catalog that ``CatalogSnapshot`` reads through
+``memoryview``s without turning it into Python objects. The bytes can live
+in a private buffer, or in a file that every worker maps read-only with
+``mmap``, so the operating system shares one copy of the pages between
+processes (``PIZZA_CATALOG_MODE=shared``).
+
+Layout: a header (magic, format, section count, catalog version and its
+``updated_at``) and a directory of ``(offset, length)`` pairs, one per entry
+of ``SECTIONS`` in order, each section starting on an 8-byte boundary.
+Integers use the native byte order, as images are only shared between
+processes on one host. Text is UTF-8 addressed by offset arrays. Sets of
+pizza positions are stored as 32-bit postings or as little-endian bitmaps,
+whichever is smaller, and addressed by ``(kind, offset, length)`` triples
+into ``set_data``.
+"""
+
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.catalog import CatalogVersion
+from app.models.pizza import (
+    Pizza, Ingredient, PizzaIngredient, IngredientIngredient, PizzaAllergen
+)
+from app.services.search import text_tokens
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+MAGIC = b"PIZZACAT"
+FORMAT = 2
+
+# Section name -> array typecode ("B" for raw bytes)
+SECTIONS: Dict[str, str] = {
+    "pizza_ids": "q",                 # per pizza, in id order
+    "pizza_flags": "B",               # PIZZA_* bits
+    "pizza_text_offsets": "Q",        # name of pizza i at 2i, description at 2i + 1
+    "pizza_text": "B",
+    "pizza_ingredient_offsets": "Q",  # direct ingredients, by id
+    "pizza_ingredient_ids": "q",
+    "pizza_allergen_offsets": "Q",    # allergens at any depth, by name
+    "pizza_allergen_ids": "q",
+    "name_order": "I",                # pizza positions ordered by (name, id), NULL names first
+    "name_ranks": "I",                # 1 + index of each pizza's name among the distinct names, 0 if NULL
+    "distinct_name_offsets": "Q",
+    "distinct_names": "B",
+    "token_offsets": "Q",             # sorted folded tokens of names and descriptions
+    "tokens": "B",
+    "token_sets": "Q",                # pizzas containing each token
+    "token_total": "Q",               # one count: tokens in every name and description
+    "ingredient_ids": "q",            # per ingredient, in id order
+    "ingredient_flags": "B",          # INGREDIENT_* bits
+    "ingredient_name_offsets": "Q",
+    "ingredient_names": "B",
+    "ingredient_child_offsets": "Q",  # sub-ingredients, by id
+    "ingredient_child_ids": "q",
+    "ingredient_sets": "Q",           # pizzas using each ingredient directly
+    "allergen_sets": "Q",             # pizzas containing each ingredient as an allergen
+    "set_data": "B",
+}
+
+PIZZA_NAME_NULL = 1
+PIZZA_DESCRIPTION_NULL = 2
+INGREDIENT_ALLERGEN = 1
+INGREDIENT_ALLERGEN_NULL = 2
+INGREDIENT_NAME_NULL = 4
+
+_POSTINGS = 0
+_BITMAP = 1
+
+# magic, format, section count, catalog version, updated_at in microseconds
+_HEADER = struct.Struct("=8sIIQQ")
+_ENTRY = struct.Struct("=QQ")
+
+# A set of positions: a bitset, or a postings view when that is smaller
+PositionSet = Union[int, memoryview, array]
+
+
+def _version_stamp(updated_at: Optional[datetime]) -> int:
+    if updated_at is None:
+        return 0
+    return int(updated_at.replace(tzinfo=timezone.utc).timestamp() * 1_000_000)
+
+
+class _Strings:
+    """Read-only sequence of the strings in a text section, addressed by an offset array"""
+
+    __slots__ = ("_offsets", "_text")
+
+    def __init__(self, offsets: memoryview, text: memoryview):
+        self._offsets = offsets
+        self._text = text
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        return str(self._text[self._offsets[index]:self._offsets[index + 1]], "utf-8")
+
+
+class CatalogImage:
+    """
+    Typed ``memoryview``s over the sections of an image held in ``buffer``,
+    available as attributes named after ``SECTIONS``
+    """
+
+    def __init__(self, buffer):
+        view = memoryview(buffer)
+        magic, image_format, count, version, stamp = _HEADER.unpack_from(view)
+        if magic != MAGIC or image_format != FORMAT or count != len(SECTIONS):
+            raise ValueError("Not a catalog image of this format")
+        self.buffer = buffer
+        self.version = version
+        self.stamp = stamp
+        self.nbytes = view.nbytes
+        for index, (name, typecode) in enumerate(SECTIONS.items()):
+            offset, length = _ENTRY.unpack_from(view, _HEADER.size + index * _ENTRY.size)
+            section = view[offset:offset + length]
+            setattr(self, name, section if typecode == "B" else section.cast(typecode))
+
+    def strings(self, offsets: str, text: str) -> _Strings:
+        return _Strings(getattr(self, offsets), getattr(self, text))
+
+    def position_set(self, table: memoryview, index: int) -> PositionSet:
+        """Entry ``index`` of a set table, as a bitset or a postings view"""
+        kind, offset, length = table[3 * index:3 * index + 3]
+        data = self.set_data[offset:offset + length]
+        if kind == _BITMAP:
+            return int.from_bytes(data, "little")
+        return data.cast("I")
+
+    def set_length(self, table: memoryview, index: int) -> int:
+        """Byte length of entry ``index`` of a set table; 0 for an empty set"""
+        return table[3 * index + 2]
+
+
+class _ImageWriter:
+    """Collects sections and packs them into an image"""
+
+    def __init__(self):
+        self.sections: Dict[str, bytes] = {}
+        self._set_data = bytearray()
+
+    def add(self, name: str, values: Iterable):
+        self.sections[name] = array(SECTIONS[name], values).tobytes()
+
+    def add_strings(self, offsets: str, text: str, strings: Iterable[Optional[str]]):
+        """Write ``strings`` as one text section; ``None`` is stored as an empty string"""
+        blob = bytearray()
+        ends = [0]
+        for string in strings:
+            blob += (string or "").encode()
+            ends.append(len(blob))
+        self.add(offsets, ends)
+        self.sections[text] = bytes(blob)
+
+    def add_sets(self, name: str, sets: Sequence[Sequence[int]], size: int):
+        """Write a set table with one entry per position list in ``sets``"""
+        entries = []
+        for positions in sets:
+            if len(positions) * 32 < size:
+                kind, data = _POSTINGS, array("I", positions).tobytes()
+            else:
+                flags = bytearray((size + 7) // 8)
+                for position in positions:
+                    flags[position >> 3] |= 1 << (position & 7)
+                kind, data = _BITMAP, bytes(flags)
+            self._set_data += b"\0" * (-len(self._set_data) % 8)
+            entries += [kind, len(self._set_data), len(data)]
+            self._set_data += data
+        self.add(name, entries)
+
+    def pack(self, version: int, stamp: int) -> bytes:
+        self.sections["set_data"] = bytes(self._set_data)
+        directory_end = _HEADER.size + len(SECTIONS) * _ENTRY.size
+        out = bytearray(directory_end)
+        _HEADER.pack_into(out, 0, MAGIC, FORMAT, len(SECTIONS), version, stamp)
+        for index, name in enumerate(SECTIONS):
+            out += b"\0" * (-len(out) % 8)
+            data = self.sections[name]
+            _ENTRY.pack_into(out, _HEADER.size + index * _ENTRY.size, len(out), len(data))
+            out += data
+        return bytes(out)
+
+
+def _offsets(groups: List[Sequence[int]]) -> List[int]:
+    ends = [0]
+    for group in groups:
+        ends.append(ends[-1] + len(group))
+    return ends
+
+
+def _begin_read_snapshot(db: Session):
+    """
+    Make the session's next SELECTs read one snapshot of the database.
+
+    pysqlite only opens a transaction before writes, so on SQLite each SELECT
+    would otherwise see the latest commit; an explicit ``BEGIN`` holds one
+    read snapshot until the session ends its transaction. Other databases
+    read within the session's transaction at their isolation level.
+    """
+    connection = db.connection()
+    if connection.dialect.name == "sqlite" and not connection.connection.dbapi_connection.in_transaction:
+        connection.exec_driver_sql("BEGIN")
+
+
+def build_image(db: Session) -> bytes:
+    """
+    Read the catalog with one query per table and encode it.
+
+    The queries run in one read transaction, so on SQLite they all see the
+    same commit. Where the isolation level lets a write land partway
+    through, links to pizzas or ingredients that were not read are skipped;
+    the version is read first, so such an image is tagged as older than it
+    is and gets replaced.
+    """
+    _begin_read_snapshot(db)
+    row = db.execute(select(CatalogVersion.version, CatalogVersion.updated_at)).first()
+    version, stamp = (row[0], _version_stamp(row[1])) if row is not None else (0, 0)
+    writer = _ImageWriter()
+
+    ingredients = db.execute(
+        select(Ingredient.id, Ingredient.name, Ingredient.is_allergen).order_by(Ingredient.id)
+    ).all()
+    ingredient_position = {row[0]: position for position, row in enumerate(ingredients)}
+    children: List[List[int]] = [[] for _ in ingredients]
+    for parent_id, child_id in db.execute(
+        select(IngredientIngredient.parent_ingredient_id, IngredientIngredient.child_ingredient_id)
+        .order_by(IngredientIngredient.parent_ingredient_id, IngredientIngredient.child_ingredient_id)
+    ):
+        if parent_id in ingredient_position and child_id in ingredient_position:
+            children[ingredient_position[parent_id]].append(child_id)
+
+    pizzas = db.execute(
+        select(Pizza.id, Pizza.name, Pizza.description).order_by(Pizza.id)
+    ).all()
+    size = len(pizzas)
+    position_of = {row[0]: position for position, row in enumerate(pizzas)}
+
+    pizza_ingredients: List[List[int]] = [[] for _ in pizzas]
+    with_ingredient: List[List[int]] = [[] for _ in ingredients]
+    for pizza_id, ingredient_id in db.execute(
+        select(PizzaIngredient.pizza_id, PizzaIngredient.ingredient_id)
+        .order_by(PizzaIngredient.pizza_id, PizzaIngredient.ingredient_id)
+    ):
+        if pizza_id in position_of and ingredient_id in ingredient_position:
+            pizza_ingredients[position_of[pizza_id]].append(ingredient_id)
+            with_ingredient[ingredient_position[ingredient_id]].append(position_of[pizza_id])
+
+    pizza_allergens: List[List[int]] = [[] for _ in pizzas]
+    with_allergen: List[List[int]] = [[] for _ in ingredients]
+    for pizza_id, ingredient_id in db.execute(
+        select(PizzaAllergen.pizza_id, PizzaAllergen.ingredient_id)
+        .join(Ingredient, Ingredient.id == PizzaAllergen.ingredient_id)
+        .order_by(PizzaAllergen.pizza_id, Ingredient.name)
+    ):
+        if pizza_id in position_of and ingredient_id in ingredient_position:
+            pizza_allergens[position_of[pizza_id]].append(ingredient_id)
+            with_allergen[ingredient_position[ingredient_id]].append(position_of[pizza_id])
+
+    writer.add("pizza_ids", (row[0] for row in pizzas))
+    writer.add("pizza_flags", (
+        (PIZZA_NAME_NULL if name is None else 0) | (PIZZA_DESCRIPTION_NULL if description is None else 0)
+        for _, name, description in pizzas
+    ))
+    writer.add_strings(
+        "pizza_text_offsets", "pizza_text",
+        (text for _, name, description in pizzas for text in (name, description))
+    )
+    writer.add("pizza_ingredient_offsets", _offsets(pizza_ingredients))
+    writer.add("pizza_ingredient_ids", (i for group in pizza_ingredients for i in group))
+    writer.add("pizza_allergen_offsets", _offsets(pizza_allergens))
+    writer.add("pizza_allergen_ids", (i for group in pizza_allergens for i in group))
+
+    # SQLite sorts NULL names before every other name
+    by_name = sorted(range(size), key=lambda position: (
+        pizzas[position][1] is not None, pizzas[position][1] or "", pizzas[position][0]
+    ))
+    names = sorted({row[1] for row in pizzas if row[1] is not None})
+    name_ranks = {name: rank for rank, name in enumerate(names, 1)}
+    name_ranks[None] = 0
+    writer.add("name_order", by_name)
+    writer.add("name_ranks", (name_ranks[row[1]] for row in pizzas))
+    writer.add_strings("distinct_name_offsets", "distinct_names", names)
+
+    postings: Dict[str, List[int]] = {}
+    total = 0
+    for position, (_, name, description) in enumerate(pizzas):
+        document = text_tokens(name or "") + text_tokens(description or "")
+        total += len(document)
+        for token in set(document):
+            postings.setdefault(token, []).append(position)
+    tokens = sorted(postings)
+    writer.add_strings("token_offsets", "tokens", tokens)
+    writer.add_sets("token_sets", [postings[token] for token in tokens], size)
+    writer.add("token_total", [total])
+
+    writer.add("ingredient_ids", (row[0] for row in ingredients))
+    writer.add("ingredient_flags", (
+        (INGREDIENT_ALLERGEN if is_allergen else 0)
+        | (INGREDIENT_ALLERGEN_NULL if is_allergen is None else 0)
+        | (INGREDIENT_NAME_NULL if name is None else 0)
+        for _, name, is_allergen in ingredients
+    ))
+    writer.add_strings("ingredient_name_offsets", "ingredient_names", (row[1] for row in ingredients))
+    writer.add("ingredient_child_offsets", _offsets(children))
+    writer.add("ingredient_child_ids", (i for group in children for i in group))
+    writer.add_sets("ingredient_sets", with_ingredient, size)
+    writer.add_sets("allergen_sets", with_allergen, size)
+
+    return writer.pack(version, stamp)
+
+
+def _image_name(version: int, stamp: int) -> str:
+    return f"catalog-{version:012d}-{stamp}.img"
+
+
+def _image_version(name: str) -> Optional[int]:
+    """Catalog version of an image file name, or None for other files"""
+    if name.startswith("catalog-") and name.endswith(".img"):
+        return int(name.split("-")[1])
+    return None
+
+
+def _map(path: str) -> CatalogImage:
+    with open(path, "rb") as f:
+        return CatalogImage(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+def map_shared_image(directory: str, db: Session) -> CatalogImage:
+    """
+    Map the image of the current catalog version from ``directory``.
+
+    The first worker to need a version builds it under an exclusive file
+    lock and renames it into place, and removes images of older versions;
+    workers waiting on the lock then map the finished file. Files that are
+    removed stay readable to processes that still map them.
+    """
+    os.makedirs(directory, exist_ok=True)
+    row = db.execute(select(CatalogVersion.version, CatalogVersion.updated_at)).first()
+    wanted = os.path.join(
+        directory, _image_name(*((row[0], _version_stamp(row[1])) if row is not None else (0, 0)))
+    )
+    try:
+        return _map(wanted)
+    except (FileNotFoundError, ValueError):
+        # Missing, or written by an older format; rebuilt below
+        pass
+
+    with open(os.path.join(directory, ".lock"), "a") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            try:
+                # Another worker may have written it while this one waited
+                return _map(wanted)
+            except (FileNotFoundError, ValueError):
+                pass
+            data = build_image(db)
+            image = CatalogImage(data)
+            path = os.path.join(directory, _image_name(image.version, image.stamp))
+            fd, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temporary, path)
+            for name in os.listdir(directory):
+                version = _image_version(name)
+                if version is not None and version < image.version:
+                    os.remove(os.path.join(directory, name))
+            return _map(path)
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_UN)
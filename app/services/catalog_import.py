@@ -0,0 +1,279 @@
+"""
+Bulk catalog import
+
+Streams ingredient and pizza records from CSV or JSON Lines files into the
+database with batched ``executemany`` statements. Pizzas are written one
+transaction per batch; an ingredient import is a single transaction.
+Names are the natural key: they are resolved through an in-memory
+name -> id map loaded once, so re-importing a record updates the existing row
+and replaces its links instead of creating a duplicate.
+
+Ingredient records have ``name``, ``is_allergen`` and ``sub_ingredients``;
+pizza records have ``name``, ``description`` and ``ingredients``. In CSV
+files, list columns hold names separated by ``;``. Import ingredients
+before the pizzas that use them.
+
+Derived state is refreshed in bulk rather than per row, in the same
+transaction as the rows it derives from: pizza batches rebuild the allergen
+index for their own pizzas, and ingredient imports rebuild it once at the
+end, since a changed ingredient can affect any pizza. The search index is kept in sync by
+triggers.
+"""
+
+import csv
+import json
+import time
+
+from sqlalchemy import bindparam, delete, insert, select, update
+from sqlalchemy.engine import Connection, Engine
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from app.database.chunks import id_chunks
+from app.models.pizza import Pizza, Ingredient, PizzaIngredient, IngredientIngredient
+from app.services.allergen_index import rebuild_allergen_index
+from app.services.catalog_events import notify_catalog_changed
+from app.services.catalog_version import bump_catalog_version
+
+# Records written per transaction
+BATCH_SIZE = 5_000
+
+_TRUE_VALUES = {"1", "true", "yes", "y", "t"}
+
+
+class ImportStats:
+    """Row counts and timing of one import"""
+
+    def __init__(self):
+        self.ingredients_inserted = 0
+        self.ingredients_updated = 0
+        self.pizzas_inserted = 0
+        self.pizzas_updated = 0
+        self.links = 0
+        self.missing_links = 0
+        self.seconds = 0.0
+
+    @property
+    def rows(self) -> int:
+        """Rows written to the catalog tables"""
+        return (
+            self.ingredients_inserted + self.ingredients_updated
+            + self.pizzas_inserted + self.pizzas_updated + self.links
+        )
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"ingredients: {self.ingredients_inserted} new, {self.ingredients_updated} updated; "
+            f"pizzas: {self.pizzas_inserted} new, {self.pizzas_updated} updated; "
+            f"links: {self.links} ({self.missing_links} skipped, unknown ingredient); "
+            f"{self.rows} rows in {self.seconds:.2f}s ({self.rows_per_second:,.0f} rows/s)"
+        )
+
+
+def _split_names(value) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [name.strip() for name in value.split(";") if name.strip()]
+    return [str(name) for name in value]
+
+
+def _record_name(record: dict) -> str:
+    name = record.get("name")
+    if name is None:
+        raise ValueError(f"Record without a name: {record!r}")
+    return name
+
+
+def _parse_bool(value) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in _TRUE_VALUES
+    return bool(value)
+
+
+def read_records(path: str) -> Iterator[dict]:
+    """Stream records from a ``.csv`` or ``.jsonl`` / ``.ndjson`` file"""
+    if path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            yield from csv.DictReader(f)
+    elif path.endswith((".jsonl", ".ndjson")):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        raise ValueError(f"Unsupported import file {path!r}; expected .csv, .jsonl or .ndjson")
+
+
+def _batches(records: Iterable[dict]) -> Iterator[List[dict]]:
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _load_ids(connection: Connection, model) -> Dict[str, int]:
+    """Name -> id map; with duplicate names the newest row wins"""
+    return dict(connection.execute(select(model.name, model.id).order_by(model.id)).all())
+
+
+def _upsert(
+    connection: Connection,
+    model,
+    rows: List[dict],
+    ids: Dict[str, int]
+) -> Tuple[List[int], int, int]:
+    """
+    Insert new rows and update existing ones by name, in bulk. Returns the
+    id of every row in input order plus the inserted and updated counts.
+    Duplicate names within ``rows`` collapse to the last occurrence.
+    """
+    latest = {row["name"]: row for row in rows}
+    new_rows = [row for name, row in latest.items() if name not in ids]
+    # Bound parameter names may not clash with the column names being set
+    existing_rows = [
+        {"_id": ids[name], **{f"_{key}": value for key, value in row.items()}}
+        for name, row in latest.items() if name in ids
+    ]
+
+    if new_rows:
+        result = connection.execute(
+            insert(model).returning(model.id, sort_by_parameter_order=True), new_rows
+        )
+        for row, (row_id,) in zip(new_rows, result):
+            ids[row["name"]] = row_id
+    if existing_rows:
+        columns = [key for key in rows[0] if key != "name"]
+        table = model.__table__
+        connection.execute(
+            update(table)
+            .where(table.c.id == bindparam("_id"))
+            .values({column: bindparam(f"_{column}") for column in columns}),
+            existing_rows
+        )
+    return [ids[row["name"]] for row in rows], len(new_rows), len(existing_rows)
+
+
+def _replace_links(
+    connection: Connection,
+    link_model,
+    owner_column,
+    owner_ids: List[int],
+    links: List[dict]
+):
+    """Swap the links of the given owners for ``links``"""
+    for chunk in id_chunks(sorted(set(owner_ids))):
+        connection.execute(delete(link_model).where(owner_column.in_(chunk)))
+    if links:
+        connection.execute(insert(link_model), links)
+
+
+def _resolve_links(
+    owner_ids: List[int],
+    records: List[dict],
+    field: str,
+    owner_key: str,
+    target_key: str,
+    ingredient_ids: Dict[str, int],
+    stats: ImportStats
+) -> List[dict]:
+    """Link rows for the names listed in ``field``; the last record per owner wins"""
+    latest = dict(zip(owner_ids, records))
+    links = {}
+    for owner_id, record in latest.items():
+        for name in _split_names(record.get(field)):
+            target_id = ingredient_ids.get(name)
+            if target_id is None:
+                stats.missing_links += 1
+                continue
+            links[(owner_id, target_id)] = {owner_key: owner_id, target_key: target_id}
+    return list(links.values())
+
+
+def import_ingredients(engine: Engine, records: Iterable[dict]) -> ImportStats:
+    """
+    Upsert ingredients, then their sub-ingredient links. Links are resolved
+    after every ingredient is written, so records may refer to ingredients
+    that appear later in the input.
+
+    Every record is checked before anything is written, and the whole import
+    is one transaction: a changed ingredient can affect the allergens of any
+    pizza, so the allergen index and catalog version are only consistent
+    once every ingredient and link is in place.
+    """
+    stats = ImportStats()
+    start = time.perf_counter()
+    batches = [
+        (batch, [
+            {"name": _record_name(record), "is_allergen": _parse_bool(record.get("is_allergen"))}
+            for record in batch
+        ])
+        for batch in _batches(records)
+    ]
+
+    with engine.begin() as connection:
+        ids = _load_ids(connection, Ingredient)
+        pending: List[Tuple[List[int], List[dict]]] = []
+        for batch, rows in batches:
+            batch_ids, inserted, updated = _upsert(connection, Ingredient, rows, ids)
+            stats.ingredients_inserted += inserted
+            stats.ingredients_updated += updated
+            pending.append((batch_ids, batch))
+
+        for batch_ids, batch in pending:
+            links = _resolve_links(
+                batch_ids, batch, "sub_ingredients",
+                "parent_ingredient_id", "child_ingredient_id", ids, stats
+            )
+            _replace_links(
+                connection, IngredientIngredient,
+                IngredientIngredient.parent_ingredient_id, batch_ids, links
+            )
+            stats.links += len(links)
+
+        # Changed ingredients can affect any pizza, so rebuild the whole index once
+        rebuild_allergen_index(connection)
+        bump_catalog_version(connection)
+    notify_catalog_changed()
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+
+def import_pizzas(engine: Engine, records: Iterable[dict]) -> ImportStats:
+    """Upsert pizzas and replace their ingredient lists, one transaction per batch"""
+    stats = ImportStats()
+    start = time.perf_counter()
+
+    with engine.connect() as connection:
+        pizza_ids = _load_ids(connection, Pizza)
+        ingredient_ids = _load_ids(connection, Ingredient)
+    for batch in _batches(records):
+        rows = [
+            {"name": _record_name(record), "description": record.get("description")}
+            for record in batch
+        ]
+        with engine.begin() as connection:
+            batch_ids, inserted, updated = _upsert(connection, Pizza, rows, pizza_ids)
+            links = _resolve_links(
+                batch_ids, batch, "ingredients",
+                "pizza_id", "ingredient_id", ingredient_ids, stats
+            )
+            _replace_links(
+                connection, PizzaIngredient, PizzaIngredient.pizza_id, batch_ids, links
+            )
+            rebuild_allergen_index(connection, batch_ids)
+            bump_catalog_version(connection)
+        notify_catalog_changed()
+        stats.pizzas_inserted += inserted
+        stats.pizzas_updated += updated
+        stats.links += len(links)
+
+    stats.seconds = time.perf_counter() - start
+    return stats
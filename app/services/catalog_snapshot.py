@@ -0,0 +1,538 @@
+"""
+In-memory catalog snapshot
+
+Opt-in (``PIZZA_CATALOG_MODE=snapshot`` or ``shared``). The catalog is read
+into an immutable ``CatalogSnapshot`` with a handful of queries, and the read
+endpoints answer search, ingredient and allergen filters, sorting and
+pagination from it without touching the database or building ORM objects.
+
+Each snapshot is read in one transaction, so it holds a single committed
+state of the catalog, and is tagged with the version read first. When the
+version moves on (a local commit, or a write by another worker noticed after
+``CATALOG_VERSION_CHECK_INTERVAL``), the next request loads a new snapshot
+and swaps it in; requests already running keep the one they started with.
+
+Pizza data lives in a flat ``CatalogImage`` read through ``memoryview``s
+rather than as Python objects. In ``snapshot`` mode each worker builds its
+own image; in ``shared`` mode one worker writes it to ``PIZZA_SNAPSHOT_DIR``
+and every worker maps that file read-only, so the catalog is held once per
+host instead of once per process. Only the ingredient graph, which is small,
+is copied into each process.
+
+Sets of pizzas are bitsets stored as Python ints, bit ``i`` standing for the
+``i``-th pizza in id order, so filters combine with ``&``, ``|`` and ``~`` in
+C. Sets that are sparse relative to the catalog are kept as postings arrays
+instead, whichever representation is smaller.
+"""
+
+import math
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.config import CATALOG_MODE, SNAPSHOT_DIR
+from app.services.catalog_image import (
+    INGREDIENT_ALLERGEN, INGREDIENT_ALLERGEN_NULL, INGREDIENT_NAME_NULL,
+    PIZZA_DESCRIPTION_NULL, PIZZA_NAME_NULL,
+    CatalogImage, PositionSet, build_image, map_shared_image
+)
+from app.services.catalog_version import current_catalog_version
+from app.services.ingredient_graph import IngredientGraph
+from app.services.pizza_filters import PizzaFilters
+from app.services.search import text_tokens
+
+# bm25 column weights of the FTS5 index (see ``app.services.search``) and
+# FTS5's bm25 parameters, so relevance scores match database mode exactly
+_NAME_WEIGHT = 10.0
+_DESCRIPTION_WEIGHT = 1.0
+_BM25_K1 = 1.2
+_BM25_B = 0.75
+
+# Full-catalog orders a snapshot keeps for sorts other than ascending name or id
+_MAX_CACHED_ORDERS = 8
+
+
+def _bitset(positions: Iterable[int], size: int) -> int:
+    flags = bytearray((size + 7) // 8)
+    for position in positions:
+        flags[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(flags, "little")
+
+
+def _compact(positions: Sequence[int], size: int) -> PositionSet:
+    """Keep ``positions`` as a bitset or a 32-bit postings array, whichever is smaller"""
+    if len(positions) * 32 < size:
+        return array("I", positions)
+    return _bitset(positions, size)
+
+
+def _union(sets: Iterable[PositionSet], size: int) -> int:
+    """Bitset of every position in any of ``sets``"""
+    mask = 0
+    sparse: List[int] = []
+    for position_set in sets:
+        if isinstance(position_set, int):
+            mask |= position_set
+        else:
+            sparse.extend(position_set)
+    if sparse:
+        mask |= _bitset(sparse, size)
+    return mask
+
+
+def _positions(mask: int) -> Iterator[int]:
+    """Positions of the set bits, in increasing order"""
+    bits = bin(mask)[:1:-1]
+    position = bits.find("1")
+    while position != -1:
+        yield position
+        position = bits.find("1", position + 1)
+
+
+class _TokenIndex:
+    """Sorted vocabulary of folded tokens and the positions of the documents containing each"""
+
+    __slots__ = ("tokens", "set_at", "size")
+
+    def __init__(self, tokens: Sequence[str], set_at: Callable[[int], PositionSet], size: int):
+        self.tokens = tokens
+        self.set_at = set_at
+        self.size = size
+
+    @classmethod
+    def build(cls, documents: Iterable[Iterable[str]], size: int) -> "_TokenIndex":
+        postings: Dict[str, List[int]] = {}
+        for position, tokens in enumerate(documents):
+            for token in set(tokens):
+                postings.setdefault(token, []).append(position)
+        tokens = sorted(postings)
+        sets = [_compact(postings[token], size) for token in tokens]
+        return cls(tokens, sets.__getitem__, size)
+
+    def match(self, terms: List[str]) -> int:
+        """Bitset of documents containing every term as a token prefix"""
+        mask = (1 << self.size) - 1
+        for term in terms:
+            start = bisect_left(self.tokens, term)
+            end = start
+            while end < len(self.tokens) and self.tokens[end].startswith(term):
+                end += 1
+            mask &= _union((self.set_at(index) for index in range(start, end)), self.size)
+        return mask
+
+
+class _NameKeys:
+    """``(name rank, id)`` ordinal sort keys in name order, read from the snapshot on access"""
+
+    __slots__ = ("_snapshot",)
+
+    def __init__(self, snapshot: "CatalogSnapshot"):
+        self._snapshot = snapshot
+
+    def __len__(self) -> int:
+        return len(self._snapshot)
+
+    def __getitem__(self, index: int) -> Tuple[int, int]:
+        image = self._snapshot.image
+        position = image.name_order[index]
+        return image.name_ranks[position], image.pizza_ids[position]
+
+
+class CatalogSnapshot:
+    """Immutable copy of the catalog at one catalog version, backed by a ``CatalogImage``"""
+
+    def __init__(self, image: CatalogImage):
+        self.image = image
+        self.version = image.version
+        size = len(image.pizza_ids)
+        self._size = size
+        self._all = (1 << size) - 1
+        self._ids = image.pizza_ids
+        self._average_length = image.token_total[0] / size if size else 0.0
+        self._text = image.strings("pizza_text_offsets", "pizza_text")
+
+        # Pizza positions in (name, id) order with their ordinal sort keys, and
+        # the distinct names with each pizza's rank among them (0 for NULL)
+        self._by_name = image.name_order
+        self._name_keys = _NameKeys(self)
+        self._names = image.strings("distinct_name_offsets", "distinct_names")
+        self._name_ranks = image.name_ranks
+        self._orders: Dict[tuple, Tuple[List[tuple], List[int]]] = {}
+
+        self._pizza_text = _TokenIndex(
+            image.strings("token_offsets", "tokens"),
+            lambda index: image.position_set(image.token_sets, index),
+            size
+        )
+
+        self.graph = IngredientGraph()
+        names = image.strings("ingredient_name_offsets", "ingredient_names")
+        children = image.ingredient_child_offsets
+        for position, ingredient_id in enumerate(image.ingredient_ids):
+            flags = image.ingredient_flags[position]
+            self.graph.nodes[ingredient_id] = (
+                None if flags & INGREDIENT_NAME_NULL else names[position],
+                None if flags & INGREDIENT_ALLERGEN_NULL else bool(flags & INGREDIENT_ALLERGEN),
+            )
+            if children[position + 1] > children[position]:
+                self.graph.children[ingredient_id] = list(
+                    image.ingredient_child_ids[children[position]:children[position + 1]]
+                )
+
+        self.ingredient_ids = tuple(image.ingredient_ids)
+        self._ingredient_names = [
+            (self.graph.nodes[ingredient_id][0] or "").lower() for ingredient_id in self.ingredient_ids
+        ]
+        self._ingredient_tokens = [
+            text_tokens(self.graph.nodes[ingredient_id][0] or "") for ingredient_id in self.ingredient_ids
+        ]
+        self._ingredient_text = _TokenIndex.build(self._ingredient_tokens, len(self.ingredient_ids))
+
+    @classmethod
+    def load(cls, db: Session) -> "CatalogSnapshot":
+        """Read the catalog into a private image (see ``build_image``)"""
+        return cls(CatalogImage(build_image(db)))
+
+    def __len__(self) -> int:
+        return self._size
+
+    def find_pizza(self, pizza_id: int) -> Optional[int]:
+        """Position of the pizza with this id, or None"""
+        position = bisect_left(self._ids, pizza_id)
+        if position < self._size and self._ids[position] == pizza_id:
+            return position
+        return None
+
+    def pizza_name(self, position: int) -> Optional[str]:
+        if self.image.pizza_flags[position] & PIZZA_NAME_NULL:
+            return None
+        return self._text[2 * position]
+
+    def _description(self, position: int) -> Optional[str]:
+        if self.image.pizza_flags[position] & PIZZA_DESCRIPTION_NULL:
+            return None
+        return self._text[2 * position + 1]
+
+    def _links(self, offsets: memoryview, ids: memoryview, position: int) -> memoryview:
+        """The slice of a per-pizza id list belonging to the pizza at ``position``"""
+        return ids[offsets[position]:offsets[position + 1]]
+
+    def pizza_response(self, position: int, fields: Set[str], depth: int) -> dict:
+        """``PizzaResponse``-shaped dict with the given optional fields"""
+        image = self.image
+        data = {
+            "id": self._ids[position],
+            "name": self.pizza_name(position),
+            "description": self._description(position),
+        }
+        if "ingredients" in fields:
+            data["ingredients"] = [
+                self.graph.tree(ingredient_id, depth)
+                for ingredient_id in self._links(
+                    image.pizza_ingredient_offsets, image.pizza_ingredient_ids, position
+                )
+            ]
+        if "allergens" in fields:
+            data["allergens"] = [
+                self.graph.nodes[ingredient_id][0]
+                for ingredient_id in self._links(
+                    image.pizza_allergen_offsets, image.pizza_allergen_ids, position
+                )
+            ]
+        return data
+
+    def _link_count(self, offsets: memoryview, position: int) -> int:
+        return offsets[position + 1] - offsets[position]
+
+    def _containing(self, value: str, table: memoryview) -> int:
+        """Pizzas linked to an ingredient whose name contains ``value``"""
+        value = value.lower()
+        return _union(
+            (
+                self.image.position_set(table, position)
+                for position, name in enumerate(self._ingredient_names)
+                if value in name and self.image.set_length(table, position)
+            ),
+            self._size
+        )
+
+    def _filter_mask(self, filters: PizzaFilters) -> int:
+        ingredients, allergens = self.image.ingredient_sets, self.image.allergen_sets
+        mask = self._all
+        for name in filters.ingredients:
+            mask &= self._containing(name, ingredients)
+        for name in filters.allergens:
+            mask &= self._containing(name, allergens)
+        for name in filters.exclude_ingredients:
+            mask &= ~self._containing(name, ingredients)
+        for name in filters.exclude_allergens:
+            mask &= ~self._containing(name, allergens)
+        return mask
+
+    def _weighted_terms(self, terms: List[str]) -> List[Tuple[str, float]]:
+        """Each search term with its inverse document frequency, as FTS5's bm25 computes it"""
+        weighted = []
+        for term in terms:
+            hits = self._pizza_text.match([term]).bit_count()
+            idf = math.log((self._size - hits + 0.5) / (hits + 0.5))
+            weighted.append((term, idf if idf > 0.0 else 1e-6))
+        return weighted
+
+    def _rank(self, position: int, weighted: List[Tuple[str, float]]) -> float:
+        """
+        FTS5's bm25 score of the pizza, lower being more relevant: every
+        prefix match of a term counts, weighted by the column it is in.
+        Operations follow SQLite's, so scores and cursors are identical.
+        """
+        name = text_tokens(self.pizza_name(position) or "")
+        description = text_tokens(self._description(position) or "")
+        length = float(len(name) + len(description))
+        score = 0.0
+        for term, idf in weighted:
+            frequency = 0.0
+            for weight, tokens in ((_NAME_WEIGHT, name), (_DESCRIPTION_WEIGHT, description)):
+                frequency += weight * sum(token.startswith(term) for token in tokens)
+            score += idf * (
+                (frequency * (_BM25_K1 + 1.0))
+                / (frequency + _BM25_K1 * (1 - _BM25_B + _BM25_B * length / self._average_length))
+            )
+        return -1.0 * score
+
+    def _sort_value(self, key: str, position: int, weighted: List[Tuple[str, float]]):
+        """The value of sort key ``key`` for a pizza, as the database listing returns it"""
+        if key == "id":
+            return self._ids[position]
+        if key == "name":
+            return self.pizza_name(position)
+        if key == "relevance":
+            return self._rank(position, weighted)
+        if key == "ingredient_count":
+            return self._link_count(self.image.pizza_ingredient_offsets, position)
+        if key == "allergen_count":
+            return self._link_count(self.image.pizza_allergen_offsets, position)
+        if key == "allergen_free":
+            return not self._link_count(self.image.pizza_allergen_offsets, position)
+        raise ValueError(f"Unknown sort key: {key}")
+
+    def _ordinal(self, key: str, value) -> float:
+        """
+        Numeric stand-in for a sort value, so descending keys can be negated.
+        Names map to their rank among the distinct names, with NULL first as
+        in SQLite; a name from a cursor that is not in the snapshot falls
+        halfway between neighbours.
+        """
+        if key == "name":
+            if value is None:
+                return 0
+            if not isinstance(value, str):
+                raise ValueError("Cursor does not match the sort order")
+            rank = bisect_left(self._names, value)
+            if rank < len(self._names) and self._names[rank] == value:
+                return rank + 1
+            return rank + 0.5
+        if isinstance(value, (bool, int, float)):
+            return float(value)
+        raise ValueError("Cursor does not match the sort order")
+
+    def _ordinals(self, key: str, positions: Sequence[int], weighted: List[Tuple[str, float]]) -> list:
+        """``_ordinal`` of sort key ``key`` for each of the pizzas at ``positions``"""
+        if key == "name":
+            ranks = self._name_ranks
+            return [ranks[position] for position in positions]
+        if key == "id":
+            ids = self._ids
+            return [ids[position] for position in positions]
+        if key == "relevance":
+            return [self._rank(position, weighted) for position in positions]
+        if key == "ingredient_count":
+            offsets = self.image.pizza_ingredient_offsets
+            return [offsets[position + 1] - offsets[position] for position in positions]
+        if key == "allergen_count":
+            offsets = self.image.pizza_allergen_offsets
+            return [offsets[position + 1] - offsets[position] for position in positions]
+        if key == "allergen_free":
+            offsets = self.image.pizza_allergen_offsets
+            return [int(offsets[position + 1] == offsets[position]) for position in positions]
+        raise ValueError(f"Unknown sort key: {key}")
+
+    def _sorted(
+        self, positions: Sequence[int], sort: List[Tuple[str, bool]], weighted: List[Tuple[str, float]]
+    ) -> Tuple[List[tuple], List[int]]:
+        """Ordinal sort keys and the pizzas at ``positions``, in ``sort`` order"""
+        columns = []
+        for key, descending in sort:
+            values = self._ordinals(key, positions, weighted)
+            columns.append([-value for value in values] if descending else values)
+        keys = list(zip(*columns))
+        ranked = sorted(range(len(keys)), key=keys.__getitem__)
+        return [keys[index] for index in ranked], [positions[index] for index in ranked]
+
+    def _full_order(self, sort: List[Tuple[str, bool]]) -> Tuple[List[tuple], List[int]]:
+        """``_sorted`` over the whole catalog, kept for the first few sorts asked for"""
+        found = self._orders.get(tuple(sort))
+        if found is None:
+            found = self._sorted(range(self._size), sort, [])
+            if len(self._orders) < _MAX_CACHED_ORDERS:
+                self._orders[tuple(sort)] = found
+        return found
+
+    def page(
+        self,
+        search: Optional[str],
+        sort: List[Tuple[str, bool]],
+        filters: PizzaFilters,
+        limit: int,
+        after: Optional[list] = None
+    ) -> Tuple[List[Tuple[int, list]], int]:
+        """
+        Up to ``limit + 1`` ``(position, sort_key)`` rows following the sort
+        key ``after``, and the number of matching pizzas.
+
+        ``sort`` holds ``(key, descending)`` pairs ending with the id, and
+        sort keys are the values of those keys, as in the database listing.
+        Ascending name or id orders are read from presorted arrays. Other
+        orders sort the matching pizzas when they are few or ranked by
+        relevance, and otherwise walk a full-catalog order built once per
+        snapshot.
+        """
+        terms = text_tokens(search or "")
+        mask = self._filter_mask(filters)
+        if terms:
+            mask &= self._pizza_text.match(terms)
+        total = mask.bit_count()
+        if total == 0:
+            return [], 0
+        ranked = any(key == "relevance" for key, _ in sort)
+        weighted = self._weighted_terms(terms) if ranked else []
+
+        if sort == [("name", False), ("id", False)]:
+            keys: Sequence = self._name_keys
+            order: Sequence[int] = self._by_name
+        elif sort == [("id", False)]:
+            keys, order = self._ids, range(self._size)
+        else:
+            if ranked or total * 16 < self._size:
+                keys, order = self._sorted(list(_positions(mask)), sort, weighted)
+                mask = self._all
+            else:
+                keys, order = self._full_order(sort)
+
+        start = 0
+        if after is not None:
+            if sort == [("id", False)]:
+                after = after[0]
+            else:
+                after = tuple(
+                    (-1 if descending else 1) * self._ordinal(key, value)
+                    for (key, descending), value in zip(sort, after)
+                )
+            try:
+                start = bisect_right(keys, after)
+            except TypeError:
+                raise ValueError("Cursor does not match the sort order")
+
+        # Walk the sort order from the cursor, skipping pizzas outside the mask
+        flags = None if mask == self._all else mask.to_bytes((self._size + 7) // 8, "little")
+        rows = []
+        for index in range(start, len(order)):
+            position = order[index]
+            if flags is not None and not flags[position >> 3] >> (position & 7) & 1:
+                continue
+            rows.append((position, [self._sort_value(key, position, weighted) for key, _ in sort]))
+            if len(rows) > limit:
+                break
+        return rows, total
+
+    @staticmethod
+    def _count(position_set: PositionSet, mask: int, flags: bytes) -> int:
+        """Size of ``position_set & mask``; ``flags`` is the mask as little-endian bytes"""
+        if isinstance(position_set, int):
+            return (position_set & mask).bit_count()
+        return sum(flags[position >> 3] >> (position & 7) & 1 for position in position_set)
+
+    def facets(
+        self, search: Optional[str], filters: PizzaFilters
+    ) -> Tuple[int, Dict[int, int], Dict[int, int]]:
+        """
+        Matching pizza count, and per ingredient id the number of matching
+        pizzas using it directly and containing it as an allergen
+        """
+        terms = text_tokens(search or "")
+        mask = self._filter_mask(filters)
+        if terms:
+            mask &= self._pizza_text.match(terms)
+        flags = mask.to_bytes((self._size + 7) // 8, "little")
+        counts = []
+        image = self.image
+        for table in (image.ingredient_sets, image.allergen_sets):
+            counts.append({
+                ingredient_id: count
+                for position, ingredient_id in enumerate(self.ingredient_ids)
+                if image.set_length(table, position)
+                and (count := self._count(image.position_set(table, position), mask, flags))
+            })
+        return mask.bit_count(), counts[0], counts[1]
+
+    def ingredient_ids_matching(self, search: Optional[str]) -> List[int]:
+        """
+        Every ingredient id, or the ids of ingredients matching the search,
+        most relevant first: fewer name tokens means a closer match.
+        """
+        terms = text_tokens(search or "")
+        if not terms:
+            return list(self.ingredient_ids)
+        positions = sorted(
+            _positions(self._ingredient_text.match(terms)),
+            key=lambda position: (len(self._ingredient_tokens[position]), self.ingredient_ids[position])
+        )
+        return [self.ingredient_ids[position] for position in positions]
+
+
+class CatalogSnapshotStore:
+    """
+    Holds the current snapshot and replaces it once the catalog version moves
+    on. With a ``directory``, snapshots are mapped from image files shared
+    by every worker using that directory (see ``map_shared_image``).
+    """
+
+    def __init__(self, enabled: bool, directory: Optional[str] = None):
+        self.enabled = enabled
+        self.directory = directory
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._lock = threading.Lock()
+
+    def get(self, db: Session) -> Optional[CatalogSnapshot]:
+        """The snapshot for the current catalog version, or None in database mode"""
+        if not self.enabled:
+            return None
+        version = current_catalog_version(db).number
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version >= version:
+            return snapshot
+        with self._lock:
+            # Another request may have loaded it while this one waited
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.version < version:
+                snapshot = self.load(db)
+        return snapshot
+
+    def load(self, db: Session) -> CatalogSnapshot:
+        """Read or map a new snapshot and swap it in"""
+        if self.directory is None:
+            snapshot = CatalogSnapshot.load(db)
+        else:
+            snapshot = CatalogSnapshot(map_shared_image(self.directory, db))
+        self._snapshot = snapshot
+        return snapshot
+
+    def clear(self):
+        self._snapshot = None
+
+
+catalog_snapshot = CatalogSnapshotStore(
+    enabled=CATALOG_MODE.lower() in ("snapshot", "shared"),
+    directory=SNAPSHOT_DIR if CATALOG_MODE.lower() == "shared" else None
+)
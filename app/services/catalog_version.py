@@ -0,0 +1,106 @@
+"""
+Catalog version tracking
+
+The version counter lives in the database so every worker sees the same
+value. Each process caches it and re-reads it at most once per
+``CATALOG_VERSION_CHECK_INTERVAL``; local commits invalidate the cached value
+immediately. Conditional requests can therefore be answered without a
+database round-trip.
+"""
+
+import threading
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from typing import NamedTuple, Optional
+
+from app.config import CATALOG_VERSION_CHECK_INTERVAL
+from app.models.catalog import CatalogVersion
+
+_ROW_ID = 1
+_EPOCH = datetime(1970, 1, 1)
+
+
+class Version(NamedTuple):
+    """Catalog version number and the UTC time of the write that produced it"""
+    number: int
+    updated_at: datetime
+
+
+def bump_catalog_version(connection: Connection):
+    """Increment the version inside the caller's transaction"""
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    result = connection.execute(
+        update(CatalogVersion)
+        .where(CatalogVersion.id == _ROW_ID)
+        .values(version=CatalogVersion.version + 1, updated_at=now)
+    )
+    if result.rowcount == 0:
+        connection.execute(
+            insert(CatalogVersion).values(id=_ROW_ID, version=1, updated_at=now)
+        )
+
+
+def ensure_catalog_version(engine: Engine):
+    """Create the version row for databases that do not have one yet"""
+    try:
+        with engine.begin() as connection:
+            exists = connection.execute(
+                select(CatalogVersion.id).where(CatalogVersion.id == _ROW_ID)
+            ).first()
+            if exists is None:
+                bump_catalog_version(connection)
+    except IntegrityError:
+        # Another worker starting at the same time inserted it first
+        pass
+
+
+class CatalogVersionTracker:
+    """Per-process cache of the database catalog version"""
+
+    def __init__(self, check_interval: float):
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._version: Optional[Version] = None
+        self._checked_at = 0.0
+        self._generation = 0
+
+    def current(self, db: Session) -> Version:
+        with self._lock:
+            if (
+                self._version is not None
+                and time.monotonic() - self._checked_at < self.check_interval
+            ):
+                return self._version
+            generation = self._generation
+
+        row = db.execute(
+            select(CatalogVersion.version, CatalogVersion.updated_at)
+            .where(CatalogVersion.id == _ROW_ID)
+        ).first()
+        version = Version(row[0], row[1]) if row else Version(0, _EPOCH)
+
+        with self._lock:
+            # Do not keep a value read before a concurrent local commit
+            if generation == self._generation:
+                self._version = version
+                self._checked_at = time.monotonic()
+        return version
+
+    def invalidate(self):
+        """Forget the cached version so the next request re-reads it"""
+        with self._lock:
+            self._version = None
+            self._generation += 1
+
+
+catalog_version = CatalogVersionTracker(CATALOG_VERSION_CHECK_INTERVAL)
+
+
+def current_catalog_version(db: Session) -> Version:
+    """The catalog version, read from the database only when the cached value is stale"""
+    return catalog_version.current(db)
@@ -0,0 +1,128 @@
+"""
+Response compression
+
+Content negotiation on ``Accept-Encoding``, one-shot encoders for cached
+bodies, and incremental gzip for streamed bodies. Catalog responses are
+compressed in ``cached_json_response`` so the encoded bytes can be cached;
+``NegotiatingGZipMiddleware`` in ``main.py`` covers every other response.
+"""
+
+import gzip
+import zlib
+
+from fastapi import Request
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder
+from starlette.types import Message, Receive, Scope, Send
+from typing import Callable, Dict, Iterable, Iterator, Optional
+
+from app.config import GZIP_LEVEL
+
+
+def gzip_compress(body: bytes) -> bytes:
+    """Gzip a whole body; a zero mtime keeps the output identical across calls"""
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+# Content codings the API can produce, in order of preference
+ENCODERS: Dict[str, Callable[[bytes], bytes]] = {
+    "gzip": gzip_compress,
+}
+
+
+def _quality(params: str) -> float:
+    """The ``q`` value of an ``Accept-Encoding`` item's parameters; unparsable values refuse"""
+    for param in params.split(";"):
+        key, _, value = param.partition("=")
+        if key.strip().lower() == "q":
+            try:
+                return float(value.strip())
+            except ValueError:
+                return 0.0
+    return 1.0
+
+
+def _accepts(accept_encoding: str, encoding: str) -> bool:
+    wildcard = None
+    for item in accept_encoding.split(","):
+        name, _, params = item.partition(";")
+        name = name.strip().lower()
+        if name == encoding:
+            return _quality(params) > 0
+        if name == "*":
+            wildcard = _quality(params)
+    return wildcard is not None and wildcard > 0
+
+
+def accepts_encoding(request: Request, encoding: str) -> bool:
+    """
+    Whether ``Accept-Encoding`` allows ``encoding``. An entry naming it
+    takes precedence over ``*``, and ``q=0`` refuses it.
+    """
+    return _accepts(request.headers.get("accept-encoding", ""), encoding)
+
+
+def negotiate_encoding(request: Request) -> Optional[str]:
+    """The preferred content coding the client accepts, or None for identity"""
+    for encoding in ENCODERS:
+        if accepts_encoding(request, encoding):
+            return encoding
+    return None
+
+
+def gzip_stream(chunks: Iterable[bytes], level: int = GZIP_LEVEL) -> Iterator[bytes]:
+    """
+    Gzip a stream chunk by chunk. Each input chunk is flushed with
+    ``Z_SYNC_FLUSH`` so the client can decode it as soon as it arrives.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class _TaggingGZipResponder(GZipResponder):
+    """``GZipResponder`` that gives the bodies it compresses their own ETag"""
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        async def send_tagged(message: Message):
+            if message["type"] == "http.response.start" and not self.content_encoding_set:
+                headers = MutableHeaders(raw=message["headers"])
+                etag = headers.get("etag")
+                if headers.get("content-encoding") == "gzip" and etag and not etag.startswith("W/"):
+                    # A strong ETag names exact bytes, so the gzip body needs a tag of its own
+                    headers["ETag"] = etag[:-1] + '-gzip"'
+            await send(message)
+
+        await super().__call__(scope, receive, send_tagged)
+
+
+class NegotiatingGZipMiddleware(GZipMiddleware):
+    """
+    Starlette's ``GZipMiddleware``, negotiating with ``accepts_encoding``
+    (which honours ``gzip;q=0``) instead of a substring check, keeping ETags
+    specific to the encoding, and sending ``Vary: Accept-Encoding`` whether
+    or not the body ends up compressed.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_varying(message: Message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=message["headers"])
+                if "accept-encoding" not in headers.get("vary", "").lower():
+                    headers.add_vary_header("Accept-Encoding")
+            await send(message)
+
+        if _accepts(Headers(scope=scope).get("accept-encoding", ""), "gzip"):
+            responder = _TaggingGZipResponder(
+                self.app, self.minimum_size, compresslevel=self.compresslevel
+            )
+            await responder(scope, receive, send_varying)
+        else:
+            await self.app(scope, receive, send_varying)
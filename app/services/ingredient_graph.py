@@ -0,0 +1,157 @@
+"""
+Sub-ingredient graph resolution
+
+``IngredientIngredient`` links form an arbitrary directed graph (a sauce can
+contain a stock that contains an allergen, and bad data can contain cycles).
+This module resolves that graph with recursive CTEs, so any depth costs a
+single query, and renders nested ``IngredientResponse`` data from the result.
+"""
+
+from sqlalchemy import String, cast, literal, select
+from sqlalchemy.orm import Session, aliased
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from app.models.pizza import Ingredient, IngredientIngredient, PizzaIngredient
+
+# Deepest sub-ingredient level the API will expand
+MAX_INGREDIENT_DEPTH = 16
+
+
+def pizza_ingredient_closure(pizza_ids: Optional[list] = None):
+    """
+    CTE of ``(pizza_id, ingredient_id)`` for every ingredient reachable from a
+    pizza at any depth. ``UNION`` keeps the rows distinct, which also stops the
+    recursion on cycles.
+    """
+    closure = select(
+        PizzaIngredient.pizza_id.label("pizza_id"),
+        PizzaIngredient.ingredient_id.label("ingredient_id")
+    )
+    if pizza_ids is not None:
+        closure = closure.where(PizzaIngredient.pizza_id.in_(pizza_ids))
+    closure = closure.cte("pizza_ingredient_closure", recursive=True)
+    return closure.union(
+        select(closure.c.pizza_id, IngredientIngredient.child_ingredient_id)
+        .join(
+            IngredientIngredient,
+            IngredientIngredient.parent_ingredient_id == closure.c.ingredient_id
+        )
+    )
+
+
+def ingredient_ancestors(ingredient_ids: Iterable[int]):
+    """CTE of the given ingredients plus every ingredient that contains them at any depth"""
+    ancestors = select(Ingredient.id.label("ingredient_id")).where(
+        Ingredient.id.in_(list(ingredient_ids))
+    ).cte("ingredient_ancestors", recursive=True)
+    return ancestors.union(
+        select(IngredientIngredient.parent_ingredient_id)
+        .join(ancestors, IngredientIngredient.child_ingredient_id == ancestors.c.ingredient_id)
+    )
+
+
+def _edges_below(root_ids: List[int], depth: int):
+    """
+    Recursive CTE walking sub-ingredient edges up to ``depth`` levels below
+    the roots. Each row carries the path of ids walked so far, and an edge
+    whose child already appears on the path (a cycle) is not followed.
+    """
+    link = IngredientIngredient
+    child_marker = "/" + cast(link.child_ingredient_id, String) + "/"
+    edges = select(
+        link.parent_ingredient_id.label("parent_id"),
+        link.child_ingredient_id.label("child_id"),
+        literal(1).label("depth"),
+        ("/" + cast(link.parent_ingredient_id, String) + child_marker).label("path")
+    ).where(
+        link.parent_ingredient_id.in_(root_ids),
+        link.parent_ingredient_id != link.child_ingredient_id
+    ).cte("ingredient_edges", recursive=True)
+    return edges.union_all(
+        select(
+            link.parent_ingredient_id,
+            link.child_ingredient_id,
+            edges.c.depth + 1,
+            edges.c.path + cast(link.child_ingredient_id, String) + "/"
+        )
+        .join(edges, link.parent_ingredient_id == edges.c.child_id)
+        .where(edges.c.depth < depth, ~edges.c.path.contains(child_marker))
+    )
+
+
+class IngredientGraph:
+    """Sub-ingredient edges and ingredient attributes needed to render nested responses"""
+
+    def __init__(self):
+        self.nodes: Dict[int, Tuple[str, bool]] = {}
+        self.children: Dict[int, List[int]] = {}
+
+    def register(self, ingredient: Ingredient):
+        """Record the attributes of an already loaded ingredient"""
+        self.nodes[ingredient.id] = (ingredient.name, ingredient.is_allergen)
+
+    def tree(self, ingredient_id: int, depth: int, _path: Tuple[int, ...] = ()) -> dict:
+        """
+        Nested ``IngredientResponse`` data for one ingredient, expanded
+        ``depth`` levels deep. An ingredient is never expanded inside itself,
+        so cycles end at the repeated ingredient.
+        """
+        name, is_allergen = self.nodes[ingredient_id]
+        path = _path + (ingredient_id,)
+        sub_ingredients = []
+        if depth > 0:
+            sub_ingredients = [
+                self.tree(child_id, depth - 1, path)
+                for child_id in self.children.get(ingredient_id, [])
+                if child_id not in path
+            ]
+        return {
+            "id": ingredient_id,
+            "name": name,
+            "is_allergen": is_allergen,
+            "sub_ingredients": sub_ingredients,
+        }
+
+
+def resolve_ingredient_graph(
+    db: Session,
+    root_ids: Optional[Iterable[int]],
+    depth: int
+) -> IngredientGraph:
+    """
+    Load every edge reachable within ``depth`` levels of the roots in one
+    query. ``root_ids=None`` loads the whole graph, which is cheaper than
+    walking it from every ingredient.
+    """
+    graph = IngredientGraph()
+    if depth <= 0:
+        return graph
+
+    child = aliased(Ingredient)
+    if root_ids is None:
+        rows = db.execute(
+            select(
+                IngredientIngredient.parent_ingredient_id,
+                child.id, child.name, child.is_allergen
+            ).join(child, child.id == IngredientIngredient.child_ingredient_id)
+        )
+    else:
+        roots = sorted(set(root_ids))
+        if not roots:
+            return graph
+        edges = _edges_below(roots, depth)
+        rows = db.execute(
+            select(edges.c.parent_id, child.id, child.name, child.is_allergen)
+            .join(child, child.id == edges.c.child_id)
+            .distinct()
+        )
+
+    seen: Set[Tuple[int, int]] = set()
+    for parent_id, child_id, name, is_allergen in rows:
+        graph.nodes[child_id] = (name, is_allergen)
+        if (parent_id, child_id) not in seen:
+            seen.add((parent_id, child_id))
+            graph.children.setdefault(parent_id, []).append(child_id)
+    for children in graph.children.values():
+        children.sort()
+    return graph
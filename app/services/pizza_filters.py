@@ -0,0 +1,69 @@
+"""
+Composable pizza filter predicates
+
+Each filter is a correlated ``EXISTS`` (or ``NOT EXISTS``) subquery on an
+association table, probed through its ``(pizza_id, ingredient_id)`` primary
+key. Unlike joins, any number of them can be combined on one query without
+duplicating pizza rows.
+"""
+
+from sqlalchemy import exists
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+from app.models.pizza import Pizza, Ingredient, PizzaIngredient, PizzaAllergen
+
+
+def has_ingredient(name: str):
+    """Pizza has a direct ingredient whose name contains ``name``"""
+    return exists().where(
+        PizzaIngredient.pizza_id == Pizza.id,
+        Ingredient.id == PizzaIngredient.ingredient_id,
+        Ingredient.name.contains(name)
+    )
+
+
+def has_allergen(name: str):
+    """Pizza contains an allergen, at any depth, whose name contains ``name``"""
+    return exists().where(
+        PizzaAllergen.pizza_id == Pizza.id,
+        Ingredient.id == PizzaAllergen.ingredient_id,
+        Ingredient.name.contains(name)
+    )
+
+
+def _normalize(values: Optional[Iterable[str]]) -> Tuple[str, ...]:
+    """Sorted, de-duplicated non-blank values; order does not change the result"""
+    return tuple(sorted({value for value in values or () if value}))
+
+
+class PizzaFilters(NamedTuple):
+    """Ingredient and allergen constraints for a pizza listing"""
+    ingredients: Tuple[str, ...] = ()
+    allergens: Tuple[str, ...] = ()
+    exclude_ingredients: Tuple[str, ...] = ()
+    exclude_allergens: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_params(
+        cls,
+        ingredients: Optional[Iterable[str]] = None,
+        allergens: Optional[Iterable[str]] = None,
+        exclude_ingredients: Optional[Iterable[str]] = None,
+        exclude_allergens: Optional[Iterable[str]] = None
+    ) -> "PizzaFilters":
+        """Build normalized filters from (possibly repeated) query parameters"""
+        return cls(
+            _normalize(ingredients),
+            _normalize(allergens),
+            _normalize(exclude_ingredients),
+            _normalize(exclude_allergens),
+        )
+
+    def clauses(self) -> List:
+        """WHERE clauses requiring every included value and none of the excluded ones"""
+        return (
+            [has_ingredient(name) for name in self.ingredients]
+            + [has_allergen(name) for name in self.allergens]
+            + [~has_ingredient(name) for name in self.exclude_ingredients]
+            + [~has_allergen(name) for name in self.exclude_allergens]
+        )
@@ -0,0 +1,63 @@
+"""
+Denormalized pizza statistics
+
+Keeps one ``pizza_stats`` row per pizza with its ingredient count, allergen
+count and allergen-free flag, so listings can sort and page on them through
+an index. Allergen counts are read from ``pizza_allergens``, so the rows are
+refreshed right after the allergen index, for the same pizzas.
+"""
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.engine import Connection, Engine
+from typing import Iterable, Optional
+
+from app.database.chunks import id_chunks
+from app.models.pizza import Pizza, PizzaIngredient, PizzaAllergen, PizzaStats
+
+
+def _stats_rows(pizza_ids: Optional[list] = None):
+    """SELECT (pizza_id, ingredient_count, allergen_count, allergen_free) per pizza"""
+    ingredient_count = (
+        select(func.count()).where(PizzaIngredient.pizza_id == Pizza.id).scalar_subquery()
+    )
+    allergen_count = (
+        select(func.count()).where(PizzaAllergen.pizza_id == Pizza.id).scalar_subquery()
+    )
+    query = select(Pizza.id, ingredient_count, allergen_count, allergen_count == 0)
+    if pizza_ids is not None:
+        query = query.where(Pizza.id.in_(pizza_ids))
+    return query
+
+
+def refresh_pizza_stats(connection: Connection, pizza_ids: Optional[Iterable[int]] = None):
+    """
+    Recompute stats rows for the given pizzas, or for the whole catalog.
+
+    Called by ``rebuild_allergen_index``, which every writer already runs
+    after changing pizzas, ingredients or their links.
+    """
+    columns = [
+        PizzaStats.pizza_id,
+        PizzaStats.ingredient_count,
+        PizzaStats.allergen_count,
+        PizzaStats.allergen_free,
+    ]
+
+    if pizza_ids is None:
+        connection.execute(delete(PizzaStats))
+        connection.execute(insert(PizzaStats).from_select(columns, _stats_rows()))
+        return
+
+    for chunk in id_chunks(sorted(set(pizza_ids))):
+        connection.execute(delete(PizzaStats).where(PizzaStats.pizza_id.in_(chunk)))
+        connection.execute(insert(PizzaStats).from_select(columns, _stats_rows(chunk)))
+
+
+def ensure_pizza_stats(engine: Engine):
+    """Backfill missing stats rows, e.g. for databases created before the table existed"""
+    with engine.begin() as connection:
+        missing = select(Pizza.id).where(
+            ~select(PizzaStats.pizza_id).where(PizzaStats.pizza_id == Pizza.id).exists()
+        )
+        if connection.execute(missing.limit(1)).first() is not None:
+            refresh_pizza_stats(connection)
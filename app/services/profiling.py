@@ -0,0 +1,335 @@
+"""
+Request profiling and query instrumentation
+
+``install_metrics(app)`` adds ``GET /metrics``, which always exposes the
+response cache counters in Prometheus text format. The rest is opt-in
+(``PIZZA_PROFILING=1``); ``install_profiling(app)`` adds:
+
+- an ASGI middleware that tracks each request in a context variable and
+  reports its SQL statement count, database time, serialization time and
+  handler time in a ``Server-Timing`` header and in ``GET /metrics``
+- SQLAlchemy cursor listeners that attribute statements to the current request
+- cProfile runs for a sample of requests, dumped to ``PIZZA_PROFILE_DIR``
+  when the request takes longer than ``PIZZA_SLOW_REQUEST_MS``
+
+Handlers run in worker threads, and cProfile only sees the thread that
+enabled it, so timing and profiling of the handler itself happens in
+``ProfiledRoute``, which wraps each endpoint where it actually executes.
+"""
+
+import asyncio
+import cProfile
+import contextvars
+import functools
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from fastapi import FastAPI
+from fastapi.responses import Response
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.config import PROFILE_DIR, PROFILE_SAMPLE_RATE, SLOW_REQUEST_THRESHOLD_MS
+from app.services.response_cache import response_cache
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds, in seconds, of the request duration histogram buckets
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class RequestMetrics:
+    """Measurements collected while serving one request"""
+
+    def __init__(self, profile: bool = False):
+        self.started = time.perf_counter()
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.serialize_seconds = 0.0
+        self.handler_seconds = 0.0
+        self.profiler: Optional[cProfile.Profile] = cProfile.Profile() if profile else None
+
+    def server_timing(self, total_seconds: float) -> str:
+        return ", ".join([
+            f'db;dur={self.db_seconds * 1000:.2f};desc="{self.statements} queries"',
+            f"serialize;dur={self.serialize_seconds * 1000:.2f}",
+            f"handler;dur={self.handler_seconds * 1000:.2f}",
+            f"total;dur={total_seconds * 1000:.2f}",
+        ])
+
+
+_current: contextvars.ContextVar[Optional[RequestMetrics]] = contextvars.ContextVar(
+    "request_metrics", default=None
+)
+
+
+def current_metrics() -> Optional[RequestMetrics]:
+    """Metrics of the request being served, when profiling is active"""
+    return _current.get()
+
+
+@contextmanager
+def timed_serialization():
+    """Add the time spent in the block to the current request's serialization time"""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serialize_seconds += time.perf_counter() - start
+
+
+def _profiled(endpoint: Callable) -> Callable:
+    """Wrap an endpoint to time it, and run cProfile on it, in the thread that executes it"""
+    if getattr(endpoint, "_profiled", False):
+        # include_router() builds new routes around the already wrapped endpoint
+        return endpoint
+
+    def _start(metrics: RequestMetrics) -> float:
+        if metrics.profiler is not None:
+            try:
+                metrics.profiler.enable()
+            except ValueError:
+                # Python 3.12+ allows one active profiler per process, and
+                # another request's may be running; this one goes unprofiled
+                metrics.profiler = None
+        return time.perf_counter()
+
+    def _stop(metrics: RequestMetrics, start: float):
+        metrics.handler_seconds += time.perf_counter() - start
+        if metrics.profiler is not None:
+            metrics.profiler.disable()
+
+    if asyncio.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args, **kwargs):
+            metrics = _current.get()
+            if metrics is None:
+                return await endpoint(*args, **kwargs)
+            start = _start(metrics)
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                _stop(metrics, start)
+        async_wrapper._profiled = True
+        return async_wrapper
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        metrics = _current.get()
+        if metrics is None:
+            return endpoint(*args, **kwargs)
+        start = _start(metrics)
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            _stop(metrics, start)
+    wrapper._profiled = True
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    """Route whose endpoint reports handler time and can be profiled"""
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, _profiled(endpoint), **kwargs)
+
+
+class MetricsRegistry:
+    """Thread-safe Prometheus counters and histograms, keyed by route template"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DURATION_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._requests: Dict[Tuple[str, str, int], int] = {}
+        self._durations: Dict[str, List[float]] = {}
+        self._totals: Dict[Tuple[str, str], float] = {}
+
+    def observe(self, method: str, route: str, status: int, metrics: RequestMetrics, seconds: float):
+        with self._lock:
+            key = (method, route, status)
+            self._requests[key] = self._requests.get(key, 0) + 1
+
+            # Cumulative bucket counts, then the total count and sum
+            histogram = self._durations.setdefault(route, [0] * (len(self.buckets) + 1) + [0.0])
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    histogram[i] += 1
+            histogram[-2] += 1
+            histogram[-1] += seconds
+
+            for name, value in [
+                ("db_statements", metrics.statements),
+                ("db_seconds", metrics.db_seconds),
+                ("serialization_seconds", metrics.serialize_seconds),
+                ("handler_seconds", metrics.handler_seconds),
+            ]:
+                self._totals[(name, route)] = self._totals.get((name, route), 0) + value
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            lines += [
+                "# HELP pizza_http_requests_total HTTP requests served",
+                "# TYPE pizza_http_requests_total counter",
+            ]
+            for (method, route, status), count in sorted(self._requests.items()):
+                lines.append(
+                    f'pizza_http_requests_total{{method="{method}",route="{route}",'
+                    f'status="{status}"}} {count}'
+                )
+
+            lines += [
+                "# HELP pizza_http_request_duration_seconds Time to produce the response",
+                "# TYPE pizza_http_request_duration_seconds histogram",
+            ]
+            for route, histogram in sorted(self._durations.items()):
+                for i, bound in enumerate(self.buckets):
+                    lines.append(
+                        f'pizza_http_request_duration_seconds_bucket{{route="{route}",'
+                        f'le="{bound}"}} {histogram[i]}'
+                    )
+                lines.append(
+                    f'pizza_http_request_duration_seconds_bucket{{route="{route}",le="+Inf"}} '
+                    f"{histogram[-2]}"
+                )
+                lines.append(
+                    f'pizza_http_request_duration_seconds_count{{route="{route}"}} {histogram[-2]}'
+                )
+                lines.append(
+                    f'pizza_http_request_duration_seconds_sum{{route="{route}"}} {histogram[-1]:.6f}'
+                )
+
+            for name, help_text in [
+                ("db_statements", "SQL statements executed"),
+                ("db_seconds", "Time spent executing SQL"),
+                ("serialization_seconds", "Time spent serializing response bodies"),
+                ("handler_seconds", "Time spent in route handlers"),
+            ]:
+                lines += [
+                    f"# HELP pizza_{name}_total {help_text}",
+                    f"# TYPE pizza_{name}_total counter",
+                ]
+                for (metric, route), value in sorted(self._totals.items()):
+                    if metric == name:
+                        lines.append(f'pizza_{name}_total{{route="{route}"}} {value:g}')
+
+        stats = response_cache.stats()
+        counters = ["hits", "misses", "evictions", "invalidations", "coalesced", "coalesce_timeouts"]
+        for name in counters:
+            lines += [
+                f"# TYPE pizza_response_cache_{name}_total counter",
+                f"pizza_response_cache_{name}_total {stats[name]}",
+            ]
+        for name in ["entries", "bytes", "in_flight"]:
+            lines += [
+                f"# TYPE pizza_response_cache_{name} gauge",
+                f"pizza_response_cache_{name} {stats[name]}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def _route_template(scope: dict) -> str:
+    """Matched route path, so that path parameters do not create new series"""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def _dump_profile(metrics: RequestMetrics, method: str, route: str, seconds: float):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{method}-{route.strip('/').replace('/', '_') or 'root'}"
+    path = os.path.join(PROFILE_DIR, f"{name}-{seconds * 1000:.0f}ms.prof")
+    metrics.profiler.dump_stats(path)
+    logger.warning("Slow request %s %s took %.0f ms; profile written to %s",
+                   method, route, seconds * 1000, path)
+
+
+class ProfilingMiddleware:
+    """ASGI middleware measuring every HTTP request"""
+
+    def __init__(
+        self,
+        app,
+        sample_rate: float = PROFILE_SAMPLE_RATE,
+        slow_threshold_ms: float = SLOW_REQUEST_THRESHOLD_MS
+    ):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold_ms / 1000
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = RequestMetrics(profile=random.random() < self.sample_rate)
+        token = _current.set(metrics)
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                total = time.perf_counter() - metrics.started
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", metrics.server_timing(total).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            seconds = time.perf_counter() - metrics.started
+            route = _route_template(scope)
+            registry.observe(scope["method"], route, status, metrics, seconds)
+            if metrics.profiler is not None and seconds >= self.slow_threshold:
+                _dump_profile(metrics, scope["method"], route, seconds)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    metrics = _current.get()
+    started = conn.info.get("query_started")
+    if metrics is None or not started:
+        return
+    metrics.db_seconds += time.perf_counter() - started.pop()
+    metrics.statements += 1
+
+
+def _install_query_listeners():
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def metrics_endpoint() -> Response:
+    """Prometheus metrics"""
+    return Response(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def install_metrics(app: FastAPI):
+    """Add ``GET /metrics`` to ``app``; per-request series need ``install_profiling``"""
+    app.add_api_route("/metrics", metrics_endpoint, methods=["GET"], include_in_schema=False)
+
+
+def install_profiling(app: FastAPI, **options):
+    """Add the profiling middleware and query listeners to ``app``"""
+    _install_query_listeners()
+    app.add_middleware(ProfilingMiddleware, **options)
@@ -0,0 +1,322 @@
+"""
+In-process read-through cache for serialized catalog responses
+
+Entries are JSON bodies keyed on the endpoint, its normalized query
+parameters and the catalog version. The cache is bounded by entry count and
+total bytes (LRU eviction), entries expire after a TTL, and everything is
+dropped when the catalog changes.
+
+Responses carry a strong ``ETag`` and ``Last-Modified`` derived from the
+catalog version, and clients that are already current get ``304 Not
+Modified`` before any query runs or any body is serialized.
+
+Bodies above ``COMPRESSION_MIN_SIZE`` are compressed for clients that
+accept it, and the compressed bytes are kept in the cache entry next to the
+raw ones, so repeated requests skip both serialization and compression.
+
+Misses are single-flight: while one request computes a body, identical
+requests (same key, so same parameters and catalog version) wait for it and
+share the result instead of repeating the queries and serialization. This
+holds even with the cache disabled, unless ``PIZZA_CACHE_COALESCE=0``.
+Waiting requests release their database connection first, and compute the
+body themselves after ``PIZZA_CACHE_COALESCE_WAIT`` seconds.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Request
+from fastapi.responses import Response
+from sqlalchemy.orm import Session
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+from app.config import (
+    CACHE_COALESCE, CACHE_COALESCE_WAIT, CACHE_MAX_BYTES, CACHE_MAX_ENTRIES, CACHE_TTL,
+    COMPRESSION_MIN_SIZE
+)
+from app.services.catalog_events import on_catalog_change
+from app.services.catalog_version import Version, current_catalog_version
+from app.services.compression import ENCODERS, negotiate_encoding
+
+
+class _Flight:
+    """A body being computed, which identical concurrent requests wait for"""
+
+    __slots__ = ("done", "body", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.body: Optional[bytes] = None
+        self.error: Optional[BaseException] = None
+
+
+class ResponseCache:
+    """Thread-safe LRU + TTL cache of response bodies with hit/miss counters"""
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: int,
+        ttl: float,
+        coalesce: bool = True,
+        coalesce_wait: float = CACHE_COALESCE_WAIT
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.coalesce = coalesce
+        self.coalesce_wait = coalesce_wait
+        self._flights: Dict[Hashable, _Flight] = {}
+        # key -> (expiry, body, encoded variants of the body by content coding)
+        self._entries: "OrderedDict[Hashable, Tuple[float, bytes, Dict[str, bytes]]]" = OrderedDict()
+        self._bytes = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        # Requests that shared another request's computation
+        self.coalesced = 0
+        # Requests that stopped waiting for it and computed their own
+        self.coalesce_timeouts = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0 and self.ttl > 0
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                self._discard(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def get_or_set(
+        self,
+        key: Hashable,
+        compute: Callable[[], bytes],
+        before_wait: Optional[Callable[[], None]] = None
+    ) -> bytes:
+        """
+        Return the cached body, or compute and store it.
+
+        Concurrent calls for the same key share a single ``compute()``, and
+        its exception if it raises. ``before_wait`` runs before a call
+        starts waiting on another one, e.g. to release a pooled connection;
+        a call still waiting after ``coalesce_wait`` seconds computes the
+        body itself. A body computed while the catalog changed is returned
+        but not stored, so an invalidation can never be overwritten by
+        stale data.
+        """
+        if self.enabled:
+            body = self.get(key)
+            if body is not None:
+                return body
+        if not self.coalesce:
+            return self._compute(key, compute)
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.coalesced += 1
+        if not leader:
+            if before_wait is not None:
+                before_wait()
+            if not flight.done.wait(self.coalesce_wait):
+                with self._lock:
+                    self.coalesce_timeouts += 1
+                return self._compute(key, compute)
+            if flight.error is not None:
+                raise flight.error
+            return flight.body
+
+        try:
+            flight.body = self._compute(key, compute)
+        except BaseException as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.body
+
+    def _compute(self, key: Hashable, compute: Callable[[], bytes]) -> bytes:
+        if not self.enabled:
+            return compute()
+        generation = self._generation
+        body = compute()
+        with self._lock:
+            if generation == self._generation:
+                self._store(key, body)
+        return body
+
+    def encoded(
+        self,
+        key: Hashable,
+        body: bytes,
+        encoding: str,
+        encode: Callable[[bytes], bytes]
+    ) -> bytes:
+        """
+        ``body``, as returned by ``get_or_set(key, ...)``, in a content coding.
+        
+        The encoded bytes are kept with the entry and count toward the byte
+        limit; they do not count as a separate hit or miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is body and encoding in entry[2]:
+                return entry[2][encoding]
+        data = encode(body)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is body and encoding not in entry[2]:
+                entry[2][encoding] = data
+                self._bytes += len(data)
+                self._evict()
+        return data
+
+    def clear(self):
+        """Drop every entry; called whenever the catalog changes"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._generation += 1
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "coalesced": self.coalesced,
+                "coalesce_timeouts": self.coalesce_timeouts,
+                "in_flight": len(self._flights),
+            }
+
+    def _store(self, key: Hashable, body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        if key in self._entries:
+            self._discard(key)
+        self._entries[key] = (time.monotonic() + self.ttl, body, {})
+        self._bytes += len(body)
+        self._evict()
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._discard(oldest)
+            self.evictions += 1
+
+    def _discard(self, key: Hashable):
+        _, body, variants = self._entries.pop(key)
+        self._bytes -= len(body) + sum(len(data) for data in variants.values())
+
+
+response_cache = ResponseCache(
+    max_entries=CACHE_MAX_ENTRIES,
+    max_bytes=CACHE_MAX_BYTES,
+    ttl=CACHE_TTL,
+    coalesce=CACHE_COALESCE
+)
+on_catalog_change(response_cache.clear)
+
+
+def _etag(version: Version, encoding: Optional[str] = None) -> str:
+    """
+    Strong ETag of a catalog body in one content coding. Each coding gets
+    its own tag, since a strong validator names the exact bytes sent.
+    """
+    if encoding is None:
+        return f'"catalog-{version.number}"'
+    return f'"catalog-{version.number}-{encoding}"'
+
+
+def _validators(version: Version) -> Dict[str, str]:
+    """Caching headers describing the given catalog version, apart from the ETag"""
+    updated_at = version.updated_at.replace(microsecond=0, tzinfo=timezone.utc)
+    return {
+        "Last-Modified": format_datetime(updated_at, usegmt=True),
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+    }
+
+
+def _not_modified_etag(
+    request: Request, etags: List[str], validators: Dict[str, str]
+) -> Optional[str]:
+    """
+    The ETag to send with a 304 when the client's copy is current, or None.
+    If-None-Match may name the tag of any coding of the current version;
+    If-Modified-Since is only evaluated when no ETag was sent.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return etags[-1]
+        # If-None-Match uses the weak comparison function
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return next((etag for etag in etags if etag in tags), None)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return None
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        if parsedate_to_datetime(validators["Last-Modified"]) <= since:
+            return etags[-1]
+    return None
+
+
+def cached_json_response(
+    request: Request,
+    db: Session,
+    key: Hashable,
+    compute: Callable[[], bytes]
+) -> Response:
+    """
+    Serve a catalog JSON body with conditional request support.
+    
+    ``compute`` only runs when the client is not current and the body is
+    not already cached for this catalog version.
+    """
+    version = current_catalog_version(db)
+    validators = _validators(version)
+    encoding = negotiate_encoding(request)
+    etags = [_etag(version)] + ([_etag(version, encoding)] if encoding is not None else [])
+    etag = _not_modified_etag(request, etags, validators)
+    if etag is not None:
+        return Response(status_code=304, headers={**validators, "ETag": etag})
+    
+    cache_key = (version.number,) + tuple(key)
+    # A request waiting on an identical one gives its connection back meanwhile
+    body = response_cache.get_or_set(cache_key, compute, before_wait=db.close)
+    
+    headers = {**validators, "ETag": _etag(version)}
+    if encoding is not None and len(body) >= COMPRESSION_MIN_SIZE:
+        body = response_cache.encoded(cache_key, body, encoding, ENCODERS[encoding])
+        headers.update({"ETag": _etag(version, encoding), "Content-Encoding": encoding})
+    
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,33 @@
+"""
+Schema setup
+
+Creates missing tables and indexes and the derived structures (search
+index, allergen index, pizza stats, catalog version row). Everything is
+idempotent and uses ``IF NOT EXISTS``, so workers starting together can all
+run it; it can also run once per deploy with ``python migrate.py`` and be
+skipped at startup with ``PIZZA_SCHEMA_SETUP=0``.
+"""
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from app.database.base import Base
+from app.services.allergen_index import ensure_allergen_index
+from app.services.catalog_version import ensure_catalog_version
+from app.services.pizza_stats import ensure_pizza_stats
+from app.services.search import ensure_search_index
+
+
+def setup_schema(engine: Engine):
+    """Bring the database schema up to date"""
+    # Not create_all(): its check-then-create races another worker, and it
+    # only creates indexes together with their table
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            connection.execute(CreateTable(table, if_not_exists=True))
+            for index in table.indexes:
+                connection.execute(CreateIndex(index, if_not_exists=True))
+    ensure_allergen_index(engine)
+    ensure_pizza_stats(engine)
+    ensure_search_index(engine)
+    ensure_catalog_version(engine)
@@ -0,0 +1,151 @@
+"""
+Full-text search over pizzas and ingredients
+
+On SQLite the catalog is indexed by FTS5 external-content tables that
+triggers keep in sync with ``pizzas`` and ``ingredients``, so searches are
+ranked index lookups instead of ``LIKE '%term%'`` table scans. Other
+databases fall back to ``LIKE`` matching on every term.
+"""
+
+import re
+import unicodedata
+
+from sqlalchemy import Integer, and_, column, func, literal, literal_column, or_, select, table
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from typing import List, Optional
+
+from app.models.pizza import Pizza, Ingredient
+
+# FTS table -> (content table, indexed columns, bm25 column weights)
+_FTS_TABLES = {
+    "pizzas_fts": ("pizzas", ["name", "description"], [10.0, 1.0]),
+    "ingredients_fts": ("ingredients", ["name"], [1.0]),
+}
+
+# Case-insensitive, accent-insensitive ("jalapenos" finds "Jalapeños")
+_TOKENIZER = "unicode61 remove_diacritics 2"
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+# unicode61 splits on anything but letters and digits, underscores included
+_FTS_TOKEN_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+
+def _fts_ddl(fts_name: str) -> List[str]:
+    """Statements creating an external-content FTS5 table and its sync triggers"""
+    source, columns, _ = _FTS_TABLES[fts_name]
+    column_list = ", ".join(columns)
+    new_values = ", ".join(f"new.{name}" for name in columns)
+    old_values = ", ".join(f"old.{name}" for name in columns)
+    insert_new = (
+        f"INSERT INTO {fts_name}(rowid, {column_list}) VALUES (new.id, {new_values});"
+    )
+    delete_old = (
+        f"INSERT INTO {fts_name}({fts_name}, rowid, {column_list}) "
+        f"VALUES ('delete', old.id, {old_values});"
+    )
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_name} USING fts5("
+        f"{column_list}, content='{source}', content_rowid='id', tokenize='{_TOKENIZER}')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_name}_ai AFTER INSERT ON {source} BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_name}_ad AFTER DELETE ON {source} BEGIN {delete_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_name}_au AFTER UPDATE ON {source} BEGIN {delete_old} {insert_new} END",
+        f"INSERT INTO {fts_name}({fts_name}) VALUES ('rebuild')",
+    ]
+
+
+def ensure_search_index(engine: Engine):
+    """Create and populate the FTS5 tables if they do not exist yet (SQLite only)"""
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as connection:
+        existing = {
+            row[0] for row in connection.exec_driver_sql(
+                "SELECT name FROM sqlite_master WHERE type = 'table'"
+            )
+        }
+        for fts_name in _FTS_TABLES:
+            if fts_name in existing:
+                continue
+            for statement in _fts_ddl(fts_name):
+                connection.exec_driver_sql(statement)
+
+
+def search_terms(search: Optional[str]) -> List[str]:
+    """Split free text into lower-cased search terms"""
+    if not search:
+        return []
+    return _TOKEN_RE.findall(search.lower())
+
+
+def fold_diacritics(text: str) -> str:
+    """Lower-case ``text`` and strip accents, as the FTS5 tokenizer does"""
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def text_tokens(text: str) -> List[str]:
+    """Accent-folded, lower-cased tokens of ``text`` as FTS5 indexes them, for matching outside FTS5"""
+    return _FTS_TOKEN_RE.findall(fold_diacritics(text))
+
+
+def _match_expression(terms: List[str]) -> str:
+    """FTS5 query requiring every term, each matched as a prefix"""
+    return " ".join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+
+
+def _uses_fts(db: Session) -> bool:
+    return db.get_bind().dialect.name == "sqlite"
+
+
+def _fts_matches(fts_name: str, terms: List[str], id_label: str):
+    _, _, weights = _FTS_TABLES[fts_name]
+    fts_table = table(fts_name, column("rowid", Integer))
+    fts_column = literal_column(fts_name)
+    return (
+        select(
+            fts_table.c.rowid.label(id_label),
+            func.bm25(fts_column, *weights).label("rank")
+        )
+        .select_from(fts_table)
+        .where(fts_column.op("MATCH")(_match_expression(terms)))
+        .subquery()
+    )
+
+
+def pizza_search_matches(db: Session, search: Optional[str]):
+    """
+    Subquery of ``(pizza_id, rank)`` for pizzas matching every search term
+    in their name or description; lower rank is more relevant.
+
+    Returns None when the search text contains no terms.
+    """
+    terms = search_terms(search)
+    if not terms:
+        return None
+    if _uses_fts(db):
+        return _fts_matches("pizzas_fts", terms, "pizza_id")
+    return (
+        select(Pizza.id.label("pizza_id"), literal(0.0).label("rank"))
+        .where(and_(*[
+            or_(Pizza.name.contains(term), Pizza.description.contains(term))
+            for term in terms
+        ]))
+        .subquery()
+    )
+
+
+def ingredient_search_matches(db: Session, search: Optional[str]):
+    """Subquery of ``(ingredient_id, rank)`` for ingredients matching every term"""
+    terms = search_terms(search)
+    if not terms:
+        return None
+    if _uses_fts(db):
+        return _fts_matches("ingredients_fts", terms, "ingredient_id")
+    return (
+        select(Ingredient.id.label("ingredient_id"), literal(0.0).label("rank"))
+        .where(and_(*[Ingredient.name.contains(term) for term in terms]))
+        .subquery()
+    )
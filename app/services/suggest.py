@@ -0,0 +1,222 @@
+"""
+Typeahead suggestions over ingredient and pizza names
+
+Names are folded (lower-case, accents stripped, one space between words)
+and kept in sorted arrays, so a prefix lookup is a binary search followed by
+a walk over at most ``limit`` matches. A name is found by a prefix of the
+whole name ("moz" -> "Mozzarella") and, ranked after those, by a prefix of
+any later word ("moz" -> "Fresh Mozzarella").
+
+ORM commits that add, rename or delete ingredients or pizzas are applied to
+the index in place. Anything else that moves the catalog version (bulk
+imports, writes by other workers) makes the next lookup rebuild it.
+"""
+
+import threading
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app.models.catalog import CatalogVersion
+from app.models.pizza import Pizza, Ingredient
+from app.services.catalog_events import on_catalog_flush
+from app.services.catalog_version import current_catalog_version
+from app.services.search import text_tokens
+
+# Name kinds the index covers, by model
+KINDS = {Ingredient: "ingredient", Pizza: "pizza"}
+
+
+def normalize_name(name: str) -> str:
+    """Folded form of a name or query: accent-free lower-case words separated by one space"""
+    return " ".join(text_tokens(name or ""))
+
+
+def _word_suffixes(key: str) -> List[str]:
+    """The folded name from the start of each word after the first"""
+    return [key[i + 1:] for i, char in enumerate(key) if char == " "]
+
+
+class _PrefixArray:
+    """Sorted ``(key, id)`` pairs supporting prefix scans and in-place updates"""
+
+    def __init__(self, pairs: Iterable[Tuple[str, int]] = ()):
+        self._pairs = sorted(pairs)
+
+    def __len__(self) -> int:
+        return len(self._pairs)
+
+    def add(self, key: str, item_id: int):
+        insort(self._pairs, (key, item_id))
+
+    def remove(self, key: str, item_id: int):
+        position = bisect_left(self._pairs, (key, item_id))
+        if position < len(self._pairs) and self._pairs[position] == (key, item_id):
+            del self._pairs[position]
+
+    def scan(self, prefix: str) -> Iterator[Tuple[str, int]]:
+        """Pairs whose key starts with ``prefix``, in key order"""
+        position = bisect_left(self._pairs, (prefix,))
+        while position < len(self._pairs):
+            pair = self._pairs[position]
+            if not pair[0].startswith(prefix):
+                return
+            yield pair
+            position += 1
+
+
+class _KindIndex:
+    """Whole-name and word prefix arrays for one kind of name"""
+
+    def __init__(self, names: Dict[int, str]):
+        self.names = dict(names)
+        keys = {item_id: normalize_name(name) for item_id, name in self.names.items()}
+        self.starts = _PrefixArray((key, item_id) for item_id, key in keys.items())
+        self.words = _PrefixArray(
+            (suffix, item_id) for item_id, key in keys.items() for suffix in _word_suffixes(key)
+        )
+
+    def set(self, item_id: int, name: str):
+        self.delete(item_id)
+        self.names[item_id] = name
+        key = normalize_name(name)
+        self.starts.add(key, item_id)
+        for suffix in _word_suffixes(key):
+            self.words.add(suffix, item_id)
+
+    def delete(self, item_id: int):
+        name = self.names.pop(item_id, None)
+        if name is None:
+            return
+        key = normalize_name(name)
+        self.starts.remove(key, item_id)
+        for suffix in _word_suffixes(key):
+            self.words.remove(suffix, item_id)
+
+    def matches(self, prefix: str, limit: int) -> List[Tuple[int, str, int]]:
+        """Up to ``limit`` ``(tier, key, id)`` matches; tier 0 matched the name's start"""
+        found: List[Tuple[int, str, int]] = []
+        seen: Set[int] = set()
+        for tier, array in enumerate([self.starts, self.words]):
+            for key, item_id in array.scan(prefix):
+                if len(found) == limit:
+                    return found
+                if item_id not in seen:
+                    seen.add(item_id)
+                    found.append((tier, key, item_id))
+        return found
+
+
+class SuggestionIndex:
+    """Thread-safe prefix index over ingredient and pizza names, tagged with a catalog version"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._kinds: Dict[str, _KindIndex] = {}
+        # Catalog version the index reflects; None until built
+        self.version: Optional[int] = None
+
+    def build(self, names: Dict[str, Dict[int, str]], version: int):
+        """Replace the index with ``{kind: {id: name}}``"""
+        kinds = {kind: _KindIndex(names.get(kind, {})) for kind in KINDS.values()}
+        with self._lock:
+            self._kinds = kinds
+            self.version = version
+
+    def load(self, db: Session):
+        """Rebuild from the database; the version is read first so a concurrent write forces another rebuild"""
+        version = db.execute(select(CatalogVersion.version)).scalar() or 0
+        names: Dict[str, Dict[int, str]] = {}
+        for model, kind in KINDS.items():
+            names[kind] = dict(db.execute(select(model.id, model.name)).all())
+        self.build(names, version)
+
+    def ensure_current(self, db: Session):
+        """Rebuild when the catalog has moved past the version the index reflects"""
+        version = current_catalog_version(db).number
+        if self.version is None or self.version < version:
+            self.load(db)
+
+    def apply(
+        self,
+        changes: List[Tuple[str, int, Optional[str]]],
+        first_version: int,
+        last_version: int
+    ):
+        """
+        Apply ``(kind, id, name)`` changes committed as catalog versions
+        ``first_version`` to ``last_version``; a ``None`` name is a delete.
+        Changes that do not directly follow the indexed version leave a gap,
+        so the index is marked stale instead.
+        """
+        with self._lock:
+            if self.version is None or self.version != first_version - 1:
+                self.version = None
+                return
+            for kind, item_id, name in changes:
+                if name is None:
+                    self._kinds[kind].delete(item_id)
+                else:
+                    self._kinds[kind].set(item_id, name)
+            self.version = last_version
+
+    def suggest(self, query: str, limit: int, kinds: Iterable[str]) -> List[dict]:
+        """Names starting with ``query``, whole-name matches first, then word matches"""
+        prefix = normalize_name(query)
+        if not prefix:
+            return []
+        with self._lock:
+            matches = [
+                (tier, key, kind, item_id, self._kinds[kind].names[item_id])
+                for kind in kinds
+                for tier, key, item_id in self._kinds[kind].matches(prefix, limit)
+            ]
+        matches.sort()
+        return [
+            {"id": item_id, "name": name, "kind": kind}
+            for _, _, kind, item_id, name in matches[:limit]
+        ]
+
+    def clear(self):
+        with self._lock:
+            self._kinds = {}
+            self.version = None
+
+
+suggestion_index = SuggestionIndex()
+
+
+@on_catalog_flush
+def _track_name_changes(session: Session):
+    """Collect name changes of the flush, with the catalog version it was written as"""
+    changes = []
+    for obj in session.new | session.dirty:
+        kind = KINDS.get(type(obj))
+        if kind is not None and (obj in session.new or session.is_modified(obj)):
+            changes.append((kind, obj.id, obj.name))
+    for obj in session.deleted:
+        kind = KINDS.get(type(obj))
+        if kind is not None:
+            changes.append((kind, obj.id, None))
+    if not changes:
+        return
+
+    # Called after this flush bumped the version, so this is the version it wrote
+    version = session.connection().execute(select(CatalogVersion.version)).scalar()
+    pending = session.info.setdefault("suggestion_changes", {"first": version, "changes": []})
+    pending["last"] = version
+    pending["changes"].extend(changes)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_name_changes(session: Session):
+    pending = session.info.pop("suggestion_changes", None)
+    if pending is not None:
+        suggestion_index.apply(pending["changes"], pending["first"], pending["last"])
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_name_changes(session: Session):
+    session.info.pop("suggestion_changes", None)
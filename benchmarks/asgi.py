@@ -0,0 +1,103 @@
+"""
+Minimal in-process ASGI client
+
+Drives the FastAPI app directly, without sockets or extra dependencies, so
+benchmarks measure the application rather than the network stack.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+
+class Response:
+    """Status, headers and body of a completed request"""
+
+    def __init__(self, status: int, headers: List[Tuple[bytes, bytes]], body: bytes):
+        self.status = status
+        self.headers = {key.decode().lower(): value.decode() for key, value in headers}
+        self.body = body
+        self.body_size = len(body)
+
+
+async def request(
+    app,
+    path: str,
+    params: Optional[Dict[str, str]] = None,
+    method: str = "GET",
+    headers: Optional[Dict[str, str]] = None,
+    body: bytes = b"",
+    keep_body: bool = True
+) -> Response:
+    """
+    Send one HTTP request to an ASGI app and collect the response.
+    
+    With ``keep_body=False`` the body chunks are counted and dropped, and
+    ``Response.body`` is empty.
+    """
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": urlencode(params or {}).encode(),
+        "root_path": "",
+        "headers": [
+            (key.lower().encode(), value.encode()) for key, value in (headers or {}).items()
+        ],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    request_sent = False
+    status = 500
+    response_headers = []
+    chunks = []
+    body_size = 0
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        # Nothing more to send; wait until the app finishes
+        await asyncio.Event().wait()
+
+    async def send(message):
+        nonlocal status, response_headers, body_size
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            response_headers = message.get("headers", [])
+        elif message["type"] == "http.response.body":
+            chunk = message.get("body", b"")
+            body_size += len(chunk)
+            if keep_body:
+                chunks.append(chunk)
+
+    await app(scope, receive, send)
+    response = Response(status, response_headers, b"".join(chunks))
+    response.body_size = body_size
+    return response
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """Run the app's startup and shutdown handlers around a block"""
+    receive_queue = asyncio.Queue()
+    send_queue = asyncio.Queue()
+    task = asyncio.create_task(
+        app({"type": "lifespan", "asgi": {"version": "3.0"}}, receive_queue.get, send_queue.put)
+    )
+    await receive_queue.put({"type": "lifespan.startup"})
+    message = await send_queue.get()
+    if message["type"] != "lifespan.startup.complete":
+        raise RuntimeError(f"Application startup failed: {message}")
+    try:
+        yield
+    finally:
+        await receive_queue.put({"type": "lifespan.shutdown"})
+        await send_queue.get()
+        await task
@@ -0,0 +1,112 @@
+"""
+Synthetic catalog generator
+
+Builds reproducible catalogs of any size for benchmarks. Ingredients are
+arranged in layers: pizzas use layer 0, and every ingredient above the
+deepest layer contains one or two ingredients from the layer below, so
+``sub_ingredient_depth`` is the longest sub-ingredient chain. Rows are
+written with bulk Core inserts, so the allergen index and catalog version
+are updated explicitly afterwards.
+"""
+
+import random
+
+from sqlalchemy import insert
+from sqlalchemy.engine import Engine
+from typing import NamedTuple
+
+from app.database.engine import create_database_engine
+from app.models.pizza import Pizza, Ingredient, PizzaIngredient, IngredientIngredient
+from app.services import (
+    bump_catalog_version, rebuild_allergen_index, setup_schema
+)
+
+MENU_WORDS = [
+    "classic", "spicy", "smoked", "fresh", "roasted", "garlic", "chicken",
+    "mushroom", "pepperoni", "margherita", "goat", "cheese", "basil", "olive",
+    "truffle", "pineapple", "ham", "bbq", "veggie", "tomato", "onion", "pesto",
+    "sausage", "bacon", "artichoke", "spinach", "feta", "anchovy", "shrimp",
+]
+
+_INSERT_BATCH = 10_000
+
+
+class CatalogSpec(NamedTuple):
+    """Shape of a synthetic catalog; the same spec always yields the same rows"""
+    pizzas: int = 1_000
+    ingredients: int = 200
+    ingredients_per_pizza: int = 6
+    sub_ingredient_depth: int = 2
+    allergen_ratio: float = 0.15
+    seed: int = 0
+
+
+def _batched(rows: list):
+    for start in range(0, len(rows), _INSERT_BATCH):
+        yield rows[start:start + _INSERT_BATCH]
+
+
+def _catalog_rows(spec: CatalogSpec):
+    rng = random.Random(spec.seed)
+    layers = spec.sub_ingredient_depth + 1
+    if spec.ingredients < layers:
+        raise ValueError("Need at least one ingredient per sub-ingredient layer")
+
+    ingredients = [
+        {
+            "id": i + 1,
+            "name": f"{rng.choice(MENU_WORDS).title()} {i + 1}",
+            "is_allergen": rng.random() < spec.allergen_ratio,
+        }
+        for i in range(spec.ingredients)
+    ]
+    # Ingredient i belongs to layer i % layers
+    layer_ids = [[row["id"] for row in ingredients[layer::layers]] for layer in range(layers)]
+
+    ingredient_links = []
+    for layer in range(layers - 1):
+        for parent_id in layer_ids[layer]:
+            children = layer_ids[layer + 1]
+            for child_id in rng.sample(children, min(len(children), rng.randint(1, 2))):
+                ingredient_links.append(
+                    {"parent_ingredient_id": parent_id, "child_ingredient_id": child_id}
+                )
+
+    pizzas = []
+    pizza_links = []
+    top_layer = layer_ids[0]
+    for i in range(spec.pizzas):
+        pizza_id = i + 1
+        pizzas.append({
+            "id": pizza_id,
+            "name": " ".join(rng.sample(MENU_WORDS, 2)).title() + f" {pizza_id}",
+            "description": "A " + " ".join(rng.sample(MENU_WORDS, 4)) + " pizza",
+        })
+        for ingredient_id in rng.sample(top_layer, min(len(top_layer), spec.ingredients_per_pizza)):
+            pizza_links.append({"pizza_id": pizza_id, "ingredient_id": ingredient_id})
+    return ingredients, ingredient_links, pizzas, pizza_links
+
+
+def populate_catalog(engine: Engine, spec: CatalogSpec):
+    """Create the schema on an empty database and fill it according to ``spec``"""
+    setup_schema(engine)
+
+    ingredients, ingredient_links, pizzas, pizza_links = _catalog_rows(spec)
+    with engine.begin() as connection:
+        for model, rows in [
+            (Ingredient, ingredients),
+            (IngredientIngredient, ingredient_links),
+            (Pizza, pizzas),
+            (PizzaIngredient, pizza_links),
+        ]:
+            for batch in _batched(rows):
+                connection.execute(insert(model), batch)
+        rebuild_allergen_index(connection)
+        bump_catalog_version(connection)
+
+
+def build_catalog(path: str, spec: CatalogSpec, pool_size: int = 5) -> Engine:
+    """New SQLite database file at ``path`` holding the catalog described by ``spec``"""
+    engine = create_database_engine(f"sqlite:///{path}", pool_size=pool_size, max_overflow=0)
+    populate_catalog(engine, spec)
+    return engine
@@ -0,0 +1,98 @@
+"""
+Request coalescing benchmark
+
+Replays a lunchtime spike: bursts of identical ``GET /pizzas`` requests
+arrive together right after a catalog change has emptied the response
+cache. Each burst runs with single-flight coalescing off (every request runs
+the queries and serialization itself) and on (one request computes, the rest
+wait for its body), and reports latency, burst duration, throughput and SQL
+statements per request.
+
+Run: python -m benchmarks.coalescing_benchmark
+"""
+
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import event
+
+from app.database.connection import get_session_router
+from app.database.routing import SessionRouter
+from app.services import response_cache
+from benchmarks.asgi import lifespan, request
+from benchmarks.catalog import CatalogSpec, build_catalog
+from main import app
+
+SPEC = CatalogSpec(pizzas=20_000)
+CLIENTS = [8, 64]
+BURSTS = 5
+PARAMS = {"allergen_filter": "cheese", "limit": "100"}
+
+
+async def _burst(clients: int, latencies: list) -> float:
+    """Send ``clients`` identical requests at once; seconds until the last one finished"""
+    # A catalog change empties the cache right before the spike
+    response_cache.clear()
+
+    async def client():
+        start = time.perf_counter()
+        response = await request(app, "/pizzas/", PARAMS, keep_body=False)
+        latencies.append((time.perf_counter() - start) * 1000)
+        assert response.status == 200, response.status
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return time.perf_counter() - start
+
+
+async def _run(counter: list):
+    print(f"{'coalesce':<9} {'clients':>7} {'p50 ms':>8} {'p99 ms':>8} {'burst ms':>9} "
+          f"{'req/s':>8} {'queries':>8} {'coalesced':>10}")
+    async with lifespan(app):
+        # Warm up imports, connections and SQLite's page cache
+        await _burst(4, [])
+        for clients in CLIENTS:
+            for coalesce in [False, True]:
+                response_cache.coalesce = coalesce
+                latencies: list = []
+                coalesced = response_cache.coalesced
+                counter[0] = 0
+                seconds = [await _burst(clients, latencies) for _ in range(BURSTS)]
+                latencies.sort()
+                requests = clients * BURSTS
+                print(
+                    f"{'on' if coalesce else 'off':<9} {clients:>7} "
+                    f"{statistics.median(latencies):>8.1f} "
+                    f"{latencies[int(len(latencies) * 0.99) - 1]:>8.1f} "
+                    f"{statistics.median(seconds) * 1000:>9.1f} "
+                    f"{requests / sum(seconds):>8.1f} "
+                    f"{counter[0] / requests:>8.2f} "
+                    f"{response_cache.coalesced - coalesced:>10}"
+                )
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_catalog(
+            os.path.join(tmp, "catalog.db"), SPEC, pool_size=max(CLIENTS) + 1
+        )
+        router = SessionRouter(engine)
+        app.dependency_overrides[get_session_router] = lambda: router
+        counter = [0]
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def count(*args):
+            counter[0] += 1
+
+        try:
+            asyncio.run(_run(counter))
+        finally:
+            app.dependency_overrides.clear()
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Response compression benchmark
+
+For the largest catalog responses, reports the identity and gzip body
+sizes, and the latency of gzip requests when the compressed bytes come from
+the response cache versus when every request serializes and compresses
+(response cache disabled).
+
+Run: python -m benchmarks.compression_benchmark
+"""
+
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+from app.database.connection import get_session_router
+from app.database.routing import SessionRouter
+from app.services import response_cache
+from benchmarks.asgi import request
+from benchmarks.catalog import CatalogSpec, build_catalog
+from main import app
+
+SPEC = CatalogSpec(pizzas=5_000)
+ENDPOINTS = [
+    ("/pizzas/", {"limit": "500"}),
+    ("/pizzas/", {"limit": "100", "depth": "2"}),
+    ("/ingredients/", {}),
+]
+REQUESTS = 50
+
+
+async def _median_ms(path: str, params: dict, encoding: str) -> float:
+    timings = []
+    for _ in range(REQUESTS):
+        start = time.perf_counter()
+        await request(app, path, params, headers={"Accept-Encoding": encoding})
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+async def _run():
+    print(f"{'endpoint':<40} {'identity KiB':>12} {'gzip KiB':>9} {'cached ms':>10} {'uncached ms':>12}")
+    max_entries = response_cache.max_entries
+    for path, params in ENDPOINTS:
+        identity = await request(app, path, params, headers={"Accept-Encoding": "identity"})
+        compressed = await request(app, path, params, headers={"Accept-Encoding": "gzip"})
+        cached = await _median_ms(path, params, "gzip")
+        response_cache.max_entries = 0
+        try:
+            uncached = await _median_ms(path, params, "gzip")
+        finally:
+            response_cache.max_entries = max_entries
+        name = path + "?" + "&".join(f"{key}={value}" for key, value in params.items())
+        print(
+            f"{name:<40} {len(identity.body) / 1024:>12.1f} {len(compressed.body) / 1024:>9.1f} "
+            f"{cached:>10.2f} {uncached:>12.2f}"
+        )
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_catalog(os.path.join(tmp, "catalog.db"), SPEC)
+        router = SessionRouter(engine)
+        app.dependency_overrides[get_session_router] = lambda: router
+        try:
+            asyncio.run(_run())
+        finally:
+            app.dependency_overrides.clear()
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Concurrency benchmark
+
+Measures GET /pizzas throughput as the number of concurrent clients grows,
+together with the latency of the database-free GET / endpoint served while
+that load is running (including the time the probe waited for the event
+loop). The same routes are also mounted as ``async def`` wrappers,
+reproducing handlers that query the database on the event loop, to show how
+blocking stalls unrelated requests. Throughput gains from the threadpool
+require more than one CPU core: SQLite releases the GIL while it executes.
+
+Run: python -m benchmarks.concurrency_benchmark
+"""
+
+import asyncio
+import functools
+import os
+import statistics
+import tempfile
+import time
+
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database.base import Base
+from app.database.connection import get_session_router
+from app.database.routing import SessionRouter
+from app.models.pizza import Pizza, Ingredient
+from app.services import ensure_search_index
+from benchmarks.asgi import lifespan, request
+from main import app
+
+PIZZAS = 2_000
+INGREDIENTS_PER_PIZZA = 6
+CONCURRENCY_LEVELS = [1, 4, 16, 32]
+REQUESTS_PER_LEVEL = 128
+LOAD_PARAMS = {"limit": "20", "search": "pizza", "ingredient_filter": "ingredient 1"}
+PROBE_INTERVAL = 0.005
+
+
+def _build_catalog(path: str):
+    engine = create_engine(
+        f"sqlite:///{path}",
+        connect_args={"check_same_thread": False},
+        # One connection per client so the pool never becomes the bottleneck
+        pool_size=max(CONCURRENCY_LEVELS) + 1,
+        max_overflow=0
+    )
+    Base.metadata.create_all(bind=engine)
+    ensure_search_index(engine)
+    db = sessionmaker(bind=engine)()
+    ingredients = [
+        Ingredient(name=f"Ingredient {i}", is_allergen=(i % 5 == 0)) for i in range(200)
+    ]
+    for i in range(PIZZAS):
+        db.add(Pizza(
+            name=f"Pizza {i:05d}",
+            description=f"Benchmark pizza number {i}",
+            ingredients=[ingredients[(i + j * 7) % 200] for j in range(INGREDIENTS_PER_PIZZA)]
+        ))
+    db.commit()
+    db.close()
+    return engine
+
+
+def _blocking_app(source: FastAPI) -> FastAPI:
+    """Copy of the app whose handlers run synchronously on the event loop"""
+    blocking = FastAPI(lifespan=source.router.lifespan_context)
+    for route in source.routes:
+        if not isinstance(route, APIRoute):
+            continue
+        endpoint = route.endpoint
+
+        @functools.wraps(endpoint)
+        async def wrapper(*args, __endpoint=endpoint, **kwargs):
+            result = __endpoint(*args, **kwargs)
+            return await result if asyncio.iscoroutine(result) else result
+
+        blocking.add_api_route(
+            route.path,
+            wrapper,
+            methods=list(route.methods),
+            response_model=route.response_model,
+            response_model_exclude_unset=route.response_model_exclude_unset,
+        )
+    return blocking
+
+
+async def _run_level(target, concurrency: int):
+    remaining = REQUESTS_PER_LEVEL
+    probe_latencies = []
+    done = asyncio.Event()
+
+    async def client():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            response = await request(target, "/pizzas/", LOAD_PARAMS)
+            assert response.status == 200, response.body
+
+    async def probe():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(PROBE_INTERVAL)
+            await request(target, "/")
+            elapsed = time.perf_counter() - start - PROBE_INTERVAL
+            probe_latencies.append(elapsed * 1000)
+
+    probe_task = asyncio.create_task(probe())
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await probe_task
+
+    probe_latencies.sort()
+    p99 = probe_latencies[min(len(probe_latencies) - 1, int(len(probe_latencies) * 0.99))]
+    return REQUESTS_PER_LEVEL / elapsed, statistics.median(probe_latencies), p99
+
+
+async def _benchmark(label: str, target):
+    async with lifespan(target):
+        for concurrency in CONCURRENCY_LEVELS:
+            throughput, probe_p50, probe_p99 = await _run_level(target, concurrency)
+            print(
+                f"{label:<10} {concurrency:>7} {throughput:>10.1f} "
+                f"{probe_p50:>12.2f} {probe_p99:>12.2f}"
+            )
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = _build_catalog(os.path.join(tmp, "catalog.db"))
+        router = SessionRouter(engine)
+
+        blocking = _blocking_app(app)
+        app.dependency_overrides[get_session_router] = lambda: router
+        blocking.dependency_overrides[get_session_router] = lambda: router
+
+        print(f"{'handlers':<10} {'clients':>7} {'req/s':>10} {'GET / p50':>12} {'GET / p99':>12}")
+        asyncio.run(_benchmark("threadpool", app))
+        asyncio.run(_benchmark("blocking", blocking))
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Menu export benchmark
+
+Exports catalogs of increasing size through ``GET /pizzas/export``, with
+and without gzip, and reports throughput, body size and the peak Python
+memory allocated while streaming (tracemalloc). For comparison, the same
+menu is fetched by walking ``GET /pizzas`` page by page and keeping every
+page, as partners did before the export existed.
+
+Run: python -m benchmarks.export_benchmark
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from app.database.connection import get_session_router
+from app.database.routing import SessionRouter
+from app.routers.pizza import MAX_PAGE_SIZE
+from app.services import response_cache
+from benchmarks.asgi import request
+from benchmarks.catalog import CatalogSpec, build_catalog
+from main import app
+
+SIZES = [2_000, 10_000, 40_000]
+
+
+async def _export(encoding: str):
+    response = await request(
+        app, "/pizzas/export", headers={"Accept-Encoding": encoding}, keep_body=False
+    )
+    return response.body_size
+
+
+async def _paginate():
+    pages = []
+    params = {"sort_by": "id", "limit": str(MAX_PAGE_SIZE)}
+    while True:
+        response = await request(app, "/pizzas/", params)
+        page = json.loads(response.body)
+        pages.append(page)
+        if page["next_cursor"] is None:
+            return sum(len(json.dumps(page)) for page in pages)
+        params["cursor"] = page["next_cursor"]
+
+
+def _measure(run, pizzas: int):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = asyncio.run(run)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return pizzas / seconds, size, peak
+
+
+def main():
+    response_cache.max_entries = 0
+    print(f"{'pizzas':>7} {'method':<16} {'pizzas/s':>9} {'body MiB':>9} {'peak MiB':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for pizzas in SIZES:
+            engine = build_catalog(os.path.join(tmp, f"catalog-{pizzas}.db"), CatalogSpec(pizzas=pizzas))
+            router = SessionRouter(engine)
+            app.dependency_overrides[get_session_router] = lambda: router
+            try:
+                for label, run in [
+                    ("export", lambda: _export("identity")),
+                    ("export gzip", lambda: _export("gzip")),
+                    ("paginated list", _paginate),
+                ]:
+                    rate, size, peak = _measure(run(), pizzas)
+                    print(f"{pizzas:>7} {label:<16} {rate:>9,.0f} {size / 2**20:>9.1f} {peak / 2**20:>9.1f}")
+            finally:
+                app.dependency_overrides.clear()
+                engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
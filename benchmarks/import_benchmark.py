@@ -0,0 +1,103 @@
+"""
+Bulk import benchmark
+
+Writes a JSON Lines catalog with one million pizza-ingredient links
+(100k pizzas x 10 ingredients) and imports it into an empty database, then
+imports it again to time the upsert path. For comparison, the row-by-row ORM
+approach the seed script used to take is timed on a small slice.
+
+Run: python -m benchmarks.import_benchmark
+"""
+
+import json
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.pizza import Pizza, Ingredient, PizzaIngredient
+from app.services import setup_schema
+from app.services.catalog_import import import_ingredients, import_pizzas, read_records
+
+PIZZAS = 100_000
+INGREDIENTS = 2_000
+INGREDIENTS_PER_PIZZA = 10
+ROW_BY_ROW_PIZZAS = 1_000
+
+
+def _write_catalog(directory: str):
+    rng = random.Random(0)
+    names = [f"Ingredient {i}" for i in range(INGREDIENTS)]
+    ingredients_path = os.path.join(directory, "ingredients.jsonl")
+    with open(ingredients_path, "w") as f:
+        for i, name in enumerate(names):
+            # A quarter of the ingredients are composites of two later ones
+            sub_ingredients = rng.sample(names[i + 1:], 2) if i % 4 == 0 and i < INGREDIENTS - 2 else []
+            f.write(json.dumps({
+                "name": name, "is_allergen": rng.random() < 0.1, "sub_ingredients": sub_ingredients
+            }) + "\n")
+
+    pizzas_path = os.path.join(directory, "pizzas.jsonl")
+    with open(pizzas_path, "w") as f:
+        for i in range(PIZZAS):
+            f.write(json.dumps({
+                "name": f"Pizza {i}",
+                "description": f"Synthetic pizza number {i}",
+                "ingredients": rng.sample(names, INGREDIENTS_PER_PIZZA),
+            }) + "\n")
+    return ingredients_path, pizzas_path
+
+
+def _empty_database(path: str):
+    engine = create_engine(f"sqlite:///{path}")
+    setup_schema(engine)
+    return engine
+
+
+def _row_by_row(engine, pizzas_path: str) -> float:
+    """The old seed loop: one lookup per ingredient name and a flush per pizza"""
+    db = sessionmaker(bind=engine)()
+    rows = 0
+    start = time.perf_counter()
+    for i, record in enumerate(read_records(pizzas_path)):
+        if i == ROW_BY_ROW_PIZZAS:
+            break
+        pizza = Pizza(name=record["name"], description=record["description"])
+        db.add(pizza)
+        db.flush()
+        rows += 1
+        for name in record["ingredients"]:
+            ingredient = db.query(Ingredient).filter(Ingredient.name == name).first()
+            if ingredient:
+                db.add(PizzaIngredient(pizza_id=pizza.id, ingredient_id=ingredient.id))
+                rows += 1
+    db.commit()
+    db.close()
+    return rows / (time.perf_counter() - start)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        ingredients_path, pizzas_path = _write_catalog(tmp)
+        print(f"wrote input files in {time.perf_counter() - start:.1f}s")
+
+        engine = _empty_database(os.path.join(tmp, "bulk.db"))
+        for label in ["initial import", "re-import (upsert)"]:
+            print(label)
+            print("  ", import_ingredients(engine, read_records(ingredients_path)))
+            print("  ", import_pizzas(engine, read_records(pizzas_path)))
+        engine.dispose()
+
+        engine = _empty_database(os.path.join(tmp, "row_by_row.db"))
+        import_ingredients(engine, read_records(ingredients_path))
+        rate = _row_by_row(engine, pizzas_path)
+        print(f"row-by-row ORM ({ROW_BY_ROW_PIZZAS} pizzas): {rate:,.0f} rows/s")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+Load benchmark
+
+Generates a synthetic catalog, drives the FastAPI app in-process across the
+search / filter / sort matrix of GET /pizzas plus the detail and ingredient
+endpoints, and reports per scenario:
+
+- p50 / p99 latency and throughput at the given client concurrency
+- SQL statements per request
+- peak Python memory allocated while serving one request (tracemalloc)
+
+The response cache and request coalescing are disabled unless ``--cache``
+is given, so every request exercises the query path; ``--snapshot`` serves
+the catalog from the in-memory snapshot instead of SQL. Results can be saved
+with ``--json`` and compared against a run from another commit with
+``--compare``.
+
+Run: python -m benchmarks.load_benchmark --pizzas 10000 --json before.json
+     python -m benchmarks.load_benchmark --pizzas 10000 --compare before.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+from sqlalchemy import event
+from typing import Dict, List, NamedTuple, Optional
+
+from app.database.connection import get_session_router
+from app.database.routing import SessionRouter
+from app.services import response_cache
+from app.services.catalog_snapshot import catalog_snapshot
+from benchmarks.asgi import lifespan, request
+from benchmarks.catalog import CatalogSpec, build_catalog
+from main import app
+
+SEARCHES = [None, "spicy", "garlic chicken"]
+FILTERS = {
+    "none": {},
+    "ingredient": {"ingredient_filter": "cheese"},
+    "allergen": {"allergen_filter": "ham"},
+    "exclude": {"exclude_allergen": "bacon", "exclude_ingredient": "olive"},
+}
+SORTS = ["id", "name", "relevance", "-allergen_free,ingredient_count"]
+PAGE_SIZE = "20"
+
+
+class Scenario(NamedTuple):
+    name: str
+    path: str
+    params: Dict[str, str]
+
+
+class Result(NamedTuple):
+    scenario: str
+    p50_ms: float
+    p99_ms: float
+    throughput: float
+    queries: float
+    peak_kib: float
+
+
+def scenarios(pizza_count: int) -> List[Scenario]:
+    """Every endpoint and parameter combination the benchmark covers"""
+    matrix = []
+    for search in SEARCHES:
+        for filter_name, filter_params in FILTERS.items():
+            for sort_by in SORTS:
+                if sort_by == "relevance" and search is None:
+                    continue
+                params = {"sort_by": sort_by, "limit": PAGE_SIZE, **filter_params}
+                if search:
+                    params["search"] = search
+                name = f"pizzas search={search or '-'} filter={filter_name} sort={sort_by}"
+                matrix.append(Scenario(name, "/pizzas/", params))
+    matrix.append(Scenario("pizza facets", "/pizzas/facets", {}))
+    matrix.append(Scenario("pizza facets search=spicy", "/pizzas/facets", {"search": "spicy"}))
+    matrix.append(Scenario("pizza detail", f"/pizzas/{max(1, pizza_count // 2)}", {}))
+    matrix.append(Scenario("ingredients", "/ingredients/", {}))
+    matrix.append(Scenario("ingredients search=cheese", "/ingredients/", {"search": "cheese"}))
+    return matrix
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * fraction))
+    return sorted_values[index]
+
+
+async def _run_scenario(scenario: Scenario, requests: int, concurrency: int, counter) -> Result:
+    # Untimed request under tracemalloc; also warms up the code path
+    tracemalloc.start()
+    response = await request(app, scenario.path, scenario.params)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert response.status == 200, (scenario.name, response.body)
+
+    remaining = requests
+    latencies = []
+
+    async def client():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            response = await request(app, scenario.path, scenario.params)
+            latencies.append((time.perf_counter() - start) * 1000)
+            assert response.status == 200, (scenario.name, response.body)
+
+    counter.reset()
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return Result(
+        scenario.name,
+        _percentile(latencies, 0.5),
+        _percentile(latencies, 0.99),
+        requests / elapsed,
+        counter.count / requests,
+        peak / 1024
+    )
+
+
+async def _run(matrix: List[Scenario], requests: int, concurrency: int, counter) -> List[Result]:
+    async with lifespan(app):
+        return [
+            await _run_scenario(scenario, requests, concurrency, counter)
+            for scenario in matrix
+        ]
+
+
+class _StatementCounter:
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+    def reset(self):
+        self.count = 0
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _change(current: float, baseline: Optional[float]) -> str:
+    if not baseline:
+        return ""
+    return f"{(current - baseline) / baseline * 100:+.0f}%"
+
+
+def _print_results(results: List[Result], baseline: Dict[str, dict]):
+    width = max(len(result.scenario) for result in results)
+    header = f"{'scenario':<{width}} {'p50 ms':>8} {'p99 ms':>8} {'req/s':>8} {'queries':>8} {'peak KiB':>9}"
+    if baseline:
+        header += f" {'p50':>6} {'p99':>6} {'req/s':>6}"
+    print(header)
+    for result in results:
+        line = (
+            f"{result.scenario:<{width}} {result.p50_ms:>8.2f} {result.p99_ms:>8.2f} "
+            f"{result.throughput:>8.1f} {result.queries:>8.1f} {result.peak_kib:>9.0f}"
+        )
+        previous = baseline.get(result.scenario)
+        if previous:
+            line += (
+                f" {_change(result.p50_ms, previous['p50_ms']):>6}"
+                f" {_change(result.p99_ms, previous['p99_ms']):>6}"
+                f" {_change(result.throughput, previous['throughput']):>6}"
+            )
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    defaults = CatalogSpec()
+    parser.add_argument("--pizzas", type=int, default=defaults.pizzas)
+    parser.add_argument("--ingredients", type=int, default=defaults.ingredients)
+    parser.add_argument("--ingredients-per-pizza", type=int, default=defaults.ingredients_per_pizza)
+    parser.add_argument("--depth", type=int, default=defaults.sub_ingredient_depth,
+                        help="sub-ingredient depth of the generated catalog")
+    parser.add_argument("--allergen-ratio", type=float, default=defaults.allergen_ratio)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--requests", type=int, default=50, help="timed requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--cache", action="store_true", help="keep the response cache and request coalescing enabled")
+    parser.add_argument("--snapshot", action="store_true", help="serve reads from the in-memory catalog snapshot")
+    parser.add_argument("--json", metavar="PATH", help="write results to a JSON file")
+    parser.add_argument("--compare", metavar="PATH", help="show changes against a saved run")
+    args = parser.parse_args()
+
+    spec = CatalogSpec(
+        pizzas=args.pizzas,
+        ingredients=args.ingredients,
+        ingredients_per_pizza=args.ingredients_per_pizza,
+        sub_ingredient_depth=args.depth,
+        allergen_ratio=args.allergen_ratio,
+        seed=args.seed
+    )
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = {result["scenario"]: result for result in json.load(f)["results"]}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        engine = build_catalog(
+            os.path.join(tmp, "catalog.db"), spec, pool_size=args.concurrency + 1
+        )
+        print(f"catalog {spec} built in {time.perf_counter() - start:.1f}s")
+        router = SessionRouter(engine)
+        app.dependency_overrides[get_session_router] = lambda: router
+        if not args.cache:
+            response_cache.max_entries = 0
+            response_cache.coalesce = False
+        catalog_snapshot.enabled = args.snapshot
+        counter = _StatementCounter(engine)
+        try:
+            results = asyncio.run(
+                _run(scenarios(spec.pizzas), args.requests, args.concurrency, counter)
+            )
+        finally:
+            app.dependency_overrides.clear()
+            engine.dispose()
+
+    _print_results(results, baseline)
+    # ru_maxrss is reported in KiB on Linux
+    max_rss_mib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"peak RSS {max_rss_mib:.0f} MiB")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "commit": _git_commit(),
+                "catalog": spec._asdict(),
+                "requests": args.requests,
+                "concurrency": args.concurrency,
+                "cache": args.cache,
+                "snapshot": args.snapshot,
+                "max_rss_mib": max_rss_mib,
+                "results": [result._asdict() for result in results],
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
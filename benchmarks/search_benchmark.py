@@ -0,0 +1,103 @@
+"""
+Search latency benchmark
+
+Compares the old ``LIKE '%term%'`` search with the FTS5 index as the
+catalog grows to 100k pizzas. Each search fetches what GET /pizzas needs:
+the match count and the first page of 20 ids.
+
+Run: python -m benchmarks.search_benchmark
+"""
+
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database.base import Base
+from app.models.pizza import Pizza
+from app.services.search import ensure_search_index, pizza_search_matches
+
+CATALOG_SIZES = [1_000, 10_000, 100_000]
+QUERIES = ["margherita", "spicy chicken", "mush", "zubeko", "tavira lomeno"]
+PAGE_SIZE = 20
+REPEAT = 20
+
+MENU_WORDS = [
+    "classic", "spicy", "smoked", "fresh", "roasted", "garlic", "chicken",
+    "mushroom", "pepperoni", "margherita", "goat", "cheese", "basil", "olive",
+    "truffle", "pineapple", "ham", "bbq", "veggie", "tomato", "onion", "pesto",
+    "sausage", "bacon", "artichoke", "spinach", "feta", "anchovy", "shrimp",
+]
+
+
+def _vocabulary(size: int = 5000):
+    """Deterministic pronounceable filler words for descriptions"""
+    rng = random.Random(0)
+    consonants, vowels = "bdfgklmnprstvz", "aeiou"
+    words = {"zubeko", "tavira", "lomeno"}
+    while len(words) < size:
+        words.add("".join(rng.choice(consonants) + rng.choice(vowels) for _ in range(3)))
+    return sorted(words)
+
+
+def _build_catalog(path: str, size: int):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    ensure_search_index(engine)
+    rng = random.Random(size)
+    vocabulary = _vocabulary()
+    rows = [
+        {
+            "name": " ".join(rng.sample(MENU_WORDS, 2)).title() + f" {i}",
+            "description": " ".join(rng.sample(MENU_WORDS, 3) + rng.sample(vocabulary, 6)),
+        }
+        for i in range(size)
+    ]
+    with engine.begin() as connection:
+        connection.execute(insert(Pizza), rows)
+    return engine
+
+
+def _like_search(db, search):
+    query = db.query(Pizza.id).filter(
+        Pizza.name.contains(search) | Pizza.description.contains(search)
+    )
+    return query.count(), query.order_by(Pizza.name).limit(PAGE_SIZE).all()
+
+
+def _fts_search(db, search):
+    matches = pizza_search_matches(db, search)
+    query = db.query(Pizza.id).join(matches, matches.c.pizza_id == Pizza.id)
+    return query.count(), query.order_by(matches.c.rank).limit(PAGE_SIZE).all()
+
+
+def _median_ms(search_fn, db, search):
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        search_fn(db, search)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    print(f"{'pizzas':>8} {'query':<20} {'LIKE ms':>9} {'FTS5 ms':>9} {'hits':>6}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in CATALOG_SIZES:
+            engine = _build_catalog(os.path.join(tmp, f"catalog_{size}.db"), size)
+            db = sessionmaker(bind=engine)()
+            for search in QUERIES:
+                like_ms = _median_ms(_like_search, db, search)
+                fts_ms = _median_ms(_fts_search, db, search)
+                hits = _fts_search(db, search)[0]
+                print(f"{size:>8} {search:<20} {like_ms:>9.2f} {fts_ms:>9.2f} {hits:>6}")
+            db.close()
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
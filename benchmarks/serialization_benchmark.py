@@ -0,0 +1,128 @@
+"""
+Response serialization benchmark
+
+Times turning one page of pizza response data into JSON bytes three ways:
+
+- ``response_model``: what FastAPI did for handlers that returned models:
+  build ``PizzaResponse`` objects, dump them, validate the dump again against
+  ``response_model``, run ``jsonable_encoder`` and ``json.dumps``
+- ``validated``: build the models once and call ``model_dump_json``
+- ``direct``: write the schema-shaped dicts with ``dump_json``
+
+Building the dicts from ORM rows is shared by every path and reported
+separately.
+
+Run: python -m benchmarks.serialization_benchmark
+"""
+
+import json
+import statistics
+import time
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database.base import Base
+from app.models.pizza import Pizza, Ingredient
+from app.routers.pizza import _build_pizza_responses, _pizza_load_options, OPTIONAL_FIELDS
+from app.schemas.pizza import PizzaResponse, PizzaListResponse
+from app.schemas.serialization import dump_json
+
+PAGE_SIZES = [20, 100, 500]
+INGREDIENTS_PER_PIZZA = 6
+SUB_INGREDIENTS = 2
+REPEAT = 30
+
+
+def _build_catalog(db, size: int):
+    ingredients = []
+    for i in range(60):
+        ingredient = Ingredient(name=f"Ingredient {i}", is_allergen=i % 7 == 0)
+        ingredients.append(ingredient)
+    for i, ingredient in enumerate(ingredients[:20]):
+        ingredient.sub_ingredients = [
+            ingredients[20 + (i + j) % 40] for j in range(SUB_INGREDIENTS)
+        ]
+    for i in range(size):
+        db.add(Pizza(
+            name=f"Pizza {i}",
+            description=f"A synthetic pizza number {i} with a short description",
+            ingredients=[
+                ingredients[(i + j * 7) % 60] for j in range(INGREDIENTS_PER_PIZZA)
+            ]
+        ))
+    db.commit()
+
+
+def _response_model(data: dict) -> bytes:
+    page = PizzaListResponse(
+        pizzas=[PizzaResponse(**pizza) for pizza in data["pizzas"]],
+        total=data["total"],
+        next_cursor=data["next_cursor"]
+    )
+    content = PizzaListResponse.model_validate(page.model_dump(exclude_unset=True))
+    return json.dumps(jsonable_encoder(content, exclude_unset=True)).encode()
+
+
+def _validated(data: dict) -> bytes:
+    return PizzaListResponse(
+        pizzas=[PizzaResponse(**pizza) for pizza in data["pizzas"]],
+        total=data["total"],
+        next_cursor=data["next_cursor"]
+    ).model_dump_json(exclude_unset=True).encode()
+
+
+def _direct(data: dict) -> bytes:
+    return dump_json(data)
+
+
+def _median_us(fn, *args) -> float:
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn(*args)
+        timings.append((time.perf_counter() - start) * 1_000_000)
+    return statistics.median(timings)
+
+
+def main():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    _build_catalog(db, max(PAGE_SIZES))
+
+    print(f"{'page':>6} {'path':<16} {'total us':>10} {'us/pizza':>10} {'bytes':>8}")
+    for size in PAGE_SIZES:
+        db.expunge_all()
+        pizzas = (
+            db.query(Pizza).options(*_pizza_load_options(OPTIONAL_FIELDS))
+            .order_by(Pizza.id).limit(size).all()
+        )
+        build = lambda: {
+            "pizzas": _build_pizza_responses(db, pizzas),
+            "total": size,
+            "next_cursor": None
+        }
+        data = build()
+        assert json.loads(_direct(data)) == json.loads(_response_model(data))
+
+        rows = [("build dicts", _median_us(build))]
+        for name, fn in [
+            ("response_model", _response_model),
+            ("validated", _validated),
+            ("direct", _direct),
+        ]:
+            rows.append((name, _median_us(fn, data)))
+        body = len(_direct(data))
+        for name, us in rows:
+            print(f"{size:>6} {name:<16} {us:>10.0f} {us / size:>10.1f} {body:>8}")
+    db.close()
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
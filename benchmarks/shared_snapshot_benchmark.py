@@ -0,0 +1,144 @@
+"""
+Shared snapshot benchmark
+
+Starts ``uvicorn main:app --workers N`` in snapshot mode, where each worker
+loads its own copy of the catalog, and in shared mode, where every worker
+maps the same image file from ``PIZZA_SNAPSHOT_DIR``. Once every worker has
+its snapshot, reports the workers' summed RSS and PSS (proportional set
+size, which splits shared pages between the processes mapping them) and the
+throughput of concurrent detail and filter requests. The response cache is
+off so every request reads the snapshot.
+
+Linux only: memory is read from /proc/<pid>/smaps_rollup.
+
+Run: python -m benchmarks.shared_snapshot_benchmark
+"""
+
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.catalog import CatalogSpec, build_catalog
+
+SPEC = CatalogSpec(pizzas=100_000)
+WORKER_COUNTS = [2, 4]
+CLIENTS = 16
+REQUESTS = 2_000
+TIMEOUT = 120.0
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _children(pid: int) -> list:
+    children = []
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat") as f:
+                # The parent pid follows the parenthesised command name
+                parent = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if parent == pid:
+            children.append(int(name))
+    return children
+
+
+def _memory_kib(pid: int) -> tuple:
+    """(RSS, PSS) of a process in KiB"""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Pss"):
+                values[key] = int(rest.split()[0])
+    return values["Rss"], values["Pss"]
+
+
+def _get(url: str):
+    with urllib.request.urlopen(url, timeout=TIMEOUT) as response:
+        response.read()
+        assert response.status == 200, response.status
+
+
+def _urls(port: int) -> list:
+    base = f"http://127.0.0.1:{port}"
+    urls = []
+    for i in range(REQUESTS):
+        if i % 2:
+            urls.append(f"{base}/pizzas/{i * 7919 % SPEC.pizzas + 1}?depth=1")
+        else:
+            urls.append(f"{base}/pizzas/?allergen_filter=cheese&search=classic&limit=20&depth=0")
+    return urls
+
+
+def _serve(env: dict, workers: int):
+    """Summed worker RSS and PSS in MiB and requests per second"""
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        start = time.perf_counter()
+        while True:
+            if time.perf_counter() - start > TIMEOUT:
+                raise RuntimeError("Server did not answer in time")
+            try:
+                _get(f"http://127.0.0.1:{port}/pizzas/?limit=1")
+                break
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.05)
+
+        urls = _urls(port)
+        with ThreadPoolExecutor(CLIENTS) as pool:
+            # Warm up until every worker has loaded or mapped its snapshot
+            list(pool.map(_get, urls[:workers * 50]))
+            start = time.perf_counter()
+            list(pool.map(_get, urls))
+            throughput = len(urls) / (time.perf_counter() - start)
+
+        rss = pss = 0
+        for pid in _children(server.pid):
+            worker_rss, worker_pss = _memory_kib(pid)
+            rss += worker_rss
+            pss += worker_pss
+        return rss / 1024, pss / 1024, throughput
+    finally:
+        server.terminate()
+        server.wait(TIMEOUT)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "catalog.db")
+        build_catalog(path, SPEC).dispose()
+        base_env = dict(
+            os.environ,
+            PIZZA_DATABASE_URL=f"sqlite:///{path}",
+            PIZZA_SNAPSHOT_DIR=os.path.join(tmp, "snapshots"),
+            PIZZA_CACHE_MAX_ENTRIES="0",
+        )
+
+        print(f"{'mode':<9} {'workers':>7} {'RSS MiB':>9} {'PSS MiB':>9} {'req/s':>8}")
+        for workers in WORKER_COUNTS:
+            for mode in ["snapshot", "shared"]:
+                env = dict(base_env, PIZZA_CATALOG_MODE=mode)
+                rss, pss, throughput = _serve(env, workers)
+                print(f"{mode:<9} {workers:>7} {rss:>9.1f} {pss:>9.1f} {throughput:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+SQLite tuning benchmark
+
+Measures GET /pizzas read throughput and latency while a writer thread
+keeps committing catalog updates, once with SQLite's defaults (rollback
+journal, synchronous=FULL, no mmap, default page cache) and once with the
+configured tuning profile from ``app.config``. In rollback-journal mode a
+committing writer locks readers out of the database; in WAL mode readers
+keep going against the last committed snapshot.
+
+Run: python -m benchmarks.sqlite_tuning_benchmark
+"""
+
+import asyncio
+import os
+import tempfile
+import threading
+import time
+
+from sqlalchemy.orm import sessionmaker
+
+from app.database.connection import get_session_router
+from app.database.engine import create_database_engine, sqlite_pragmas
+from app.database.routing import SessionRouter
+from app.models.pizza import Pizza
+from app.services import response_cache
+from benchmarks.asgi import lifespan, request
+from benchmarks.catalog import CatalogSpec, build_catalog
+from main import app
+
+SPEC = CatalogSpec(pizzas=5_000)
+READERS = 8
+DURATION = 5.0
+WRITE_INTERVAL = 0.01
+WRITES_PER_COMMIT = 50
+READ_PARAMS = [
+    {"limit": "5"},
+    {"limit": "5", "search": "spicy", "sort_by": "relevance"},
+    {"limit": "5", "allergen_filter": "cheese", "sort_by": "name"},
+]
+
+PROFILES = {
+    "defaults": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "mmap_size": 0,
+        "cache_size": -2000,
+        "temp_store": "DEFAULT",
+        "busy_timeout": 5000,
+    },
+    "tuned": sqlite_pragmas(),
+}
+
+
+def _writer(session_factory, stop: threading.Event, counts: dict):
+    """Update batches of pizza descriptions, one commit per batch, until stopped"""
+    db = session_factory()
+    try:
+        first_id = 1
+        while not stop.is_set():
+            ids = range(first_id, first_id + WRITES_PER_COMMIT)
+            first_id = first_id % (SPEC.pizzas - WRITES_PER_COMMIT) + WRITES_PER_COMMIT
+            for pizza in db.query(Pizza).filter(Pizza.id.in_(ids)):
+                pizza.description = f"Updated {time.time()}"
+            start = time.perf_counter()
+            db.commit()
+            counts["commit_ms"] += (time.perf_counter() - start) * 1000
+            counts["writes"] += 1
+            time.sleep(WRITE_INTERVAL)
+    finally:
+        db.close()
+
+
+async def _readers():
+    latencies = []
+    deadline = time.perf_counter() + DURATION
+
+    async def client(offset: int):
+        i = offset
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = await request(app, "/pizzas/", READ_PARAMS[i % len(READ_PARAMS)])
+            latencies.append((time.perf_counter() - start) * 1000)
+            assert response.status == 200, response.body
+            i += 1
+
+    async with lifespan(app):
+        await asyncio.gather(*(client(i) for i in range(READERS)))
+    return sorted(latencies)
+
+
+def _run_profile(path: str, pragmas: dict):
+    build_catalog(path, SPEC).dispose()
+    engine = create_database_engine(
+        f"sqlite:///{path}", pool_size=READERS + 2, max_overflow=0, pragmas=pragmas
+    )
+    session_factory = sessionmaker(bind=engine)
+    router = SessionRouter(engine)
+    app.dependency_overrides[get_session_router] = lambda: router
+    stop = threading.Event()
+    counts = {"writes": 0, "commit_ms": 0.0}
+    writer = threading.Thread(target=_writer, args=(session_factory, stop, counts))
+    writer.start()
+    try:
+        latencies = asyncio.run(_readers())
+    finally:
+        stop.set()
+        writer.join()
+        app.dependency_overrides.clear()
+        engine.dispose()
+
+    p50 = latencies[len(latencies) // 2]
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    commit_ms = counts["commit_ms"] / max(counts["writes"], 1)
+    return len(latencies) / DURATION, p50, p99, counts["writes"] / DURATION, commit_ms
+
+
+def main():
+    # Every request should reach the database
+    response_cache.max_entries = 0
+    print(
+        f"{'profile':<10} {'reads/s':>9} {'read p50':>9} {'read p99':>9} "
+        f"{'commits/s':>9} {'commit ms':>10}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, pragmas in PROFILES.items():
+            reads, p50, p99, writes, commit_ms = _run_profile(
+                os.path.join(tmp, f"{name}.db"), pragmas
+            )
+            print(
+                f"{name:<10} {reads:>9.1f} {p50:>9.2f} {p99:>9.2f} "
+                f"{writes:>9.1f} {commit_ms:>10.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Startup benchmark
+
+Measures how long a fresh process takes to import ``main``, and how long
+``uvicorn main:app --workers N`` takes from launch to the first successful
+GET /pizzas response and until every worker has finished its lifespan
+startup. Each configuration runs with schema setup at startup
+(``PIZZA_SCHEMA_SETUP=1``, the default) and with it skipped, as in a
+deploy that runs ``python migrate.py`` once.
+
+Run: python -m benchmarks.startup_benchmark
+"""
+
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from benchmarks.catalog import CatalogSpec, build_catalog
+
+SPEC = CatalogSpec(pizzas=20_000)
+WORKER_COUNTS = [1, 4]
+RUNS = 3
+TIMEOUT = 60.0
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _import_seconds(env: dict) -> float:
+    output = subprocess.run(
+        [sys.executable, "-c",
+         "import time; start = time.perf_counter(); import main; "
+         "print(time.perf_counter() - start)"],
+        env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def _serve(env: dict, workers: int):
+    """Seconds from launch to the first response and to all workers started"""
+    port = _free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "info"],
+        env=env, stderr=subprocess.PIPE, stdout=subprocess.DEVNULL, text=True
+    )
+    all_started = threading.Event()
+    started_at = []
+
+    def watch_log():
+        for line in server.stderr:
+            if "Application startup complete" in line:
+                started_at.append(time.perf_counter() - start)
+                if len(started_at) == workers:
+                    all_started.set()
+
+    threading.Thread(target=watch_log, daemon=True).start()
+    url = f"http://127.0.0.1:{port}/pizzas/?limit=1"
+    try:
+        while True:
+            if time.perf_counter() - start > TIMEOUT:
+                raise RuntimeError("Server did not answer in time")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        first_response = time.perf_counter() - start
+                        break
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.01)
+        all_started.wait(TIMEOUT)
+        return first_response, started_at[-1] if started_at else float("nan")
+    finally:
+        server.terminate()
+        server.wait(TIMEOUT)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "catalog.db")
+        build_catalog(path, SPEC).dispose()
+        base_env = dict(os.environ, PIZZA_DATABASE_URL=f"sqlite:///{path}")
+
+        print(f"{'schema setup':<13} {'workers':>7} {'import s':>9} {'first response s':>17} {'all workers s':>14}")
+        for setup in ["1", "0"]:
+            env = dict(base_env, PIZZA_SCHEMA_SETUP=setup)
+            import_s = statistics.median(_import_seconds(env) for _ in range(RUNS))
+            for workers in WORKER_COUNTS:
+                runs = [_serve(env, workers) for _ in range(RUNS)]
+                first = statistics.median(run[0] for run in runs)
+                ready = statistics.median(run[1] for run in runs)
+                label = "startup" if setup == "1" else "skipped"
+                print(f"{label:<13} {workers:>7} {import_s:>9.2f} {first:>17.2f} {ready:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Typeahead benchmark
+
+Builds the suggestion index over 100k generated names and reports build
+time, lookup latency for 1-4 character prefixes, and the cost of applying
+a single rename in place.
+
+Run: python -m benchmarks.suggest_benchmark
+"""
+
+import random
+import statistics
+import time
+
+from app.services.suggest import SuggestionIndex
+from benchmarks.catalog import MENU_WORDS
+
+NAMES = 100_000
+LOOKUPS = 5_000
+LIMIT = 10
+
+
+def _names(rng: random.Random):
+    return {
+        i: " ".join(rng.sample(MENU_WORDS, rng.randint(1, 3))).title() + f" {i}"
+        for i in range(1, NAMES + 1)
+    }
+
+
+def _percentile(values, fraction):
+    return sorted(values)[int(fraction * (len(values) - 1))]
+
+
+def main():
+    rng = random.Random(0)
+    names = _names(rng)
+    index = SuggestionIndex()
+
+    start = time.perf_counter()
+    index.build({"ingredient": names}, version=1)
+    print(f"built index over {NAMES:,} names in {time.perf_counter() - start:.2f}s")
+
+    print(f"{'prefix length':>13} {'p50 us':>8} {'p99 us':>8}")
+    for length in range(1, 5):
+        timings = []
+        for _ in range(LOOKUPS):
+            word = rng.choice(MENU_WORDS)
+            prefix = word[:length]
+            start = time.perf_counter()
+            index.suggest(prefix, LIMIT, ["ingredient"])
+            timings.append((time.perf_counter() - start) * 1e6)
+        print(f"{length:>13} {statistics.median(timings):>8.1f} {_percentile(timings, 0.99):>8.1f}")
+
+    timings = []
+    for version in range(2, 1002):
+        item_id = rng.randint(1, NAMES)
+        start = time.perf_counter()
+        index.apply([("ingredient", item_id, f"Renamed {version}")], version, version)
+        timings.append((time.perf_counter() - start) * 1e6)
+    print(f"in-place rename: p50 {statistics.median(timings):.1f} us, p99 {_percentile(timings, 0.99):.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Shared pytest fixtures for Pizza Store API
+Runs the app against an isolated in-memory SQLite database
+"""
+
+import os
+
+# Tests bring their own databases; keep the app's lifespan off pizza_store.db
+os.environ["PIZZA_SCHEMA_SETUP"] = "0"
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from app.database.engine import create_database_engine
+from app.database.connection import get_session_router
+from app.database.routing import SessionRouter
+from app.services import response_cache, setup_schema
+from app.services.catalog_snapshot import catalog_snapshot
+from app.services.catalog_version import catalog_version
+from app.services.suggest import suggestion_index
+from app.models.pizza import Pizza, Ingredient
+from main import app
+
+
+class StatementCounter:
+    """Counts SQL statements executed on an engine"""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def reset(self):
+        self.count = 0
+
+
+@pytest.fixture
+def engine():
+    engine = create_database_engine("sqlite://")
+    setup_schema(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session_factory(engine):
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def client(engine, monkeypatch):
+    router = SessionRouter(engine)
+    app.dependency_overrides[get_session_router] = lambda: router
+    response_cache.clear()
+    catalog_version.invalidate()
+    catalog_snapshot.clear()
+    suggestion_index.clear()
+    # Re-read the catalog version on every request so statement counts are deterministic
+    monkeypatch.setattr(catalog_version, "check_interval", 0)
+    with TestClient(app) as test_client:
+        yield test_client
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def statements(engine):
+    return StatementCounter(engine)
+
+
+def seed_catalog(session_factory, pizza_count, ingredients_per_pizza=4, start=0):
+    """
+    Seed a synthetic catalog where every ingredient has one sub-ingredient
+    and every third ingredient is an allergen.
+    """
+    db = session_factory()
+    try:
+        for i in range(start, start + pizza_count):
+            pizza = Pizza(name=f"Pizza {i:05d}", description=f"Synthetic pizza number {i}")
+            for j in range(ingredients_per_pizza):
+                ingredient = Ingredient(
+                    name=f"Ingredient {i}-{j}",
+                    is_allergen=(j % 3 == 0)
+                )
+                ingredient.sub_ingredients.append(
+                    Ingredient(name=f"Sub-ingredient {i}-{j}", is_allergen=(j % 2 == 0))
+                )
+                pizza.ingredients.append(ingredient)
+            db.add(pizza)
+        db.commit()
+    finally:
+        db.close()
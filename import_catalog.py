@@ -0,0 +1,33 @@
+"""
+Bulk import script for Pizza Store API
+Loads ingredients and pizzas from CSV or JSON Lines files, updating existing
+records with the same name
+"""
+
+import argparse
+
+from app.database.base import engine
+from app.services.catalog_import import import_ingredients, import_pizzas, read_records
+from app.services import setup_schema
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import the pizza catalog")
+    parser.add_argument("--ingredients", metavar="PATH",
+                        help="ingredient records (name, is_allergen, sub_ingredients)")
+    parser.add_argument("--pizzas", metavar="PATH",
+                        help="pizza records (name, description, ingredients)")
+    args = parser.parse_args()
+    if not args.ingredients and not args.pizzas:
+        parser.error("nothing to import; pass --ingredients and/or --pizzas")
+
+    setup_schema(engine)
+
+    if args.ingredients:
+        print(import_ingredients(engine, read_records(args.ingredients)))
+    if args.pizzas:
+        print(import_pizzas(engine, read_records(args.pizzas)))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,23 +3,65 @@ Pizza Store API - FastAPI Backend
 A comprehensive API for browsing pizzas with search, sort, and filter capabilities.
 """
 
+from contextlib import asynccontextmanager
+
+from anyio import to_thread
 from fastapi import FastAPI
-from app.database.base import Base, engine
+from app.config import (
+    COMPRESSION_MIN_SIZE, GZIP_LEVEL, PROFILING_ENABLED, SCHEMA_SETUP, THREADPOOL_SIZE
+)
+from app.database.connection import get_session_router
 from app.routers import pizza_router, ingredients_router
+from app.services import setup_schema
+from app.services.compression import NegotiatingGZipMiddleware
+from app.services.catalog_snapshot import catalog_snapshot
+from app.services.profiling import install_metrics, install_profiling
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup and shutdown"""
+    # Route handlers that query the database are plain ``def`` functions, so
+    # FastAPI runs them in this threadpool instead of on the event loop
+    to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    # Startup works on the databases the handlers use, so overriding
+    # ``get_session_router`` (as tests and benchmarks do) keeps it off the
+    # configured database
+    router = app.dependency_overrides.get(get_session_router, get_session_router)()
+    # Importing the app never touches the database; schema work happens here
+    if SCHEMA_SETUP:
+        setup_schema(router.primary)
+    # Snapshot mode loads the catalog before the first request needs it
+    if catalog_snapshot.enabled:
+        db = router.read_session()
+        try:
+            catalog_snapshot.load(db)
+        finally:
+            db.close()
+    yield
+
 
 # Create FastAPI app
 app = FastAPI(
     title="Pizza Store API",
     description="API for browsing pizzas with search, sort, and filter capabilities",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Include routers
 app.include_router(pizza_router)
 app.include_router(ingredients_router)
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Catalog responses arrive already compressed from the response cache; this
+# covers everything else and leaves those untouched
+app.add_middleware(NegotiatingGZipMiddleware, minimum_size=COMPRESSION_MIN_SIZE, compresslevel=GZIP_LEVEL)
+
+# GET /metrics always serves the response cache counters; profiling adds
+# Server-Timing headers, per-route series and slow-request profiles
+install_metrics(app)
+if PROFILING_ENABLED:
+    install_profiling(app)
 
 
 @app.get("/", response_model=dict)
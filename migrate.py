@@ -0,0 +1,16 @@
+"""
+Schema migration script for Pizza Store API
+Creates missing tables, indexes and derived data; run once per deploy when
+workers start with PIZZA_SCHEMA_SETUP=0
+"""
+
+import time
+
+from app.database.base import engine
+from app.services import setup_schema
+
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    setup_schema(engine)
+    print(f"Schema is up to date ({time.perf_counter() - start:.2f}s)")
@@ -3,18 +3,15 @@ Data seeding script for Pizza Store API
 Populates the database with sample pizza and ingredient data
 """
 
-from sqlalchemy.orm import sessionmaker
-from app.database.base import engine, Base
-from app.models.pizza import Pizza, Ingredient, PizzaIngredient, IngredientIngredient
-
-# Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+from app.database.base import engine
+from app.services import setup_schema
+from app.services.catalog_import import import_ingredients, import_pizzas
 
 def seed_database():
     """Seed the database with sample data"""
-    db = SessionLocal()
-    
     try:
+        setup_schema(engine)
+        
         # Create ingredients
         ingredients_data = [
             # Base ingredients
@@ -50,13 +47,8 @@ def seed_database():
             {"name": "Regular Dough", "is_allergen": True},  # Gluten allergen
         ]
         
-        ingredients = []
-        for ing_data in ingredients_data:
-            ingredient = Ingredient(**ing_data)
-            db.add(ingredient)
-            ingredients.append(ingredient)
-        
-        db.commit()
+        # Re-running the seed updates existing rows instead of duplicating them
+        import_ingredients(engine, ingredients_data)
         
         # Create ingredient relationships (sub-ingredients)
         # For example, some ingredients might have sub-ingredients
@@ -67,91 +59,70 @@ def seed_database():
             {
                 "name": "Margherita",
                 "description": "Classic Italian pizza with fresh tomatoes, mozzarella, and basil",
-                "ingredient_names": ["Tomato Sauce", "Mozzarella Cheese", "Basil"]
+                "ingredients": ["Tomato Sauce", "Mozzarella Cheese", "Basil"]
             },
             {
                 "name": "Pepperoni",
                 "description": "Traditional pepperoni pizza with mozzarella cheese",
-                "ingredient_names": ["Tomato Sauce", "Mozzarella Cheese", "Pepperoni"]
+                "ingredients": ["Tomato Sauce", "Mozzarella Cheese", "Pepperoni"]
             },
             {
                 "name": "Supreme",
                 "description": "Loaded with pepperoni, sausage, mushrooms, bell peppers, and onions",
-                "ingredient_names": ["Tomato Sauce", "Mozzarella Cheese", "Pepperoni", "Sausage", "Mushrooms", "Bell Peppers", "Onions"]
+                "ingredients": ["Tomato Sauce", "Mozzarella Cheese", "Pepperoni", "Sausage", "Mushrooms", "Bell Peppers", "Onions"]
             },
             {
                 "name": "Hawaiian",
                 "description": "Sweet and savory combination of ham and pineapple",
-                "ingredient_names": ["Tomato Sauce", "Mozzarella Cheese", "Ham", "Pineapple"]
+                "ingredients": ["Tomato Sauce", "Mozzarella Cheese", "Ham", "Pineapple"]
             },
             {
                 "name": "Meat Lovers",
                 "description": "For the carnivore in you - pepperoni, sausage, bacon, and ham",
-                "ingredient_names": ["Tomato Sauce", "Mozzarella Cheese", "Pepperoni", "Sausage", "Bacon", "Ham"]
+                "ingredients": ["Tomato Sauce", "Mozzarella Cheese", "Pepperoni", "Sausage", "Bacon", "Ham"]
             },
             {
                 "name": "Veggie Deluxe",
                 "description": "Fresh vegetables including mushrooms, bell peppers, onions, olives, and spinach",
-                "ingredient_names": ["Tomato Sauce", "Mozzarella Cheese", "Mushrooms", "Bell Peppers", "Onions", "Olives", "Spinach"]
+                "ingredients": ["Tomato Sauce", "Mozzarella Cheese", "Mushrooms", "Bell Peppers", "Onions", "Olives", "Spinach"]
             },
             {
                 "name": "BBQ Chicken",
                 "description": "Grilled chicken with BBQ sauce, red onions, and cilantro",
-                "ingredient_names": ["BBQ Sauce", "Mozzarella Cheese", "Chicken", "Onions"]
+                "ingredients": ["BBQ Sauce", "Mozzarella Cheese", "Chicken", "Onions"]
             },
             {
                 "name": "Mediterranean",
                 "description": "Mediterranean flavors with feta cheese, olives, artichokes, and sun-dried tomatoes",
-                "ingredient_names": ["Tomato Sauce", "Feta Cheese", "Olives", "Artichokes", "Sun-dried Tomatoes"]
+                "ingredients": ["Tomato Sauce", "Feta Cheese", "Olives", "Artichokes", "Sun-dried Tomatoes"]
             },
             {
                 "name": "Pesto Chicken",
                 "description": "Grilled chicken with pesto sauce, mozzarella, and fresh arugula",
-                "ingredient_names": ["Pesto Sauce", "Mozzarella Cheese", "Chicken", "Arugula"]
+                "ingredients": ["Pesto Sauce", "Mozzarella Cheese", "Chicken", "Arugula"]
             },
             {
                 "name": "Quattro Stagioni",
                 "description": "Four seasons pizza with artichokes, mushrooms, prosciutto, and olives",
-                "ingredient_names": ["Tomato Sauce", "Mozzarella Cheese", "Artichokes", "Mushrooms", "Prosciutto", "Olives"]
+                "ingredients": ["Tomato Sauce", "Mozzarella Cheese", "Artichokes", "Mushrooms", "Prosciutto", "Olives"]
             },
             {
                 "name": "Seafood Special",
                 "description": "Fresh seafood with shrimp and anchovies",
-                "ingredient_names": ["Tomato Sauce", "Mozzarella Cheese", "Shrimp", "Anchovies"]
+                "ingredients": ["Tomato Sauce", "Mozzarella Cheese", "Shrimp", "Anchovies"]
             },
             {
                 "name": "Gluten-Free Margherita",
                 "description": "Classic margherita made with gluten-free dough",
-                "ingredient_names": ["Tomato Sauce", "Mozzarella Cheese", "Basil", "Gluten-Free Dough"]
+                "ingredients": ["Tomato Sauce", "Mozzarella Cheese", "Basil", "Gluten-Free Dough"]
             }
         ]
         
-        for pizza_data in pizzas_data:
-            pizza = Pizza(
-                name=pizza_data["name"],
-                description=pizza_data["description"]
-            )
-            db.add(pizza)
-            db.flush()  # Get the pizza ID
-            
-            # Add ingredients to pizza
-            for ingredient_name in pizza_data["ingredient_names"]:
-                ingredient = db.query(Ingredient).filter(Ingredient.name == ingredient_name).first()
-                if ingredient:
-                    pizza_ingredient = PizzaIngredient(
-                        pizza_id=pizza.id,
-                        ingredient_id=ingredient.id
-                    )
-                    db.add(pizza_ingredient)
-        
-        db.commit()
+        import_pizzas(engine, pizzas_data)
         print("Database seeded successfully!")
         
     except Exception as e:
-        db.rollback()
         print(f"Error seeding database: {e}")
-    finally:
-        db.close()
 
 if __name__ == "__main__":
     seed_database()
@@ -0,0 +1,74 @@
+"""
+Tests for the materialized pizza-allergen index
+"""
+
+from app.models.pizza import Pizza, Ingredient, PizzaAllergen
+from app.services import rebuild_allergen_index
+
+
+def _index_rows(session_factory):
+    db = session_factory()
+    try:
+        return sorted((row.pizza_id, row.ingredient_id) for row in db.query(PizzaAllergen))
+    finally:
+        db.close()
+
+
+def test_index_follows_orm_writes(session_factory):
+    db = session_factory()
+    cheese = Ingredient(name="Cheese", is_allergen=True)
+    sauce = Ingredient(name="Sauce", is_allergen=False)
+    anchovy = Ingredient(name="Anchovy", is_allergen=True)
+    pizza = Pizza(name="Test", description="Test pizza", ingredients=[cheese, sauce])
+    db.add_all([pizza, anchovy])
+    db.commit()
+    assert _index_rows(session_factory) == [(pizza.id, cheese.id)]
+
+    # New sub-ingredient allergen on an existing ingredient
+    sauce.sub_ingredients.append(anchovy)
+    db.commit()
+    assert _index_rows(session_factory) == [(pizza.id, cheese.id), (pizza.id, anchovy.id)]
+
+    # Allergen flag flipped off
+    cheese.is_allergen = False
+    db.commit()
+    assert _index_rows(session_factory) == [(pizza.id, anchovy.id)]
+
+    # Ingredient removed from the pizza
+    pizza.ingredients.remove(sauce)
+    db.commit()
+    assert _index_rows(session_factory) == []
+
+    # Pizza deleted
+    cheese.is_allergen = True
+    db.commit()
+    db.delete(pizza)
+    db.commit()
+    assert _index_rows(session_factory) == []
+    db.close()
+
+
+def test_full_rebuild_matches_incremental(engine, session_factory):
+    from conftest import seed_catalog
+
+    seed_catalog(session_factory, pizza_count=10)
+    incremental = _index_rows(session_factory)
+    with engine.begin() as connection:
+        rebuild_allergen_index(connection)
+    assert _index_rows(session_factory) == incremental
+
+
+def test_allergen_filter_uses_index(client, session_factory):
+    db = session_factory()
+    shrimp = Ingredient(name="Shrimp", is_allergen=True)
+    stock = Ingredient(name="Seafood Stock", is_allergen=False, sub_ingredients=[shrimp])
+    db.add_all([
+        Pizza(name="Seafood", description="", ingredients=[stock]),
+        Pizza(name="Plain", description="", ingredients=[Ingredient(name="Tomato")]),
+    ])
+    db.commit()
+    db.close()
+
+    page = client.get("/pizzas", params={"allergen_filter": "shrimp"}).json()
+    assert [pizza["name"] for pizza in page["pizzas"]] == ["Seafood"]
+    assert page["pizzas"][0]["allergens"] == ["Shrimp"]
@@ -0,0 +1,116 @@
+"""
+Tests for the bulk catalog importer
+"""
+
+import json
+
+import pytest
+
+from app.models.pizza import Pizza, Ingredient, PizzaAllergen, IngredientIngredient
+from app.models.catalog import CatalogVersion
+from app.services import catalog_import
+from app.services.catalog_import import import_ingredients, import_pizzas, read_records
+
+
+def _write_files(tmp_path):
+    ingredients = tmp_path / "ingredients.csv"
+    ingredients.write_text(
+        "name,is_allergen,sub_ingredients\n"
+        "Pesto,false,Basil;Pine Nuts\n"
+        "Basil,false,\n"
+        "Pine Nuts,true,\n"
+        "Mozzarella,true,\n"
+    )
+    pizzas = tmp_path / "pizzas.jsonl"
+    pizzas.write_text("\n".join(json.dumps(record) for record in [
+        {"name": "Genovese", "description": "Pesto pizza", "ingredients": ["Pesto", "Mozzarella"]},
+        {"name": "Bianca", "description": "No sauce", "ingredients": ["Mozzarella", "Truffle"]},
+    ]) + "\n")
+    return str(ingredients), str(pizzas)
+
+
+def test_import_from_files(engine, session_factory, tmp_path):
+    ingredients_path, pizzas_path = _write_files(tmp_path)
+
+    ingredient_stats = import_ingredients(engine, read_records(ingredients_path))
+    pizza_stats = import_pizzas(engine, read_records(pizzas_path))
+
+    assert ingredient_stats.ingredients_inserted == 4
+    assert ingredient_stats.links == 2
+    assert pizza_stats.pizzas_inserted == 2
+    assert pizza_stats.links == 3
+    # "Truffle" is not a known ingredient
+    assert pizza_stats.missing_links == 1
+
+    db = session_factory()
+    try:
+        genovese = db.query(Pizza).filter(Pizza.name == "Genovese").one()
+        assert sorted(i.name for i in genovese.ingredients) == ["Mozzarella", "Pesto"]
+        # The allergen index covers sub-ingredients of imported rows
+        assert [a.name for a in genovese.allergen_ingredients] == ["Mozzarella", "Pine Nuts"]
+    finally:
+        db.close()
+
+
+def test_reimport_updates_in_place(engine, session_factory, tmp_path):
+    ingredients_path, pizzas_path = _write_files(tmp_path)
+    import_ingredients(engine, read_records(ingredients_path))
+    import_pizzas(engine, read_records(pizzas_path))
+
+    ingredient_stats = import_ingredients(engine, [
+        {"name": "Pesto", "is_allergen": False, "sub_ingredients": ["Basil"]},
+        {"name": "Basil", "is_allergen": True},
+    ])
+    pizza_stats = import_pizzas(engine, [
+        {"name": "Genovese", "description": "Basil pesto", "ingredients": ["Pesto"]},
+    ])
+
+    assert ingredient_stats.ingredients_updated == 2
+    assert ingredient_stats.ingredients_inserted == 0
+    assert pizza_stats.pizzas_updated == 1
+    assert pizza_stats.pizzas_inserted == 0
+
+    db = session_factory()
+    try:
+        assert db.query(Pizza).count() == 2
+        assert db.query(Ingredient).count() == 4
+        assert db.query(IngredientIngredient).count() == 1
+        genovese = db.query(Pizza).filter(Pizza.name == "Genovese").one()
+        assert genovese.description == "Basil pesto"
+        assert [i.name for i in genovese.ingredients] == ["Pesto"]
+        assert [a.name for a in genovese.allergen_ingredients] == ["Basil"]
+        assert db.query(PizzaAllergen).count() == 2
+    finally:
+        db.close()
+
+
+def test_import_is_visible_to_cached_responses(client, engine):
+    import_ingredients(engine, [{"name": "Basil", "is_allergen": False}])
+    assert client.get("/pizzas/").json()["total"] == 0
+    etag = client.get("/pizzas/").headers["etag"]
+
+    import_pizzas(engine, [{"name": "Margherita", "description": "", "ingredients": ["Basil"]}])
+
+    response = client.get("/pizzas/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["total"] == 1
+
+
+def test_failed_ingredient_import_writes_nothing(engine, session_factory, monkeypatch):
+    import_ingredients(engine, [{"name": "Cheese", "is_allergen": False}])
+    import_pizzas(engine, [{"name": "Margherita", "description": "", "ingredients": ["Cheese"]}])
+    db = session_factory()
+    version = db.query(CatalogVersion.version).scalar()
+    db.close()
+
+    monkeypatch.setattr(catalog_import, "BATCH_SIZE", 1)
+    with pytest.raises(ValueError):
+        import_ingredients(engine, [{"name": "Cheese", "is_allergen": True}, {"is_allergen": True}])
+
+    db = session_factory()
+    try:
+        assert db.query(Ingredient).filter(Ingredient.name == "Cheese").one().is_allergen is False
+        assert db.query(PizzaAllergen).count() == 0
+        assert db.query(CatalogVersion.version).scalar() == version
+    finally:
+        db.close()
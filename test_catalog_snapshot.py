@@ -0,0 +1,242 @@
+"""
+Tests for serving the catalog from the in-memory snapshot
+"""
+
+import os
+import random
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from app.database.engine import create_database_engine
+from app.models.pizza import Pizza, Ingredient
+from app.services import response_cache, setup_schema
+from app.services.catalog_snapshot import CatalogSnapshot, CatalogSnapshotStore, catalog_snapshot
+from app.services.catalog_version import catalog_version
+from conftest import seed_catalog
+
+LISTINGS = [
+    {},
+    {"sort_by": "id"},
+    {"search": "synthetic 1"},
+    {"search": "jalapenos"},
+    {"ingredient_filter": "Ingredient 3"},
+    {"allergen_filter": "Sub-ingredient"},
+    {"allergen_filter": ["Sub-ingredient", "Ingredient 1-"]},
+    {"exclude_allergen": "Ingredient 2-0", "exclude_ingredient": "Ingredient 4"},
+    {"search": "pizza", "fields": "allergens", "depth": 0},
+    {"search": "synthetic", "sort_by": "-allergen_count,relevance"},
+    {"allergen_filter": "Sub-ingredient", "sort_by": "-name"},
+]
+
+
+@pytest.fixture
+def catalog(session_factory):
+    seed_catalog(session_factory, pizza_count=12, ingredients_per_pizza=3)
+    db = session_factory()
+    pepper = Ingredient(name="Jalapeños", is_allergen=False)
+    db.add(Pizza(name="Picante", description="Hot with jalapeños", ingredients=[pepper]))
+    db.commit()
+    db.close()
+
+
+@pytest.fixture
+def snapshot_mode(monkeypatch):
+    monkeypatch.setattr(catalog_snapshot, "enabled", True)
+    catalog_snapshot.clear()
+    yield
+    catalog_snapshot.clear()
+
+
+@pytest.fixture
+def uncached(monkeypatch):
+    # Both modes share cache keys, so compare them with the cache off
+    monkeypatch.setattr(response_cache, "max_entries", 0)
+
+
+def _both_modes(client, path, params=None):
+    database = client.get(path, params=params)
+    catalog_snapshot.enabled = True
+    try:
+        snapshot = client.get(path, params=params)
+    finally:
+        catalog_snapshot.enabled = False
+    return database, snapshot
+
+
+@pytest.mark.parametrize("shared", [False, True])
+@pytest.mark.parametrize("params", LISTINGS)
+def test_listing_matches_database_mode(client, catalog, uncached, monkeypatch, tmp_path, params, shared):
+    if shared:
+        monkeypatch.setattr(catalog_snapshot, "directory", str(tmp_path))
+    database, snapshot = _both_modes(client, "/pizzas", params)
+    assert snapshot.status_code == database.status_code == 200
+    assert snapshot.json() == database.json()
+
+
+def test_name_pagination_matches_database_mode(client, catalog, uncached):
+    cursor = None
+    while True:
+        params = {"limit": 5, "allergen_filter": "Sub-ingredient"}
+        if cursor:
+            params["cursor"] = cursor
+        database, snapshot = _both_modes(client, "/pizzas", params)
+        assert snapshot.json() == database.json()
+        cursor = database.json()["next_cursor"]
+        if cursor is None:
+            break
+
+
+def test_relevance_ranks_name_matches_first(client, catalog, snapshot_mode):
+    page = client.get("/pizzas", params={"search": "jalapeno", "sort_by": "relevance"}).json()
+    assert [pizza["name"] for pizza in page["pizzas"]] == ["Picante"]
+
+    page = client.get("/pizzas", params={"search": "picante hot", "sort_by": "relevance"}).json()
+    assert page["total"] == 1
+
+
+def test_detail_batch_and_ingredients_match_database_mode(client, catalog, uncached):
+    for path, params in [
+        ("/pizzas/3", {"depth": 0}),
+        ("/pizzas/13", None),
+        ("/pizzas/999", None),
+        ("/pizzas/batch", {"ids": "5,999,1"}),
+        ("/ingredients", None),
+        ("/ingredients", {"search": "jalapenos"}),
+    ]:
+        database, snapshot = _both_modes(client, path, params)
+        assert snapshot.status_code == database.status_code
+        assert snapshot.json() == database.json()
+
+
+def test_snapshot_reads_do_not_query_the_database(
+    client, catalog, snapshot_mode, statements, monkeypatch
+):
+    client.get("/pizzas")
+    monkeypatch.setattr(catalog_version, "check_interval", 60)
+
+    statements.reset()
+    page = client.get("/pizzas", params={"search": "pizza", "allergen_filter": "Sub"})
+    assert page.json()["total"] == 12
+    assert statements.count == 0
+
+
+def test_snapshot_is_replaced_after_a_write(client, catalog, snapshot_mode, session_factory):
+    assert client.get("/pizzas", params={"search": "calzone"}).json()["total"] == 0
+
+    db = session_factory()
+    db.add(Pizza(name="Calzone", description="Folded"))
+    db.commit()
+    db.close()
+
+    page = client.get("/pizzas", params={"search": "calzone"}).json()
+    assert [pizza["name"] for pizza in page["pizzas"]] == ["Calzone"]
+
+
+def _images(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith(".img"))
+
+
+def test_shared_snapshot_is_mapped_by_every_worker(catalog, session_factory, tmp_path):
+    db = session_factory()
+    try:
+        first = CatalogSnapshotStore(enabled=True, directory=str(tmp_path)).get(db)
+        assert len(_images(tmp_path)) == 1
+        modified = os.path.getmtime(tmp_path / _images(tmp_path)[0])
+
+        # A second worker maps the same file rather than building its own
+        second = CatalogSnapshotStore(enabled=True, directory=str(tmp_path)).get(db)
+        assert os.path.getmtime(tmp_path / _images(tmp_path)[0]) == modified
+        assert len(second) == len(first) == 13
+        assert second.pizza_response(0, {"allergens"}, 0) == first.pizza_response(0, {"allergens"}, 0)
+    finally:
+        db.close()
+
+
+def test_shared_snapshot_is_replaced_after_a_write(
+    client, catalog, snapshot_mode, session_factory, monkeypatch, tmp_path
+):
+    monkeypatch.setattr(catalog_snapshot, "directory", str(tmp_path))
+    assert client.get("/pizzas", params={"search": "calzone"}).json()["total"] == 0
+    old = _images(tmp_path)
+
+    db = session_factory()
+    db.add(Pizza(name="Calzone", description="Folded"))
+    db.commit()
+    db.close()
+
+    page = client.get("/pizzas", params={"search": "calzone"}).json()
+    assert [pizza["name"] for pizza in page["pizzas"]] == ["Calzone"]
+    # The new version gets its own file and older images are removed
+    assert len(_images(tmp_path)) == 1
+    assert _images(tmp_path) != old
+
+
+@pytest.mark.parametrize("params", [{}, {"sort_by": "-name"}, {"sort_by": "-allergen_count,name"}])
+def test_null_names_match_database_mode(client, catalog, uncached, session_factory, params):
+    db = session_factory()
+    db.add_all([Pizza(name=None, description="Unnamed"), Pizza(name=None, description="Unnamed too")])
+    db.commit()
+    db.close()
+
+    database, snapshot = _both_modes(client, "/pizzas", {**params, "limit": 100})
+    assert snapshot.status_code == database.status_code == 200
+    assert snapshot.json() == database.json()
+    names = [pizza["name"] for pizza in snapshot.json()["pizzas"]]
+    assert None in names
+
+
+def test_relevance_order_and_cursors_match_database_mode(client, uncached, session_factory):
+    # Many overlapping prefixes, repeated terms and equal scores
+    words = ["spicy", "spice", "cheese", "cheesy", "ham", "hammer", "olive", "basil"]
+    rng = random.Random(0)
+    db = session_factory()
+    for _ in range(120):
+        db.add(Pizza(
+            name=" ".join(rng.choice(words) for _ in range(rng.randint(1, 3))),
+            description=" ".join(rng.choice(words) for _ in range(rng.randint(0, 10))),
+        ))
+    db.commit()
+    db.close()
+
+    for search in ["spic", "chees olive", "ham ham"]:
+        for sort_by in ["relevance", "-relevance", "relevance,-name"]:
+            cursor = None
+            while True:
+                params = {"search": search, "sort_by": sort_by, "limit": 7, "fields": "id"}
+                if cursor:
+                    params["cursor"] = cursor
+                database, snapshot = _both_modes(client, "/pizzas", params)
+                assert snapshot.json() == database.json()
+                cursor = database.json()["next_cursor"]
+                if cursor is None:
+                    break
+
+
+def test_snapshot_ignores_a_write_between_its_queries(tmp_path):
+    engine = create_database_engine(f"sqlite:///{tmp_path / 'catalog.db'}")
+    setup_schema(engine)
+    factory = sessionmaker(bind=engine)
+    seed_catalog(factory, pizza_count=3, ingredients_per_pizza=2)
+
+    def write_once(conn, cursor, statement, parameters, context, executemany):
+        if "FROM pizza_ingredients" in statement and not written:
+            written.append(True)
+            # Another worker adds a pizza after the pizzas were read
+            writer = factory()
+            writer.add(Pizza(name="Late", ingredients=[Ingredient(name="Late topping")]))
+            writer.commit()
+            writer.close()
+
+    written = []
+    db = factory()
+    event.listen(engine, "before_cursor_execute", write_once)
+    try:
+        snapshot = CatalogSnapshot.load(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", write_once)
+        db.close()
+        engine.dispose()
+    assert written
+    assert len(snapshot) == 3
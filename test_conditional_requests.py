@@ -0,0 +1,102 @@
+"""
+Tests for ETag / Last-Modified conditional requests
+"""
+
+from fastapi import FastAPI, Response
+from fastapi.testclient import TestClient
+
+from app.models.pizza import Pizza
+from app.services.compression import NegotiatingGZipMiddleware
+from app.services.catalog_version import catalog_version
+from conftest import seed_catalog
+
+
+def test_if_none_match_returns_304_without_queries(client, session_factory, statements, monkeypatch):
+    monkeypatch.setattr(catalog_version, "check_interval", 60)
+    seed_catalog(session_factory, pizza_count=3)
+
+    first = client.get("/pizzas")
+    etag = first.headers["etag"]
+    assert first.status_code == 200
+    assert first.headers["last-modified"]
+
+    statements.reset()
+    second = client.get("/pizzas", headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.content == b""
+    assert second.headers["etag"] == etag
+    assert statements.count == 0
+
+
+def test_writes_change_the_etag(client, session_factory):
+    seed_catalog(session_factory, pizza_count=1)
+    etag = client.get("/pizzas/1").headers["etag"]
+
+    db = session_factory()
+    db.get(Pizza, 1).description = "Updated"
+    db.commit()
+    db.close()
+
+    response = client.get("/pizzas/1", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.json()["description"] == "Updated"
+
+
+def test_if_modified_since(client, session_factory):
+    seed_catalog(session_factory, pizza_count=1)
+    last_modified = client.get("/ingredients/").headers["last-modified"]
+    response = client.get("/ingredients/", headers={"If-Modified-Since": last_modified})
+    assert response.status_code == 304
+    response = client.get(
+        "/ingredients/", headers={"If-Modified-Since": "Thu, 01 Jan 1970 00:00:00 GMT"}
+    )
+    assert response.status_code == 200
+
+
+def test_weak_and_list_etags_match(client, session_factory):
+    seed_catalog(session_factory, pizza_count=1)
+    etag = client.get("/pizzas").headers["etag"]
+    response = client.get("/pizzas", headers={"If-None-Match": f'"other", W/{etag}'})
+    assert response.status_code == 304
+
+
+def test_each_encoding_has_its_own_etag(client, session_factory):
+    seed_catalog(session_factory, pizza_count=20)
+    gzipped = client.get("/pizzas", headers={"Accept-Encoding": "gzip"})
+    identity = client.get("/pizzas", headers={"Accept-Encoding": "identity"})
+    refused = client.get("/pizzas", headers={"Accept-Encoding": "gzip;q=0, identity"})
+
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert "content-encoding" not in identity.headers
+    assert "content-encoding" not in refused.headers
+    assert gzipped.headers["etag"] != identity.headers["etag"] == refused.headers["etag"]
+    for response in (gzipped, identity, refused):
+        assert response.headers["vary"] == "Accept-Encoding"
+
+    # Either tag of the current version is still current
+    for etag in (gzipped.headers["etag"], identity.headers["etag"]):
+        response = client.get("/pizzas", headers={"If-None-Match": etag, "Accept-Encoding": "gzip"})
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+
+
+def test_middleware_honours_q_zero_and_retags_compressed_bodies():
+    app = FastAPI()
+    app.add_middleware(NegotiatingGZipMiddleware, minimum_size=10)
+
+    @app.get("/large")
+    def large():
+        return Response(b"x" * 100, headers={"ETag": '"large-1"'})
+
+    client = TestClient(app)
+    gzipped = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert gzipped.headers["etag"] == '"large-1-gzip"'
+    assert gzipped.headers["vary"] == "Accept-Encoding"
+
+    for accept_encoding in ("gzip;q=0", "gzip; q=0.0, identity", "*;q=0", "br"):
+        response = client.get("/large", headers={"Accept-Encoding": accept_encoding})
+        assert "content-encoding" not in response.headers
+        assert response.headers["etag"] == '"large-1"'
+        assert response.headers["vary"] == "Accept-Encoding"
@@ -0,0 +1,65 @@
+"""
+Tests for the database engine factory
+"""
+
+from sqlalchemy import text
+from sqlalchemy.pool import QueuePool, StaticPool
+
+from app.database.engine import create_database_engine
+
+
+def _pragma(connection, name):
+    return connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+
+
+def test_file_database_gets_tuning_pragmas(tmp_path):
+    engine = create_database_engine(f"sqlite:///{tmp_path / 'tuned.db'}", pool_size=3)
+    try:
+        assert isinstance(engine.pool, QueuePool)
+        assert engine.pool.size() == 3
+        with engine.connect() as connection:
+            assert _pragma(connection, "journal_mode") == "wal"
+            assert _pragma(connection, "synchronous") == 1  # NORMAL
+            assert _pragma(connection, "temp_store") == 2  # MEMORY
+            assert _pragma(connection, "cache_size") == -64 * 1024
+            assert _pragma(connection, "busy_timeout") == 5000
+    finally:
+        engine.dispose()
+
+
+def test_pragmas_can_be_replaced(tmp_path):
+    engine = create_database_engine(
+        f"sqlite:///{tmp_path / 'plain.db'}",
+        pragmas={"journal_mode": "DELETE", "synchronous": "FULL"}
+    )
+    try:
+        with engine.connect() as connection:
+            assert _pragma(connection, "journal_mode") == "delete"
+            assert _pragma(connection, "synchronous") == 2  # FULL
+    finally:
+        engine.dispose()
+
+
+def test_wal_readers_are_not_blocked_by_open_write(tmp_path):
+    engine = create_database_engine(f"sqlite:///{tmp_path / 'wal.db'}")
+    try:
+        with engine.begin() as connection:
+            connection.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY)"))
+            connection.execute(text("INSERT INTO items VALUES (1)"))
+
+        with engine.connect() as writer, engine.connect() as reader:
+            writer.execute(text("BEGIN IMMEDIATE"))
+            writer.execute(text("INSERT INTO items VALUES (2)"))
+            # The reader sees the last committed snapshot instead of waiting
+            assert reader.execute(text("SELECT count(*) FROM items")).scalar() == 1
+            writer.rollback()
+    finally:
+        engine.dispose()
+
+
+def test_in_memory_database_shares_one_connection():
+    engine = create_database_engine("sqlite://")
+    try:
+        assert isinstance(engine.pool, StaticPool)
+    finally:
+        engine.dispose()
@@ -0,0 +1,82 @@
+"""
+Tests for the streaming NDJSON menu export
+"""
+
+import gzip
+import json
+import zlib
+
+from starlette.requests import Request
+
+from app.routers import pizza as pizza_routes
+from app.services.compression import accepts_encoding, gzip_stream
+from conftest import seed_catalog
+
+
+def _lines(body: bytes):
+    return [json.loads(line) for line in body.decode().splitlines()]
+
+
+def test_export_streams_one_pizza_per_line(client, session_factory, monkeypatch):
+    monkeypatch.setattr(pizza_routes, "EXPORT_BATCH_SIZE", 4)
+    seed_catalog(session_factory, pizza_count=10, ingredients_per_pizza=2)
+
+    response = client.get("/pizzas/export", headers={"Accept-Encoding": "identity"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert "content-encoding" not in response.headers
+    pizzas = _lines(response.content)
+    assert [pizza["id"] for pizza in pizzas] == list(range(1, 11))
+    assert pizzas[6] == client.get("/pizzas/7").json()
+
+
+def test_export_is_gzipped_when_accepted(client, session_factory):
+    seed_catalog(session_factory, pizza_count=3)
+
+    response = client.get(
+        "/pizzas/export", params={"fields": "allergens"}, headers={"Accept-Encoding": "gzip"}
+    )
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    # httpx has already decoded the body
+    pizzas = _lines(response.content)
+    assert len(pizzas) == 3
+    assert set(pizzas[0]) == {"id", "name", "description", "allergens"}
+
+
+def test_export_statement_count_grows_per_batch(client, session_factory, statements, monkeypatch):
+    monkeypatch.setattr(pizza_routes, "EXPORT_BATCH_SIZE", 5)
+    seed_catalog(session_factory, pizza_count=5)
+    statements.reset()
+    client.get("/pizzas/export")
+    one_batch = statements.count
+
+    seed_catalog(session_factory, pizza_count=5, start=5)
+    statements.reset()
+    assert len(_lines(client.get("/pizzas/export").content)) == 10
+    two_batches = statements.count
+
+    seed_catalog(session_factory, pizza_count=10, start=10)
+    statements.reset()
+    client.get("/pizzas/export")
+    assert statements.count - two_batches == 2 * (two_batches - one_batch)
+
+
+def test_gzip_stream_flushes_every_chunk():
+    compressed = list(gzip_stream([b'{"id":1}\n', b'{"id":2}\n']))
+    assert gzip.decompress(b"".join(compressed)) == b'{"id":1}\n{"id":2}\n'
+    # The first line can be decoded before the stream ends
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    assert decoder.decompress(compressed[0]) == b'{"id":1}\n'
+
+
+def test_accept_encoding_negotiation():
+    def request(value):
+        return Request({"type": "http", "headers": [(b"accept-encoding", value.encode())]})
+
+    assert accepts_encoding(request("br, gzip;q=0.8"), "gzip")
+    assert accepts_encoding(request("*"), "gzip")
+    assert not accepts_encoding(request("gzip;q=0"), "gzip")
+    assert not accepts_encoding(request("identity"), "gzip")
@@ -0,0 +1,88 @@
+"""
+Tests for the ingredient and allergen facet counts
+"""
+
+import pytest
+
+from app.models.pizza import Pizza, Ingredient
+from app.services import response_cache
+from app.services.catalog_snapshot import catalog_snapshot
+from conftest import seed_catalog
+
+
+@pytest.fixture
+def catalog(session_factory):
+    seed_catalog(session_factory, pizza_count=6, ingredients_per_pizza=3)
+    # Shared ingredients, so counts go above one
+    db = session_factory()
+    gluten = Ingredient(name="Gluten", is_allergen=True)
+    dough = Ingredient(name="Dough", sub_ingredients=[gluten])
+    cheese = Ingredient(name="Cheese", is_allergen=True)
+    basil = Ingredient(name="Basil")
+    db.add_all([
+        Pizza(name="Margherita", description="Classic pizza", ingredients=[dough, cheese, basil]),
+        Pizza(name="Marinara", description="Pizza without cheese", ingredients=[dough, basil]),
+        Pizza(name="Quattro Formaggi", description="Four cheese pizza", ingredients=[dough, cheese]),
+    ])
+    db.commit()
+    db.close()
+
+
+def _filtered_total(client, params, **extra):
+    merged = dict(params)
+    for key, value in extra.items():
+        merged[key] = [merged[key], value] if key in merged else value
+    return client.get("/pizzas", params={**merged, "limit": 1}).json()["total"]
+
+
+@pytest.mark.parametrize("params", [
+    {},
+    {"search": "synthetic"},
+    {"allergen_filter": "Sub-ingredient"},
+    {"exclude_ingredient": "Ingredient 2-", "search": "pizza"},
+    {"exclude_ingredient": "Basil"},
+])
+def test_counts_match_filtering_by_each_value(client, catalog, params):
+    facets = client.get("/pizzas/facets", params=params).json()
+
+    assert facets["total"] == _filtered_total(client, params)
+    assert facets["ingredients"]
+    for value in facets["ingredients"]:
+        expected = _filtered_total(client, params, ingredient_filter=value["name"])
+        assert value["count"] == expected
+    for value in facets["allergens"]:
+        expected = _filtered_total(client, params, allergen_filter=value["name"])
+        assert value["count"] == expected
+
+
+def test_values_are_ordered_by_count(client, catalog):
+    facets = client.get("/pizzas/facets", params={"search": "pizza"}).json()
+    assert [(v["name"], v["count"]) for v in facets["ingredients"][:3]] == [
+        ("Dough", 3), ("Basil", 2), ("Cheese", 2)
+    ]
+    assert [(v["name"], v["count"]) for v in facets["allergens"][:2]] == [
+        ("Gluten", 3), ("Cheese", 2)
+    ]
+
+
+def test_facets_use_a_fixed_number_of_statements(client, session_factory, statements):
+    seed_catalog(session_factory, pizza_count=2)
+    statements.reset()
+    client.get("/pizzas/facets")
+    few = statements.count
+
+    seed_catalog(session_factory, pizza_count=50, start=2)
+    statements.reset()
+    facets = client.get("/pizzas/facets", params={"limit": 5}).json()
+    assert statements.count == few
+    assert len(facets["ingredients"]) == 5
+    assert facets["total"] == 52
+
+
+def test_snapshot_facets_match_database(client, catalog, monkeypatch):
+    monkeypatch.setattr(response_cache, "max_entries", 0)
+    params = {"search": "pizza", "exclude_allergen": "Ingredient 1-0"}
+    database = client.get("/pizzas/facets", params=params).json()
+
+    monkeypatch.setattr(catalog_snapshot, "enabled", True)
+    assert client.get("/pizzas/facets", params=params).json() == database
@@ -0,0 +1,75 @@
+"""
+Tests for ingredient and allergen filtering
+"""
+
+from sqlalchemy import text
+
+from app.models.pizza import Pizza, Ingredient
+from app.services.pizza_filters import PizzaFilters
+
+
+def _seed(session_factory):
+    db = session_factory()
+    mozzarella = Ingredient(name="Mozzarella Cheese", is_allergen=True)
+    parmesan = Ingredient(name="Parmesan Cheese", is_allergen=True)
+    feta = Ingredient(name="Feta Cheese", is_allergen=True)
+    basil = Ingredient(name="Basil")
+    tomato = Ingredient(name="Tomato Sauce")
+    shrimp = Ingredient(name="Shrimp", is_allergen=True)
+    db.add_all([
+        Pizza(name="Quattro Formaggi", description="", ingredients=[mozzarella, parmesan, feta, tomato]),
+        Pizza(name="Margherita", description="", ingredients=[mozzarella, basil, tomato]),
+        Pizza(name="Marinara", description="", ingredients=[tomato, basil]),
+        Pizza(name="Seafood", description="", ingredients=[tomato, shrimp, mozzarella]),
+    ])
+    db.commit()
+    db.close()
+
+
+def _names(client, **params):
+    page = client.get("/pizzas", params=params).json()
+    names = [pizza["name"] for pizza in page["pizzas"]]
+    assert page["total"] == len(names)
+    return names
+
+
+def test_multiple_matching_ingredients_return_each_pizza_once(client, session_factory):
+    _seed(session_factory)
+    assert _names(client, ingredient_filter="cheese") == ["Margherita", "Quattro Formaggi", "Seafood"]
+
+
+def test_combined_ingredient_and_allergen_filters(client, session_factory):
+    _seed(session_factory)
+    assert _names(client, ingredient_filter="cheese", allergen_filter="cheese") == [
+        "Margherita", "Quattro Formaggi", "Seafood"
+    ]
+    assert _names(client, ingredient_filter="basil", allergen_filter="cheese") == ["Margherita"]
+
+
+def test_repeated_values_are_all_required(client, session_factory):
+    _seed(session_factory)
+    assert _names(client, ingredient_filter=["feta", "tomato"]) == ["Quattro Formaggi"]
+    assert _names(client, allergen_filter=["shrimp", "mozzarella"]) == ["Seafood"]
+
+
+def test_exclusions(client, session_factory):
+    _seed(session_factory)
+    assert _names(client, exclude_allergen="cheese") == ["Marinara"]
+    assert _names(client, ingredient_filter="tomato", exclude_ingredient=["shrimp", "feta"]) == [
+        "Margherita", "Marinara"
+    ]
+
+
+def test_filters_probe_association_table_keys(engine, session_factory):
+    _seed(session_factory)
+    db = session_factory()
+    query = db.query(Pizza.id).filter(
+        *PizzaFilters.from_params(ingredients=["cheese"], exclude_allergens=["shrimp"]).clauses()
+    )
+    compiled = query.statement.compile(engine, compile_kwargs={"literal_binds": True})
+    plan = " ".join(row[-1] for row in db.execute(text(f"EXPLAIN QUERY PLAN {compiled}")))
+    db.close()
+    assert "SCAN pizza_ingredients" not in plan
+    assert "SCAN pizza_allergens" not in plan
+    assert "pizza_ingredients USING" in plan
+    assert "pizza_allergens USING" in plan
@@ -0,0 +1,81 @@
+"""
+Tests for recursive sub-ingredient resolution
+"""
+
+from app.models.pizza import Pizza, Ingredient
+
+
+def _seed_deep_pizza(session_factory):
+    """Pizza -> Sauce -> Stock -> Shrimp (allergen), plus an A <-> B cycle"""
+    db = session_factory()
+    shrimp = Ingredient(name="Shrimp", is_allergen=True)
+    stock = Ingredient(name="Stock", sub_ingredients=[shrimp])
+    sauce = Ingredient(name="Sauce", sub_ingredients=[stock])
+    loop_a = Ingredient(name="Loop A")
+    loop_b = Ingredient(name="Loop B", sub_ingredients=[loop_a])
+    loop_a.sub_ingredients.append(loop_b)
+    pizza = Pizza(name="Seafood", description="", ingredients=[sauce, loop_a])
+    db.add(pizza)
+    db.commit()
+    pizza_id, stock_id = pizza.id, stock.id
+    db.close()
+    return pizza_id, stock_id
+
+
+def _ingredient(pizza, name):
+    return next(i for i in pizza["ingredients"] if i["name"] == name)
+
+
+def test_allergens_cover_every_level(client, session_factory):
+    pizza_id, _ = _seed_deep_pizza(session_factory)
+    pizza = client.get(f"/pizzas/{pizza_id}").json()
+    assert pizza["allergens"] == ["Shrimp"]
+    page = client.get("/pizzas", params={"allergen_filter": "shrimp"}).json()
+    assert [p["name"] for p in page["pizzas"]] == ["Seafood"]
+
+
+def test_depth_parameter(client, session_factory):
+    pizza_id, _ = _seed_deep_pizza(session_factory)
+
+    sauce = _ingredient(client.get(f"/pizzas/{pizza_id}").json(), "Sauce")
+    assert sauce["sub_ingredients"][0]["name"] == "Stock"
+    assert sauce["sub_ingredients"][0]["sub_ingredients"] == []
+
+    sauce = _ingredient(client.get(f"/pizzas/{pizza_id}", params={"depth": 3}).json(), "Sauce")
+    stock = sauce["sub_ingredients"][0]
+    assert [i["name"] for i in stock["sub_ingredients"]] == ["Shrimp"]
+
+    sauce = _ingredient(client.get(f"/pizzas/{pizza_id}", params={"depth": 0}).json(), "Sauce")
+    assert sauce["sub_ingredients"] == []
+
+
+def test_cycles_are_cut(client, session_factory):
+    pizza_id, _ = _seed_deep_pizza(session_factory)
+    loop_a = _ingredient(client.get(f"/pizzas/{pizza_id}", params={"depth": 10}).json(), "Loop A")
+    assert loop_a["sub_ingredients"][0]["name"] == "Loop B"
+    assert loop_a["sub_ingredients"][0]["sub_ingredients"] == []
+
+    ingredients = {i["name"]: i for i in client.get("/ingredients/").json()}
+    assert ingredients["Loop B"]["sub_ingredients"][0]["name"] == "Loop A"
+    assert ingredients["Loop B"]["sub_ingredients"][0]["sub_ingredients"] == []
+    assert ingredients["Sauce"]["sub_ingredients"][0]["sub_ingredients"][0]["name"] == "Shrimp"
+
+
+def test_depth_does_not_add_queries(client, session_factory, statements):
+    pizza_id, _ = _seed_deep_pizza(session_factory)
+    statements.reset()
+    client.get(f"/pizzas/{pizza_id}", params={"depth": 1})
+    shallow = statements.count
+    statements.reset()
+    client.get(f"/pizzas/{pizza_id}", params={"depth": 10})
+    assert statements.count == shallow
+
+
+def test_deep_allergen_change_updates_index(client, session_factory):
+    pizza_id, stock_id = _seed_deep_pizza(session_factory)
+    db = session_factory()
+    stock = db.get(Ingredient, stock_id)
+    stock.sub_ingredients.append(Ingredient(name="Celery", is_allergen=True))
+    db.commit()
+    db.close()
+    assert client.get(f"/pizzas/{pizza_id}").json()["allergens"] == ["Celery", "Shrimp"]
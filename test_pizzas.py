@@ -0,0 +1,176 @@
+"""
+Tests for the pizza listing and detail endpoints
+"""
+
+import pytest
+
+from app.models.pizza import Pizza
+from app.routers.pizza import _encode_cursor
+from conftest import seed_catalog
+
+
+def test_list_statement_count_is_constant(client, session_factory, statements):
+    """GET /pizzas must not issue per-pizza or per-ingredient lazy loads"""
+    seed_catalog(session_factory, pizza_count=5)
+    statements.reset()
+    response = client.get("/pizzas")
+    assert response.status_code == 200
+    assert response.json()["total"] == 5
+    small_catalog_statements = statements.count
+
+    seed_catalog(session_factory, pizza_count=200, start=5)
+    statements.reset()
+    response = client.get("/pizzas")
+    assert response.status_code == 200
+    assert response.json()["total"] == 205
+    assert statements.count == small_catalog_statements
+
+
+def test_detail_statement_count_is_constant(client, session_factory, statements):
+    """GET /pizzas/{id} loads the whole ingredient graph in a fixed number of statements"""
+    seed_catalog(session_factory, pizza_count=1, ingredients_per_pizza=2)
+    seed_catalog(session_factory, pizza_count=1, ingredients_per_pizza=20, start=1)
+
+    statements.reset()
+    small = client.get("/pizzas/1")
+    small_pizza_statements = statements.count
+
+    statements.reset()
+    large = client.get("/pizzas/2")
+    assert statements.count == small_pizza_statements
+
+    assert len(small.json()["ingredients"]) == 2
+    assert len(large.json()["ingredients"]) == 20
+    assert all(len(i["sub_ingredients"]) == 1 for i in large.json()["ingredients"])
+
+
+def test_allergens_include_sub_ingredients(client, session_factory):
+    seed_catalog(session_factory, pizza_count=1, ingredients_per_pizza=3)
+    pizza = client.get("/pizzas/1").json()
+    assert sorted(pizza["allergens"]) == [
+        "Ingredient 0-0",
+        "Sub-ingredient 0-0",
+        "Sub-ingredient 0-2",
+    ]
+
+
+def test_missing_pizza_returns_404(client):
+    response = client.get("/pizzas/999")
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Pizza not found"}
+
+
+def test_keyset_pagination_walks_every_pizza_once(client, session_factory):
+    seed_catalog(session_factory, pizza_count=25, ingredients_per_pizza=1)
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 10}
+        if cursor:
+            params["cursor"] = cursor
+        page = client.get("/pizzas", params=params).json()
+        assert page["total"] == 25
+        seen.extend(pizza["name"] for pizza in page["pizzas"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == sorted(f"Pizza {i:05d}" for i in range(25))
+
+
+@pytest.mark.parametrize("sort_by", ["name", "-name"])
+def test_pagination_crosses_null_names(client, session_factory, sort_by):
+    db = session_factory()
+    db.add_all([
+        Pizza(name=None, description="Unnamed"),
+        Pizza(name="Margherita", description="Classic"),
+        Pizza(name=None, description="Also unnamed"),
+    ])
+    db.commit()
+    db.close()
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 1, "sort_by": sort_by}
+        if cursor:
+            params["cursor"] = cursor
+        page = client.get("/pizzas", params=params).json()
+        assert page["total"] == 3
+        seen.extend((pizza["name"], pizza["id"]) for pizza in page["pizzas"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    # NULL names sort first ascending and last descending, ties by id
+    expected = [(None, 1), (None, 3), ("Margherita", 2)]
+    assert seen == (expected if sort_by == "name" else expected[::-1])
+
+
+def test_invalid_cursor_is_rejected(client):
+    response = client.get("/pizzas", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("sort_by, values", [
+    ("name", [[1], 1]),
+    ("name", [{"name": "x"}, 1]),
+    ("name", ["x", "y"]),
+    ("name", [1, 2]),
+    ("id", [True]),
+    ("id", [1.5]),
+    ("-allergen_free,name", [1, "x", 1]),
+    ("allergen_count", [None, 1]),
+])
+def test_cursor_values_must_match_the_sort_keys(client, session_factory, sort_by, values):
+    seed_catalog(session_factory, pizza_count=3)
+    params = {"sort_by": sort_by, "cursor": _encode_cursor(values)}
+    response = client.get("/pizzas", params=params)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+def test_fields_projection_skips_nested_data(client, session_factory, statements):
+    seed_catalog(session_factory, pizza_count=3)
+    statements.reset()
+    page = client.get("/pizzas", params={"fields": "id,name"}).json()
+    # Catalog version, COUNT and page query; the ingredient graph is never loaded
+    assert statements.count == 3
+    assert set(page["pizzas"][0]) == {"id", "name", "description"}
+
+    page = client.get("/pizzas", params={"fields": "allergens"}).json()
+    assert set(page["pizzas"][0]) == {"id", "name", "description", "allergens"}
+
+
+def test_batch_lookup_preserves_order_and_reports_missing(client, session_factory):
+    seed_catalog(session_factory, pizza_count=5, ingredients_per_pizza=2)
+    response = client.get("/pizzas/batch", params={"ids": "4,999,2,4,1"})
+    assert response.status_code == 200
+    body = response.json()
+    assert [pizza["id"] for pizza in body["pizzas"]] == [4, 2, 1]
+    assert body["missing"] == [999]
+    assert body["pizzas"][0] == client.get("/pizzas/4").json()
+
+
+@pytest.mark.parametrize("ids", [str(2 ** 63), f"1,{-2 ** 64}"])
+def test_batch_lookup_rejects_ids_beyond_64_bits(client, session_factory, ids):
+    seed_catalog(session_factory, pizza_count=2)
+    response = client.get("/pizzas/batch", params={"ids": ids})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "ids must be 64-bit integers"
+
+
+def test_batch_lookup_statement_count_is_constant(client, session_factory, statements):
+    seed_catalog(session_factory, pizza_count=50)
+    statements.reset()
+    client.get("/pizzas/batch", params={"ids": "1,2"})
+    few = statements.count
+
+    statements.reset()
+    client.get("/pizzas/batch", params={"ids": ",".join(str(i) for i in range(1, 51))})
+    assert statements.count == few
+
+
+def test_batch_lookup_rejects_bad_id_lists(client):
+    assert client.get("/pizzas/batch", params={"ids": "1,two"}).status_code == 400
+    assert client.get("/pizzas/batch", params={"ids": ","}).status_code == 400
+    too_many = ",".join(str(i) for i in range(1, 102))
+    assert client.get("/pizzas/batch", params={"ids": too_many}).status_code == 400
@@ -0,0 +1,109 @@
+"""
+Tests for request profiling and metrics
+"""
+
+import pstats
+import re
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.database.connection import get_session_router
+from app.database.routing import SessionRouter
+from app.routers import pizza_router, ingredients_router
+from app.services import profiling, response_cache
+from app.services.catalog_version import catalog_version
+from conftest import seed_catalog
+
+
+@pytest.fixture
+def profiled_client(engine, tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "registry", profiling.MetricsRegistry())
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path / "profiles"))
+    monkeypatch.setattr(catalog_version, "check_interval", 0)
+    response_cache.clear()
+    catalog_version.invalidate()
+
+    app = FastAPI()
+    app.include_router(pizza_router)
+    app.include_router(ingredients_router)
+    router = SessionRouter(engine)
+    app.dependency_overrides[get_session_router] = lambda: router
+    profiling.install_metrics(app)
+    profiling.install_profiling(app, sample_rate=1.0, slow_threshold_ms=0)
+    with TestClient(app) as client:
+        yield client
+
+
+def _timings(response):
+    return {
+        name: float(duration)
+        for name, duration in re.findall(r"(\w+);dur=([\d.]+)", response.headers["server-timing"])
+    }
+
+
+def test_server_timing_reports_request_phases(profiled_client, session_factory):
+    seed_catalog(session_factory, 3)
+
+    response = profiled_client.get("/pizzas/")
+
+    assert response.status_code == 200
+    timings = _timings(response)
+    assert set(timings) == {"db", "serialize", "handler", "total"}
+    assert 0 < timings["db"] <= timings["handler"] <= timings["total"]
+    assert timings["serialize"] > 0
+    assert re.search(r'db;dur=[\d.]+;desc="[1-9]\d* queries"', response.headers["server-timing"])
+
+
+def test_metrics_endpoint_exposes_prometheus_text(profiled_client, session_factory):
+    seed_catalog(session_factory, 2)
+    profiled_client.get("/pizzas/1")
+    profiled_client.get("/pizzas/2")
+    profiled_client.get("/pizzas/999")
+
+    response = profiled_client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    # Path parameters are reported under the route template
+    assert 'pizza_http_requests_total{method="GET",route="/pizzas/{pizza_id}",status="200"} 2' in body
+    assert 'pizza_http_requests_total{method="GET",route="/pizzas/{pizza_id}",status="404"} 1' in body
+    assert 'pizza_http_request_duration_seconds_count{route="/pizzas/{pizza_id}"} 3' in body
+    assert re.search(r'pizza_db_statements_total\{route="/pizzas/\{pizza_id\}"\} [1-9]', body)
+    assert "pizza_response_cache_hits_total" in body
+    assert "pizza_response_cache_coalesced_total" in body
+
+
+def test_slow_sampled_requests_write_profiles(profiled_client, session_factory, tmp_path):
+    seed_catalog(session_factory, 2)
+    profiled_client.get("/ingredients/")
+
+    (profile_path,) = (tmp_path / "profiles").glob("*.prof")
+    assert "GET-ingredients" in profile_path.name
+    functions = {name for _, _, name in pstats.Stats(str(profile_path)).stats}
+    assert "get_ingredients" in functions
+
+
+def test_metrics_endpoint_is_always_installed(client):
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert "pizza_response_cache_hits_total" in response.text
+    assert "server-timing" not in response.headers
+
+
+def test_requests_are_served_when_another_profiler_is_active(
+    profiled_client, session_factory, monkeypatch, tmp_path
+):
+    class BusyProfile:
+        def enable(self):
+            raise ValueError("Another profiling tool is already active")
+
+    monkeypatch.setattr(profiling, "cProfile", SimpleNamespace(Profile=BusyProfile))
+    seed_catalog(session_factory, 1)
+
+    assert profiled_client.get("/ingredients/").status_code == 200
+    assert not (tmp_path / "profiles").exists()
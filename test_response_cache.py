@@ -0,0 +1,222 @@
+"""
+Tests for the in-process response cache
+"""
+
+import gzip
+import threading
+import time
+
+import pytest
+
+from app.models.pizza import Pizza
+from app.services import response_cache
+from app.services.compression import ENCODERS
+from app.services.response_cache import ResponseCache
+from conftest import seed_catalog
+
+
+def test_lru_eviction_by_entries_and_bytes():
+    cache = ResponseCache(max_entries=2, max_bytes=10, ttl=60)
+    cache.get_or_set("a", lambda: b"aaaa")
+    cache.get_or_set("b", lambda: b"bbbb")
+    cache.get("a")
+    cache.get_or_set("c", lambda: b"cccc")
+    # "b" was least recently used
+    assert cache.get("b") is None
+    assert cache.get("a") == b"aaaa"
+
+    cache.get_or_set("d", lambda: b"dddddddd")
+    assert cache.stats()["bytes"] <= 10
+    assert cache.get("d") == b"dddddddd"
+
+
+def test_ttl_expiry():
+    cache = ResponseCache(max_entries=10, max_bytes=100, ttl=0.01)
+    cache.get_or_set("a", lambda: b"old")
+    time.sleep(0.02)
+    assert cache.get_or_set("a", lambda: b"new") == b"new"
+
+
+def test_invalidation_during_compute_is_not_stored():
+    cache = ResponseCache(max_entries=10, max_bytes=100, ttl=60)
+
+    def compute():
+        cache.clear()
+        return b"stale"
+
+    assert cache.get_or_set("a", compute) == b"stale"
+    assert cache.get("a") is None
+
+
+def test_encoded_variants_share_the_entry_and_byte_limit():
+    cache = ResponseCache(max_entries=10, max_bytes=12, ttl=60)
+    body = cache.get_or_set("a", lambda: b"aaaaaaaa")
+    assert cache.encoded("a", body, "gzip", lambda raw: b"zz") == b"zz"
+    assert cache.encoded("a", body, "gzip", lambda raw: b"recomputed") == b"zz"
+    assert cache.stats()["bytes"] == 10
+    assert cache.stats()["hits"] == 0
+
+    # Growing past the byte limit evicts the entry along with its variants
+    cache.get_or_set("b", lambda: b"bbbb")
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] == 4
+
+
+def _concurrent_calls(cache, key, compute, count):
+    """Run ``get_or_set`` from ``count`` threads; the first one starts alone"""
+    results = []
+
+    def call():
+        try:
+            results.append(cache.get_or_set(key, compute))
+        except Exception as error:
+            results.append(error)
+
+    threads = [threading.Thread(target=call) for _ in range(count)]
+    threads[0].start()
+    while cache.stats()["in_flight"] == 0:
+        time.sleep(0.001)
+    for thread in threads[1:]:
+        thread.start()
+    return threads, results
+
+
+@pytest.mark.parametrize("max_entries", [10, 0])
+def test_concurrent_misses_share_one_computation(max_entries):
+    cache = ResponseCache(max_entries=max_entries, max_bytes=100, ttl=60)
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return b"body"
+
+    threads, results = _concurrent_calls(cache, "a", compute, 5)
+    while cache.stats()["coalesced"] < 4:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [b"body"] * 5
+    assert cache.stats()["in_flight"] == 0
+
+
+def test_concurrent_misses_share_the_error():
+    cache = ResponseCache(max_entries=10, max_bytes=100, ttl=60)
+    release = threading.Event()
+
+    def compute():
+        release.wait(5)
+        raise ValueError("boom")
+
+    threads, results = _concurrent_calls(cache, "a", compute, 3)
+    while cache.stats()["coalesced"] < 2:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert [type(result) for result in results] == [ValueError] * 3
+    # The failed flight is gone, so the next call computes again
+    assert cache.get_or_set("a", lambda: b"ok") == b"ok"
+
+
+def test_waiting_calls_release_first_and_stop_waiting_after_the_timeout():
+    cache = ResponseCache(max_entries=10, max_bytes=100, ttl=60, coalesce_wait=0.05)
+    release = threading.Event()
+    released = []
+
+    def slow():
+        release.wait(5)
+        return b"slow"
+
+    leader = threading.Thread(target=cache.get_or_set, args=("a", slow))
+    leader.start()
+    while cache.stats()["in_flight"] == 0:
+        time.sleep(0.001)
+    try:
+        body = cache.get_or_set("a", lambda: b"own", before_wait=lambda: released.append(1))
+    finally:
+        release.set()
+        leader.join()
+
+    assert body == b"own"
+    assert released == [1]
+    assert cache.stats()["coalesce_timeouts"] == 1
+
+
+def test_coalescing_can_be_disabled():
+    cache = ResponseCache(max_entries=10, max_bytes=100, ttl=60, coalesce=False)
+    calls = []
+    barrier = threading.Barrier(3, timeout=5)
+
+    def compute():
+        calls.append(1)
+        barrier.wait()
+        return b"body"
+
+    threads = [
+        threading.Thread(target=cache.get_or_set, args=("a", compute)) for _ in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 3
+    assert cache.stats()["coalesced"] == 0
+
+
+def test_hits_skip_the_database(client, session_factory, statements):
+    seed_catalog(session_factory, pizza_count=3)
+    first = client.get("/pizzas", params={"search": "Pizza"})
+    hits = response_cache.hits
+    statements.reset()
+    second = client.get("/pizzas", params={"search": "  PIZZA "})
+    # Only the catalog version check reaches the database
+    assert statements.count == 1
+    assert response_cache.hits == hits + 1
+    assert second.json() == first.json()
+
+
+def test_catalog_writes_invalidate(client, session_factory):
+    seed_catalog(session_factory, pizza_count=2)
+    assert client.get("/pizzas").json()["total"] == 2
+
+    db = session_factory()
+    db.add(Pizza(name="New", description="Fresh off the press"))
+    db.commit()
+    db.close()
+    assert client.get("/pizzas").json()["total"] == 3
+
+
+def test_compressed_bodies_are_cached(client, session_factory, monkeypatch):
+    seed_catalog(session_factory, pizza_count=10)
+    compressions = []
+
+    def counting_gzip(body):
+        compressions.append(len(body))
+        return gzip.compress(body)
+
+    monkeypatch.setitem(ENCODERS, "gzip", counting_gzip)
+    identity = client.get("/pizzas", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in identity.headers
+    assert identity.headers["vary"] == "Accept-Encoding"
+
+    hits = response_cache.hits
+    for _ in range(2):
+        response = client.get("/pizzas", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.json() == identity.json()
+    assert compressions == [len(identity.content)]
+    assert response_cache.hits == hits + 2
+
+
+def test_small_bodies_are_not_compressed(client, session_factory):
+    seed_catalog(session_factory, pizza_count=1)
+    response = client.get(
+        "/pizzas", params={"fields": "id", "limit": 1}, headers={"Accept-Encoding": "gzip"}
+    )
+    assert "content-encoding" not in response.headers
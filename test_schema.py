@@ -0,0 +1,81 @@
+"""
+Tests for schema setup at startup
+"""
+
+import threading
+
+from fastapi.testclient import TestClient
+from sqlalchemy import func, inspect, select, text
+
+import main
+from app.database.connection import get_session_router
+from app.database.engine import create_database_engine
+from app.database.routing import SessionRouter
+from app.models.catalog import CatalogVersion
+from app.services import setup_schema
+
+
+def _index_names(engine, table):
+    return {index["name"] for index in inspect(engine).get_indexes(table)}
+
+
+def test_setup_schema_adds_missing_indexes_to_existing_tables(tmp_path):
+    engine = create_database_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    try:
+        setup_schema(engine)
+        with engine.begin() as connection:
+            connection.execute(text("DROP INDEX ix_pizza_ingredients_ingredient_id"))
+
+        setup_schema(engine)
+        setup_schema(engine)
+
+        assert "ix_pizza_ingredients_ingredient_id" in _index_names(engine, "pizza_ingredients")
+    finally:
+        engine.dispose()
+
+
+def test_workers_can_set_up_the_schema_at_the_same_time(tmp_path):
+    url = f"sqlite:///{tmp_path / 'fresh.db'}"
+    engines = [create_database_engine(url) for _ in range(4)]
+    barrier = threading.Barrier(len(engines))
+    errors = []
+
+    def start_worker(engine):
+        barrier.wait()
+        try:
+            setup_schema(engine)
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=start_worker, args=(engine,)) for engine in engines]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        with engines[0].connect() as connection:
+            assert connection.execute(select(func.count()).select_from(CatalogVersion)).scalar() == 1
+        assert {"pizzas_fts", "ingredients_fts"} <= set(inspect(engines[0]).get_table_names())
+    finally:
+        for engine in engines:
+            engine.dispose()
+
+
+def test_lifespan_runs_schema_setup_unless_disabled(tmp_path, monkeypatch):
+    # Startup follows the overridden session router, never the configured database
+    engine = create_database_engine(f"sqlite:///{tmp_path / 'startup.db'}")
+    router = SessionRouter(engine)
+    main.app.dependency_overrides[get_session_router] = lambda: router
+    try:
+        monkeypatch.setattr(main, "SCHEMA_SETUP", False)
+        with TestClient(main.app):
+            assert inspect(engine).get_table_names() == []
+
+        monkeypatch.setattr(main, "SCHEMA_SETUP", True)
+        with TestClient(main.app):
+            assert "pizzas" in inspect(engine).get_table_names()
+    finally:
+        main.app.dependency_overrides.clear()
+        engine.dispose()
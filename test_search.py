@@ -0,0 +1,72 @@
+"""
+Tests for full-text pizza and ingredient search
+"""
+
+from app.models.pizza import Pizza, Ingredient
+
+
+def _seed(session_factory):
+    db = session_factory()
+    db.add_all([
+        Pizza(name="Margherita", description="Classic Italian pizza with fresh tomatoes and basil"),
+        Pizza(name="Gluten-Free Margherita", description="Classic margherita made with gluten-free dough"),
+        Pizza(name="Hawaiian", description="Sweet and savory combination of ham and pineapple"),
+        Pizza(name="Spicy Diavola", description="Salami, chili and jalapeños"),
+        Pizza(name="Supreme", description="Loaded with pepperoni, sausage and mushrooms"),
+        Pizza(name="Pepperoni", description="Traditional pizza with mozzarella cheese"),
+        Ingredient(name="Mozzarella Cheese", is_allergen=True),
+        Ingredient(name="Jalapeños"),
+    ])
+    db.commit()
+    db.close()
+
+
+def _names(response):
+    return [pizza["name"] for pizza in response.json()["pizzas"]]
+
+
+def test_prefix_and_multi_term_search(client, session_factory):
+    _seed(session_factory)
+    assert _names(client.get("/pizzas", params={"search": "marg"})) == [
+        "Gluten-Free Margherita", "Margherita"
+    ]
+    assert _names(client.get("/pizzas", params={"search": "classic gluten"})) == [
+        "Gluten-Free Margherita"
+    ]
+    assert _names(client.get("/pizzas", params={"search": "pineapple ham"})) == ["Hawaiian"]
+    assert _names(client.get("/pizzas", params={"search": "jalapenos"})) == ["Spicy Diavola"]
+
+
+def test_relevance_ranking_prefers_name_matches(client, session_factory):
+    _seed(session_factory)
+    response = client.get("/pizzas", params={"search": "pepperoni", "sort_by": "relevance"})
+    assert response.json()["total"] == 2
+    assert _names(response) == ["Pepperoni", "Supreme"]
+
+
+def test_relevance_pagination(client, session_factory):
+    _seed(session_factory)
+    params = {"search": "pepperoni", "sort_by": "relevance", "limit": 1}
+    first = client.get("/pizzas", params=params).json()
+    second = client.get("/pizzas", params={**params, "cursor": first["next_cursor"]}).json()
+    assert [p["name"] for p in first["pizzas"] + second["pizzas"]] == ["Pepperoni", "Supreme"]
+    assert second["next_cursor"] is None
+
+
+def test_search_index_follows_updates(client, session_factory):
+    _seed(session_factory)
+    db = session_factory()
+    pizza = db.query(Pizza).filter(Pizza.name == "Hawaiian").one()
+    pizza.name = "Tropical"
+    db.commit()
+    db.close()
+    assert _names(client.get("/pizzas", params={"search": "hawaiian"})) == []
+    assert _names(client.get("/pizzas", params={"search": "tropical"})) == ["Tropical"]
+
+
+def test_ingredient_search(client, session_factory):
+    _seed(session_factory)
+    response = client.get("/ingredients/", params={"search": "moz"})
+    assert [i["name"] for i in response.json()] == ["Mozzarella Cheese"]
+    response = client.get("/ingredients/", params={"search": "jalap"})
+    assert [i["name"] for i in response.json()] == ["Jalapeños"]
@@ -0,0 +1,73 @@
+"""
+Tests for read/write session routing
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.database.connection import get_session_router
+from app.database.engine import create_database_engine, create_read_engines
+from app.database.routing import SessionRouter
+from app.models.pizza import Pizza
+from app.services import response_cache, setup_schema
+from app.services.catalog_version import catalog_version
+from main import app
+
+
+def _database(path, pizza_name=None):
+    engine = create_database_engine(f"sqlite:///{path}")
+    setup_schema(engine)
+    if pizza_name:
+        with engine.begin() as connection:
+            connection.execute(Pizza.__table__.insert().values(name=pizza_name, description=""))
+    return engine
+
+
+def test_reads_rotate_over_replicas(tmp_path):
+    primary = _database(tmp_path / "primary.db")
+    replicas = [
+        create_database_engine(f"sqlite:///{tmp_path / 'primary.db'}", read_only=True)
+        for _ in range(2)
+    ]
+    router = SessionRouter(primary, replicas)
+    try:
+        bound = [router.read_session().get_bind() for _ in range(4)]
+        assert bound == [replicas[0], replicas[1], replicas[0], replicas[1]]
+        assert router.write_session().get_bind() is primary
+    finally:
+        router.dispose()
+
+
+def test_sqlite_read_engine_rejects_writes(tmp_path):
+    primary = _database(tmp_path / "primary.db")
+    (read_engine,) = create_read_engines(f"sqlite:///{tmp_path / 'primary.db'}", [])
+    try:
+        with read_engine.connect() as connection:
+            assert connection.execute(text("SELECT count(*) FROM pizzas")).scalar() == 0
+            with pytest.raises(OperationalError, match="readonly"):
+                connection.execute(text("INSERT INTO pizzas (name) VALUES ('Nope')"))
+    finally:
+        read_engine.dispose()
+        primary.dispose()
+
+
+def test_get_handlers_use_the_read_pool(tmp_path, monkeypatch):
+    primary = _database(tmp_path / "primary.db", "Primary Pizza")
+    _database(tmp_path / "replica.db", "Replica Pizza").dispose()
+    replica = create_database_engine(f"sqlite:///{tmp_path / 'replica.db'}", read_only=True)
+    router = SessionRouter(primary, [replica])
+
+    app.dependency_overrides[get_session_router] = lambda: router
+    response_cache.clear()
+    catalog_version.invalidate()
+    monkeypatch.setattr(catalog_version, "check_interval", 0)
+    try:
+        with TestClient(app) as client:
+            names = [pizza["name"] for pizza in client.get("/pizzas/").json()["pizzas"]]
+            assert names == ["Replica Pizza"]
+            assert client.get("/pizzas/1").json()["name"] == "Replica Pizza"
+    finally:
+        app.dependency_overrides.clear()
+        router.dispose()
@@ -0,0 +1,105 @@
+"""
+Tests for the ingredient typeahead endpoint
+"""
+
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
+
+from app.models.pizza import Pizza, Ingredient
+from app.services import bump_catalog_version, catalog_events, suggest
+from app.services.suggest import SuggestionIndex
+
+
+def _add(session_factory, *objects):
+    db = session_factory()
+    db.add_all(objects)
+    db.commit()
+    db.close()
+
+
+def _names(client, q, **params):
+    response = client.get("/ingredients/suggest", params={"q": q, **params})
+    assert response.status_code == 200
+    return [suggestion["name"] for suggestion in response.json()]
+
+
+def test_prefix_matching_folds_case_and_accents(client, session_factory):
+    _add(
+        session_factory,
+        Ingredient(name="Jalapeños"),
+        Ingredient(name="Mozzarella"),
+        Ingredient(name="Fresh Mozzarella"),
+        Ingredient(name="Mozzarella di Bufala"),
+        Ingredient(name="Tomato"),
+    )
+
+    assert _names(client, "JALAPEN") == ["Jalapeños"]
+    assert _names(client, "jalapeñ") == ["Jalapeños"]
+    # Whole-name matches rank ahead of word matches
+    assert _names(client, "moz") == ["Mozzarella", "Mozzarella di Bufala", "Fresh Mozzarella"]
+    assert _names(client, "moz", limit=2) == ["Mozzarella", "Mozzarella di Bufala"]
+    assert _names(client, "fresh  moz") == ["Fresh Mozzarella"]
+    assert _names(client, "!!") == []
+
+
+def test_kind_selects_pizza_names(client, session_factory):
+    _add(session_factory, Pizza(name="Margherita", description=""), Ingredient(name="Marjoram"))
+
+    assert _names(client, "mar") == ["Marjoram"]
+    assert _names(client, "mar", kind="pizza") == ["Margherita"]
+    assert _names(client, "mar", kind="all") == ["Margherita", "Marjoram"]
+    assert client.get("/ingredients/suggest", params={"q": "m", "kind": "x"}).status_code == 400
+
+
+def test_orm_commits_update_the_index_in_place(client, session_factory, monkeypatch):
+    _add(session_factory, Ingredient(name="Basil"))
+    assert _names(client, "bas") == ["Basil"]
+
+    loads = []
+    monkeypatch.setattr(suggest.suggestion_index, "load", lambda db: loads.append(db))
+
+    db = session_factory()
+    basil = db.query(Ingredient).filter_by(name="Basil").one()
+    basil.name = "Thai Basil"
+    db.add(Ingredient(name="Bacon"))
+    db.commit()
+    db.close()
+
+    assert _names(client, "ba") == ["Bacon", "Thai Basil"]
+    assert _names(client, "thai") == ["Thai Basil"]
+    assert loads == []
+
+
+def test_in_place_updates_do_not_depend_on_listener_order(client, session_factory, monkeypatch):
+    # Move the version bump behind every other after_flush listener
+    event.remove(Session, "after_flush", catalog_events._track_catalog_writes)
+    event.listen(Session, "after_flush", catalog_events._track_catalog_writes)
+    assert _names(client, "sage") == []
+
+    loads = []
+    monkeypatch.setattr(suggest.suggestion_index, "load", lambda db: loads.append(db))
+    _add(session_factory, Ingredient(name="Sage"))
+
+    assert _names(client, "sage") == ["Sage"]
+    assert loads == []
+
+
+def test_writes_outside_the_orm_trigger_a_rebuild(client, engine):
+    assert _names(client, "oregano") == []
+    with engine.begin() as connection:
+        connection.execute(insert(Ingredient).values(name="Oregano", is_allergen=False))
+        bump_catalog_version(connection)
+    assert _names(client, "oregano") == ["Oregano"]
+
+
+def test_index_updates():
+    index = SuggestionIndex()
+    index.build({"ingredient": {1: "Red Onion", 2: "Onion"}}, version=1)
+    assert [s["id"] for s in index.suggest("onion", 10, ["ingredient"])] == [2, 1]
+
+    index.apply([("ingredient", 2, None), ("ingredient", 3, "Olive")], 2, 2)
+    assert [s["name"] for s in index.suggest("o", 10, ["ingredient"])] == ["Olive", "Red Onion"]
+
+    # A gap in versions means changes were missed
+    index.apply([("ingredient", 4, "Oregano")], 4, 4)
+    assert index.version is None